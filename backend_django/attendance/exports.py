@@ -0,0 +1,25 @@
+from core.exports import Export, Column, fmt_datetime
+
+
+class AttendanceRecordsExport(Export):
+    permission = 'can_manage_events'
+    columns = (
+        Column('username', 'Username', lambda r: r['user__username']),
+        Column('full_name', 'Full Name', lambda r: r['user__profile__full_name'] or ''),
+        Column('roll_number', 'Roll Number', lambda r: r['user__profile__roll_number'] or ''),
+        Column('sig', 'SIG', lambda r: r['user__profile__primary_sig__name'] or ''),
+        Column('year', 'Year', lambda r: r['user__profile__year'] or ''),
+        Column('status', 'Status'),
+        Column('marked_by', 'Marked By', lambda r: r['marked_by__username'] or ''),
+        Column('timestamp', 'Updated At', lambda r: fmt_datetime(r['timestamp'])),
+    )
+
+    def __init__(self, session):
+        self.session = session
+        self.filename = f"attendance_{session.date:%Y-%m-%d}_{session.id}"
+
+    def get_queryset(self):
+        return self.session.records.order_by('user__profile__full_name').values(
+            'user__username', 'user__profile__full_name', 'user__profile__roll_number',
+            'user__profile__primary_sig__name', 'user__profile__year', 'status', 'marked_by__username', 'timestamp'
+        )
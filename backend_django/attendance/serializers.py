@@ -1,15 +1,17 @@
 from rest_framework import serializers
+from core.fieldsets import SparseModelSerializer
 from .models import AttendanceSession, AttendanceRecord
 from users.serializers import UserSerializer
 from users.models import User, MemberProfile
 
-class AttendanceRecordSerializer(serializers.ModelSerializer):
+class AttendanceRecordSerializer(SparseModelSerializer):
     user_details = serializers.SerializerMethodField()
     
     class Meta:
         model = AttendanceRecord
         fields = ['id', 'session', 'user', 'user_details', 'status', 'timestamp']
         read_only_fields = ['timestamp']
+        related_lookups = {'user_details': ('user__profile',)}
 
     def get_user_details(self, obj):
         # Lightweight user details for the list
@@ -25,7 +27,7 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
         except:
             return {'id': obj.user.id, 'username': obj.user.username}
 
-class AttendanceSessionSerializer(serializers.ModelSerializer):
+class AttendanceSessionSerializer(SparseModelSerializer):
     stats = serializers.SerializerMethodField()
     # Accept fields for creation
     target_sigs_ids = serializers.ListField(child=serializers.IntegerField(), write_only=True, required=False)
@@ -38,6 +40,7 @@ class AttendanceSessionSerializer(serializers.ModelSerializer):
             'status', 'created_at', 'stats'
         ]
         read_only_fields = ['created_by', 'created_at', 'stats', 'target_sigs']
+        expandable = ('stats',)
 
     def get_stats(self, obj):
         total = obj.records.count()
@@ -6,8 +6,10 @@ from .models import AttendanceSession, AttendanceRecord
 from .serializers import AttendanceSessionSerializer, AttendanceRecordSerializer
 from users.permissions import GlobalPermission
 from users.models import User
+from .exports import AttendanceRecordsExport
+from core.fieldsets import SparseQuerysetMixin
 
-class AttendanceSessionViewSet(viewsets.ModelViewSet):
+class AttendanceSessionViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = AttendanceSession.objects.all().order_by('-date')
     serializer_class = AttendanceSessionSerializer
     permission_classes = [GlobalPermission]
@@ -41,10 +43,10 @@ class AttendanceSessionViewSet(viewsets.ModelViewSet):
 
         # 3. Filter by SIG/Scope
         if session.scope_type == 'SIG':
-            sig_names = list(session.target_sigs.values_list('name', flat=True))
-            if sig_names:
-                # Users who have this SIG as 'sig' field OR in 'sigs' M2M
-                qs = qs.filter(Q(profile__sig__in=sig_names) | Q(profile__sigs__name__in=sig_names)).distinct()
+            sig_ids = list(session.target_sigs.values_list('id', flat=True))
+            if sig_ids:
+                # Users whose primary SIG OR one of whose 'sigs' is targeted (both indexed FK columns)
+                qs = qs.filter(Q(profile__primary_sig_id__in=sig_ids) | Q(profile__sigs__id__in=sig_ids)).distinct()
         
         # Exclude users who already have a record
         existing_ids = session.records.values_list('user_id', flat=True)
@@ -73,6 +75,11 @@ class AttendanceSessionViewSet(viewsets.ModelViewSet):
         records = session.records.select_related('user__profile').all().order_by('user__profile__full_name')
         return Response(AttendanceRecordSerializer(records, many=True).data)
 
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """Streams the session's records as CSV, or NDJSON with ?fmt=ndjson."""
+        return AttendanceRecordsExport(self.get_object()).response(request)
+
     @action(detail=True, methods=['post'])
     def batch_update(self, request, pk=None):
         """
@@ -91,7 +98,7 @@ class AttendanceSessionViewSet(viewsets.ModelViewSet):
                 count += 1
         return Response({'updated': count})
 
-class AttendanceRecordViewSet(viewsets.ReadOnlyModelViewSet):
+class AttendanceRecordViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     """
     For viewing historical attendance of a specific user.
     """
@@ -3,6 +3,13 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Live project streams (/api/projects/<id>/stream/, projects.streams) are async
+views and only stream when served from here, e.g.
+
+    uvicorn config.asgi:application --uds /run/uvicorn.sock
+
+Under WSGI they answer 501 and dashboards fall back to polling.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
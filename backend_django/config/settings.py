@@ -5,10 +5,13 @@ Django settings for config project.
 from pathlib import Path
 from decouple import config
 import os
+import sys
 import dj_database_url
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+TESTING = 'test' in sys.argv
+
 
 # ======================
 # SECURITY
@@ -193,16 +196,49 @@ CORS_ALLOWED_ORIGINS = config(
 CORS_ALLOW_CREDENTIALS = True
 
 
+# ======================
+# CACHE (core.caching)
+# ======================
+
+# Shared by every worker: version counters, typing state and cached payloads must be
+# visible to all of them. sqlite needs no service; memcached/redis need pymemcache/redis.
+CACHE_BACKENDS = {
+    'sqlite': ('core.sqlite_cache.SQLiteCache', str(BASE_DIR / 'var' / 'cache.sqlite3')),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'var' / 'cache')),
+    'memcached': ('django.core.cache.backends.memcached.PyMemcacheCache', '127.0.0.1:11211'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+    # Per process: tests, or a single-worker setup
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem' if TESTING else 'sqlite')
+_cache_class, _cache_location = CACHE_BACKENDS[CACHE_BACKEND]
+
+CACHES = {
+    'default': {
+        'BACKEND': _cache_class,
+        'LOCATION': config('CACHE_LOCATION', default=_cache_location),
+        'KEY_PREFIX': config('CACHE_KEY_PREFIX', default='robotech'),
+        # Only the in-process and on-disk backends take MAX_ENTRIES
+        'OPTIONS': {} if CACHE_BACKEND in ('memcached', 'redis') else {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=50000, cast=int),
+        },
+    }
+}
+
+
 # ======================
 # DRF
 # ======================
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
 }
 
+# Seconds an authenticated user bundle may live in the shared cache
+AUTH_USER_CACHE_TTL = config('AUTH_USER_CACHE_TTL', default=60, cast=int)
+
 from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -210,6 +246,73 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
     'UPDATE_LAST_LOGIN': True,
+    # Access tokens carry a versioned permission claim (see users.tokens)
+    'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.PermissionTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.tokens.PermissionTokenRefreshSerializer',
+}
+
+
+# ======================
+# AUDIT LOG PIPELINE (users.audit)
+# ======================
+
+AUDIT_LOG = {
+    # Buffer entries and write them from a background thread (inline writes under tests)
+    'ASYNC': config('AUDIT_LOG_ASYNC', default=not TESTING, cast=bool),
+    'BATCH_SIZE': config('AUDIT_LOG_BATCH_SIZE', default=200, cast=int),
+    'FLUSH_INTERVAL': config('AUDIT_LOG_FLUSH_INTERVAL', default=2.0, cast=float),
+    'MAX_QUEUE': config('AUDIT_LOG_MAX_QUEUE', default=5000, cast=int),
+    # When the queue is full: 'sync' writes inline (backpressure), 'drop' discards and counts
+    'OVERFLOW': config('AUDIT_LOG_OVERFLOW', default='sync'),
+    # Purged rows are archived here as gzip NDJSON (users.retention); unset = no archive
+    'ARCHIVE_DIR': config('AUDIT_LOG_ARCHIVE_DIR', default=None),
+}
+
+
+# ======================
+# IMAGE VARIANTS (core.images)
+# ======================
+
+IMAGE_VARIANTS = {
+    # Render on a background thread pool after commit (inline under tests)
+    'ASYNC': config('IMAGE_VARIANTS_ASYNC', default=not TESTING, cast=bool),
+    'WORKERS': config('IMAGE_VARIANTS_WORKERS', default=2, cast=int),
+    'WIDTHS': (320, 640, 1280),
+    # Any of avif, webp, jpeg; formats the installed Pillow cannot encode are skipped
+    'FORMATS': tuple(config('IMAGE_VARIANTS_FORMATS', default='webp,jpeg').split(',')),
+}
+
+
+# ======================
+# GALLERY BATCH UPLOADS (core.ingest)
+# ======================
+
+GALLERY_INGEST = {
+    # Check and insert uploaded files in the background (inline under tests)
+    'ASYNC': config('GALLERY_INGEST_ASYNC', default=not TESTING, cast=bool),
+    'WORKERS': config('GALLERY_INGEST_WORKERS', default=4, cast=int),
+}
+
+
+# ======================
+# LIVE PROJECT STREAMS (projects.streams, projects.events)
+# ======================
+
+PROJECT_STREAMS = {
+    # CacheBroker relays through the shared cache between the processes that write and those
+    # that hold streams; LocalBroker only reaches streams in the publishing process (tests)
+    'BROKER': config('PROJECT_STREAMS_BROKER', default='projects.events.LocalBroker' if TESTING else 'projects.events.CacheBroker'),
+    # Seconds between CacheBroker's reads of the shared event log (the delivery delay)
+    'POLL_INTERVAL': config('PROJECT_STREAMS_POLL', default=0.25, cast=float),
+    # Per worker; beyond it new streams get 503 + Retry-After. stream_loadtest on one worker:
+    # 1000 streams ~100 MB and ~70 ms to fan an event out to all of them, 5000 ~0.5 GB and ~350 ms
+    'MAX_STREAMS': config('PROJECT_STREAMS_MAX', default=1000, cast=int),
+    'RETRY_AFTER': 30,
+    'HEARTBEAT': config('PROJECT_STREAMS_HEARTBEAT', default=15, cast=int),
+    # Streams end after this many seconds; reconnecting re-checks the token and membership
+    'MAX_AGE': config('PROJECT_STREAMS_MAX_AGE', default=300, cast=int),
+    # Events buffered per listener before it is told to resync
+    'QUEUE_SIZE': 256,
 }
 
 
@@ -0,0 +1,186 @@
+"""
+Namespaced, versioned keys over the shared cache (settings.CACHES, see
+core.sqlite_cache for the default backend). Every cache in the project goes
+through a Namespace:
+
+    me = Namespace('me', ttl=3600)
+    me.key('payload', 12)                    'me:payload:12'
+    me.get(('payload', 12))                  a key's parts: a tuple, or one part
+    me.set(('payload', 12), value)           ttl defaults to the namespace's
+    me.get_many([('a', 1), ('a', 2)])        {('a', 1): ..., ...} in one round trip
+    me.set_many({('a', 1): x, ('a', 2): y})
+
+Versions invalidate without deleting: a scope ('all', ('user', 12), a
+project id...) has an integer counter, and keys built from it die when it
+moves on. Counters start from the clock, so one lost from the cache never
+repeats a value a client or another worker still holds.
+
+    me.version(('user', 12))                 created on first use
+    me.versions(['all', ('user', 12)])       several in one get_many
+    me.bump(('user', 12))                    now; returns the new values
+    me.bump_on_commit(('user', 12))          once the current transaction commits
+
+get_or_set() recomputes a missing value single-flight: one thread per worker
+computes while the others in the worker wait for its result, and a lock key
+keeps other workers waiting for it in the cache instead of computing too.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+_MISSING = object()
+
+# Seconds a single-flight lock may be held, and how often waiters look for the result
+LOCK_TTL = 10
+WAIT_INTERVAL = 0.02
+
+
+def _part(part):
+    return ':'.join(str(p) for p in part) if isinstance(part, tuple) else str(part)
+
+
+def _clock():
+    return time.time_ns() // 1000
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = _MISSING
+        self.error = None
+
+
+class Namespace:
+    def __init__(self, name, ttl=None):
+        self.name = name
+        self.ttl = ttl
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+    def key(self, *parts):
+        return ':'.join([self.name, *(_part(p) for p in parts)])
+
+    def _timeout(self, ttl):
+        return self.ttl if ttl is _MISSING else ttl
+
+    # --- Plain keys ---
+
+    def get(self, parts, default=None):
+        return cache.get(self.key(*_as_tuple(parts)), default)
+
+    def set(self, parts, value, ttl=_MISSING):
+        cache.set(self.key(*_as_tuple(parts)), value, self._timeout(ttl))
+
+    def add(self, parts, value, ttl=_MISSING):
+        return cache.add(self.key(*_as_tuple(parts)), value, self._timeout(ttl))
+
+    def delete(self, parts):
+        cache.delete(self.key(*_as_tuple(parts)))
+
+    def get_many(self, parts_list):
+        """{parts: value} for the keys present."""
+        keys = {self.key(*_as_tuple(parts)): parts for parts in parts_list}
+        return {keys[k]: v for k, v in cache.get_many(list(keys)).items()}
+
+    def set_many(self, mapping, ttl=_MISSING):
+        cache.set_many({self.key(*_as_tuple(parts)): v for parts, v in mapping.items()}, self._timeout(ttl))
+
+    # --- Versions ---
+
+    def _version_key(self, scope):
+        return self.key('version', scope)
+
+    def versions(self, scopes):
+        """Current counters of `scopes`, in order; missing ones are started from the clock."""
+        scopes = list(scopes)
+        keys = [self._version_key(s) for s in scopes]
+        found = cache.get_many(keys)
+        for key in keys:
+            if key not in found:
+                cache.add(key, _clock(), None)
+                found[key] = cache.get(key)
+        return [found[k] for k in keys]
+
+    def version(self, scope):
+        return self.versions([scope])[0]
+
+    def bump(self, *scopes):
+        """Move these scopes to new versions now; returns them in order."""
+        bumped = []
+        for scope in scopes:
+            key = self._version_key(scope)
+            try:
+                bumped.append(cache.incr(key))
+            except ValueError:
+                # Lost from the cache: a fresh clock value is past anything handed out
+                cache.add(key, _clock(), None)
+                bumped.append(cache.get(key))
+        return bumped
+
+    def bump_on_commit(self, *scopes):
+        if scopes:
+            transaction.on_commit(lambda: self.bump(*scopes))
+
+    # --- Single-flight recompute ---
+
+    def get_or_set(self, key, compute, ttl=_MISSING, cache_none=False):
+        """
+        The value at `key` (a full key, from key()), computing and storing it
+        if missing. None results are returned but not stored unless `cache_none`.
+        """
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait(LOCK_TTL)
+            if flight.error is not None:
+                raise flight.error
+            if flight.value is not _MISSING:
+                return flight.value
+            return compute()
+
+        try:
+            flight.value = self._compute_shared(key, compute, self._timeout(ttl), cache_none)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            flight.done.set()
+            with self._flights_lock:
+                self._flights.pop(key, None)
+
+    def _compute_shared(self, key, compute, ttl, cache_none):
+        lock = f'{key}:lock'
+        if not cache.add(lock, 1, LOCK_TTL):
+            # Another worker is computing it: wait for its result rather than duplicate the work
+            deadline = time.monotonic() + LOCK_TTL
+            while time.monotonic() < deadline:
+                time.sleep(WAIT_INTERVAL)
+                value = cache.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+                if cache.get(lock) is None:
+                    break
+            lock = None
+        try:
+            value = compute()
+            if value is not None or cache_none:
+                cache.set(key, value, ttl)
+            return value
+        finally:
+            if lock:
+                cache.delete(lock)
+
+
+def _as_tuple(parts):
+    return parts if isinstance(parts, tuple) else (parts,)
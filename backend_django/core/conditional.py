@@ -0,0 +1,32 @@
+"""
+Conditional GETs for payloads that carry their own ETag (users.me_cache,
+users.team_snapshot, projects.sync):
+
+    return conditional_response(request, etag, payload['body'], 'private, no-cache')
+
+A request whose If-None-Match names the ETag (or is *) gets a bodyless 304.
+"""
+from django.http import HttpResponse, HttpResponseNotModified
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('If-None-Match', '')
+    return if_none_match.strip() == '*' or etag in [t.strip() for t in if_none_match.split(',')]
+
+
+def conditional_response(request, etag, body, cache_control=None):
+    """
+    304 when the client already holds `etag`, else `body`: pre-rendered JSON,
+    or a callable returning the response (only called when it is needed).
+    Either way the response carries the ETag and `cache_control`.
+    """
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    elif callable(body):
+        response = body()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    if cache_control:
+        response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,228 @@
+"""
+Sparse fieldsets and opt-in expansion for every API serializer.
+
+    ?fields=id,title,tasks.title     only these fields; dotted paths reach into nested serializers
+    ?expand=tasks,threads.messages   nested serializers to include
+
+Without either parameter a response keeps its full shape, so existing clients
+are unaffected. As soon as one is given, "expandable" fields (nested
+serializers, plus anything listed in Meta.expandable such as per-row counts)
+are left out unless ?expand= or ?fields= names them. Only safe (GET/HEAD)
+requests are shaped; writes always validate against the whole serializer.
+
+The same pruned serializer tree drives the queryset: SparseQuerysetMixin asks
+the serializer for the select_related/prefetch_related lookups its remaining
+fields read, so relations that are not rendered are not loaded either.
+
+Serializer Meta options:
+    expandable       extra field names that are opt-in like nested serializers
+    related_lookups  {field name: (lookup, ...)} relations a field reads itself
+                     (e.g. a SerializerMethodField using obj.profile)
+    base_lookups     lookups needed regardless of the requested fields
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_paths(value):
+    """'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}"""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in path.strip().split('.'):
+            if part:
+                node = node.setdefault(part, {})
+    return tree
+
+
+class Shape:
+    """The requested fields/expansions for one serializer level."""
+
+    def __init__(self, fields=None, expand=None, sparse=False):
+        self.fields = fields  # None means every non-expandable field
+        self.expand = expand or {}
+        self.sparse = sparse
+
+    @classmethod
+    def from_request(cls, request):
+        if request is None or request.method not in SAFE_METHODS:
+            return FULL
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return FULL
+        fields = parse_paths(params['fields']) if params.get('fields') else None
+        return cls(fields or None, parse_paths(params.get('expand', '')), sparse=True)
+
+    def includes(self, name, expandable):
+        if not self.sparse:
+            return True
+        if expandable:
+            return name in self.expand or (self.fields is not None and name in self.fields)
+        return self.fields is None or name in self.fields
+
+    def child(self, name):
+        if not self.sparse:
+            return self
+        return Shape((self.fields or {}).get(name) or None, self.expand.get(name), sparse=True)
+
+
+FULL = Shape()
+
+
+def _nested(field):
+    """The serializer behind a nested field (unwrapping many=True), or None."""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.BaseSerializer):
+        return field
+    return None
+
+
+def _is_single(model, path):
+    """
+    True if `path` (a__b__c) only follows single-valued relations, False if it
+    crosses a to-many relation, None if it is not a relation path at all.
+    """
+    single = True
+    for part in path.split('__'):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if not field.is_relation or field.related_model is None:
+            return None
+        if field.many_to_many or field.one_to_many:
+            single = False
+        model = field.related_model
+    return single
+
+
+def _prefixed(prefix, lookup):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(f'{prefix}__{lookup.prefetch_through}', queryset=lookup.queryset, to_attr=lookup.to_attr)
+    return f'{prefix}__{lookup}'
+
+
+class Lookups:
+    """Ordered, de-duplicated select_related / prefetch_related lookups."""
+
+    def __init__(self):
+        self.select = {}
+        self.prefetch = {}
+
+    def add(self, model, lookup):
+        if isinstance(lookup, Prefetch):
+            self._prefetch(lookup)
+            return
+        single = _is_single(model, lookup)
+        if single:
+            self.select[lookup] = None
+        elif single is False:
+            self._prefetch(lookup)
+
+    def _prefetch(self, lookup):
+        key = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+        # A Prefetch carrying a queryset wins over a plain lookup of the same path
+        if key not in self.prefetch or isinstance(lookup, Prefetch):
+            self.prefetch[key] = lookup
+
+    def merge(self, prefix, other):
+        for lookup in other.select:
+            self.select[f'{prefix}__{lookup}'] = None
+        for lookup in other.prefetch.values():
+            self._prefetch(_prefixed(prefix, lookup))
+
+    def apply(self, qs):
+        if self.select:
+            qs = qs.select_related(*self.select)
+        if self.prefetch:
+            qs = qs.prefetch_related(*self.prefetch.values())
+        return qs
+
+
+class SparseFieldsMixin:
+    """Serializer side: prunes fields to the requested shape and reports the lookups they need."""
+
+    def get_shape(self):
+        # Nested serializers get their shape from the parent; the root reads the request
+        shape = getattr(self, '_shape', None)
+        return shape if shape is not None else Shape.from_request(self.context.get('request'))
+
+    def get_expandable(self, fields):
+        names = {name for name, field in fields.items() if _nested(field) is not None}
+        return names | set(getattr(self.Meta, 'expandable', ()))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        shape = self.get_shape()
+        if not shape.sparse:
+            return fields
+
+        expandable = self.get_expandable(fields)
+        for name in list(fields):
+            if not shape.includes(name, name in expandable):
+                del fields[name]
+                continue
+            child = _nested(fields[name])
+            if child is not None:
+                child._shape = shape.child(name)
+        return fields
+
+    def get_lookups(self):
+        model = self.Meta.model
+        extra = getattr(self.Meta, 'related_lookups', {})
+        lookups = Lookups()
+        for lookup in getattr(self.Meta, 'base_lookups', ()):
+            lookups.add(model, lookup)
+
+        for name, field in self.fields.items():
+            for lookup in extra.get(name, ()):
+                lookups.add(model, lookup)
+            if not field.source_attrs:
+                continue
+
+            child = _nested(field)
+            if isinstance(field, serializers.ManyRelatedField):
+                # Primary-key lists of a to-many relation ('members')
+                lookups.add(model, '__'.join(field.source_attrs))
+                continue
+            if child is None:
+                # Plain fields with a dotted source ('lead.email') read along single-valued relations
+                path = '__'.join(field.source_attrs[:-1])
+                if path and _is_single(model, path):
+                    lookups.add(model, path)
+                continue
+
+            path = '__'.join(field.source_attrs)
+            single = _is_single(model, path)
+            if single is None:
+                continue
+            nested = child.get_lookups() if isinstance(child, SparseFieldsMixin) else Lookups()
+            if single:
+                lookups.add(model, path)
+                lookups.merge(path, nested)
+            else:
+                queryset = nested.apply(child.Meta.model._default_manager.all())
+                lookups.add(model, Prefetch(path, queryset=queryset))
+        return lookups
+
+    def optimize(self, qs):
+        """Apply the lookups the (shaped) fields need to `qs`."""
+        return self.get_lookups().apply(qs)
+
+
+class SparseModelSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    pass
+
+
+class SparseQuerysetMixin:
+    """ViewSet side: loads exactly the relations the shaped serializer will render."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer = self.get_serializer()
+        if isinstance(serializer, SparseFieldsMixin):
+            queryset = serializer.optimize(queryset)
+        return queryset
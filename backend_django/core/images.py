@@ -0,0 +1,281 @@
+"""
+Responsive image variants for uploaded ImageFields.
+
+Every field listed in IMAGE_FIELDS has a sibling JSONField `<field>_variants`.
+When a save leaves it out of date (new upload, cleared image), the variants
+are rendered after the transaction commits on a small thread pool, off the
+request path:
+
+    {"source": "team/photo.jpg", "width": 4032, "height": 3024,
+     "variants": [{"path": "team/photo_320w.webp", "format": "webp",
+                   "width": 320, "height": 240, "bytes": 14211}, ...]}
+
+One variant per configured width (never upscaled) and format. EXIF
+orientation is applied to the pixels and all metadata is dropped. The
+record is written with a conditional UPDATE, so a variant job that loses a
+race with a newer upload throws its files away instead of clobbering the
+newer record. Originals are left untouched.
+
+SrcsetField renders the record for the API. Existing media is processed
+with `manage.py generate_image_variants`.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from PIL import Image, ImageOps, features
+from rest_framework import serializers
+
+logger = logging.getLogger(__name__)
+
+# model label -> ImageFields that get variants
+IMAGE_FIELDS = {
+    'users.MemberProfile': ('image',),
+    'events.Event': ('image',),
+    'projects.Project': ('cover_image',),
+    'core.GalleryImage': ('image',),
+}
+
+CONFIG = getattr(settings, 'IMAGE_VARIANTS', {})
+WIDTHS = tuple(sorted(CONFIG.get('WIDTHS', (320, 640, 1280))))
+ENCODERS = {
+    # format: (Pillow format, extension, save options)
+    'avif': ('AVIF', 'avif', {'quality': 60}),
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+# Formats this Pillow build cannot write are skipped
+FORMATS = tuple(f for f in CONFIG.get('FORMATS', ('webp', 'jpeg')) if f == 'jpeg' or features.check(f))
+
+# Sent after a variants record is stored: sender=model, instance, field, record
+variants_ready = Signal()
+
+_executor = ThreadPoolExecutor(max_workers=CONFIG.get('WORKERS', 2), thread_name_prefix='image-variants')
+
+
+def variants_attr(field):
+    return f'{field}_variants'
+
+
+def is_stale(instance, field):
+    name = getattr(instance, field).name or ''
+    record = getattr(instance, variants_attr(field)) or {}
+    return record.get('source', '') != name
+
+
+# --- Rendering ---
+
+def _oriented_size(img):
+    width, height = img.size
+    # EXIF orientations 5-8 are rotated by 90 degrees
+    if img.getexif().get(0x0112) in (5, 6, 7, 8):
+        return height, width
+    return width, height
+
+
+def _for_format(img, fmt):
+    has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+    if fmt == 'jpeg':
+        if has_alpha:
+            rgba = img.convert('RGBA')
+            flat = Image.new('RGB', rgba.size, (255, 255, 255))
+            flat.paste(rgba, mask=rgba.getchannel('A'))
+            return flat
+        return img if img.mode == 'RGB' else img.convert('RGB')
+    mode = 'RGBA' if has_alpha else 'RGB'
+    return img if img.mode == mode else img.convert(mode)
+
+
+def render(fieldfile):
+    """Write every variant of `fieldfile` to its storage and return the record (without storing it)."""
+    storage = fieldfile.storage
+    with fieldfile.open('rb') as fh:
+        img = Image.open(fh)
+        width, height = _oriented_size(img)
+        # Let the JPEG decoder downscale while decoding; both sides stay >= the largest target
+        largest = min(WIDTHS[-1], width)
+        img.draft('RGB', (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+
+    base, _ = os.path.splitext(fieldfile.name)
+    variants = []
+    for target in sorted({min(w, width) for w in WIDTHS}):
+        size = (target, max(1, round(height * target / width)))
+        resized = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0) if img.size != size else img
+        for fmt in FORMATS:
+            pil_format, ext, options = ENCODERS[fmt]
+            buf = BytesIO()
+            # No exif= / icc_profile= arguments: the variant carries no metadata
+            _for_format(resized, fmt).save(buf, pil_format, **options)
+            data = buf.getvalue()
+            path = storage.save(f'{base}_{target}w.{ext}', ContentFile(data))
+            variants.append({'path': path, 'format': fmt, 'width': size[0], 'height': size[1], 'bytes': len(data)})
+    return {'source': fieldfile.name, 'width': width, 'height': height, 'variants': variants}
+
+
+def _delete_files(storage, record, keep=()):
+    for variant in (record or {}).get('variants', ()):
+        if variant['path'] not in keep:
+            try:
+                storage.delete(variant['path'])
+            except OSError:
+                logger.warning("Could not delete image variant %s", variant['path'])
+
+
+def generate(model, pk, field):
+    """Render and store the variants of one row's `field`. Returns the record, or None if the row changed meanwhile."""
+    obj = model._default_manager.filter(pk=pk).first()
+    if obj is None:
+        return None
+    image = getattr(obj, field)
+    attr = variants_attr(field)
+    old = getattr(obj, attr) or {}
+
+    record = render(image) if image else {}
+    unchanged = Q(**{field: image.name}) if image else Q(**{field: ''}) | Q(**{f'{field}__isnull': True})
+    if not model._default_manager.filter(unchanged, pk=pk).update(**{attr: record}):
+        # A newer upload won; its own job renders it
+        _delete_files(image.storage, record)
+        return None
+
+    _delete_files(image.storage, old, keep={v['path'] for v in record.get('variants', ())})
+    setattr(obj, attr, record)
+    variants_ready.send(sender=model, instance=obj, field=field, record=record)
+    return record
+
+
+# --- Queueing ---
+
+def _run(label, pk, field):
+    try:
+        generate(apps.get_model(label), pk, field)
+    except Exception:
+        logger.exception("Image variants failed for %s #%s %s", label, pk, field)
+
+
+def _run_in_worker(*args):
+    close_old_connections()
+    try:
+        _run(*args)
+    finally:
+        close_old_connections()
+
+
+def enqueue(instance, field):
+    """Render `field`'s variants once the current transaction commits."""
+    args = (instance._meta.label, instance.pk, field)
+    if CONFIG.get('ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(_run_in_worker, *args))
+    else:
+        transaction.on_commit(lambda: _run(*args))
+
+
+def queue_stale_variants(sender, instance, **kwargs):
+    """post_save receiver for the models in IMAGE_FIELDS."""
+    for field in IMAGE_FIELDS[sender._meta.label]:
+        if is_stale(instance, field):
+            enqueue(instance, field)
+
+
+def backfill(labels=None, force=False, workers=None, progress=None):
+    """
+    Render variants for existing rows (only stale ones unless `force`), on a
+    pool of `workers` threads. Returns a stats dict.
+    """
+    jobs = []
+    for label, fields in IMAGE_FIELDS.items():
+        if labels and label not in labels:
+            continue
+        model = apps.get_model(label)
+        for field in fields:
+            for pk, name, record in model._default_manager.values_list('pk', field, variants_attr(field)).iterator():
+                if (record or {}).get('source', '') != (name or '') or (force and name):
+                    jobs.append((model, pk, field))
+
+    started = time.monotonic()
+    done = failed = 0
+
+    def work(job):
+        close_old_connections()
+        try:
+            return generate(*job) is not None
+        finally:
+            close_old_connections()
+
+    with ThreadPoolExecutor(max_workers=workers or CONFIG.get('WORKERS', 2)) as pool:
+        futures = [pool.submit(work, job) for job in jobs]
+        for (model, pk, field), future in zip(jobs, futures):
+            try:
+                done += future.result()
+            except Exception as e:
+                failed += 1
+                logger.warning("Image variants failed for %s #%s %s: %s", model._meta.label, pk, field, e)
+            if progress:
+                progress(done + failed, len(jobs))
+
+    elapsed = time.monotonic() - started
+    return {
+        'queued': len(jobs),
+        'rendered': done,
+        'failed': failed,
+        'seconds': round(elapsed, 3),
+        'images_per_second': round(done / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+# --- API ---
+
+def pick(record, min_width=0, fmt='jpeg'):
+    """Path of the narrowest `fmt` variant at least `min_width` wide (else the widest), or None."""
+    variants = [v for v in (record or {}).get('variants', ()) if v['format'] == fmt]
+    if not variants:
+        return None
+    return next((v['path'] for v in variants if v['width'] >= min_width), variants[-1]['path'])
+
+
+class SrcsetField(serializers.Field):
+    """
+    Read-only view of an ImageField's variants:
+
+        {"src": <largest JPEG>, "width": .., "height": .., "srcset": {"webp": "<url> 320w, <url> 640w", ...}}
+
+    None until the variants exist; clients then fall back to the image URL.
+    """
+
+    def __init__(self, image_field='image', **kwargs):
+        self.image_field = image_field
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        record = getattr(obj, variants_attr(self.image_field)) or {}
+        variants = record.get('variants')
+        if not variants:
+            return None
+
+        storage = getattr(obj, self.image_field).storage
+        request = self.context.get('request')
+
+        def url(path):
+            u = storage.url(path)
+            return request.build_absolute_uri(u) if request is not None else u
+
+        srcset = {}
+        for v in variants:
+            srcset.setdefault(v['format'], []).append(f"{url(v['path'])} {v['width']}w")
+        fallback = [v for v in variants if v['format'] == 'jpeg'] or variants
+        return {
+            'src': url(fallback[-1]['path']),
+            'width': record['width'],
+            'height': record['height'],
+            'srcset': {fmt: ', '.join(entries) for fmt, entries in srcset.items()},
+        }
@@ -0,0 +1,187 @@
+"""
+Batch gallery uploads.
+
+POST /api/gallery/batches/ takes the same multipart body as /gallery/upload/
+(images[], title, event_id) but returns 202 as soon as the files are stored:
+
+    {"batch": "<id>", "status": "queued",
+     "files": [{"name": "a.jpg", "status": "queued"}, {"name": "b.jpg", "status": "duplicate", "id": 12}]}
+
+HashingUploadHandler streams every part to a temporary file while computing
+its SHA-256, so nothing is held in memory and nothing is re-read to hash it;
+storing a temporary file on FileSystemStorage is then a rename. Files whose
+hash is already in the gallery (or earlier in the same batch) are skipped.
+
+The rest runs in the background: each file is decoded and checked on a
+thread pool, every valid file becomes a GalleryImage in one bulk_create, and
+their variants are queued (core.images). Progress and per-file results are
+kept in the cache under the batch id: GET /api/gallery/batches/<id>/.
+
+Batches live only in this worker's thread pool. A worker that exits (restart,
+crash, timeout) loses its queued and running batches: their state stays
+'queued'/'running' until BATCH_TTL expires and their stored files are left
+without a GalleryImage. Clients should re-upload a batch that stops making
+progress; the hashes make that safe, as files that did get saved are skipped.
+"""
+import hashlib
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import IntegrityError, close_old_connections, transaction
+from PIL import Image
+
+from . import images
+from .caching import Namespace
+from .models import GalleryImage
+
+logger = logging.getLogger(__name__)
+
+CONFIG = getattr(settings, 'GALLERY_INGEST', {})
+BATCH_TTL = 24 * 3600
+UPLOAD_TO = 'gallery/'
+
+# One batch at a time per worker; its files are checked on the decode pool
+_batches = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gallery-batch')
+_decoders = ThreadPoolExecutor(max_workers=CONFIG.get('WORKERS', 4), thread_name_prefix='gallery-decode')
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Streams each uploaded file to disk and leaves its hex SHA-256 on `file.sha256`."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.hasher.hexdigest()
+        return upload
+
+
+batches = Namespace('gallery:batch', ttl=BATCH_TTL)
+
+
+def get_batch(batch_id):
+    return batches.get(batch_id)
+
+
+def _save(batch_id, state):
+    batches.set(batch_id, state)
+
+
+def start_batch(files, user, title='', event=None):
+    """Store `files` (uploads carrying .sha256), queue their processing, and return the batch state."""
+    batch_id = uuid.uuid4().hex
+    hashes = {f.sha256 for f in files}
+    known = dict(GalleryImage.objects.filter(content_hash__in=hashes).values_list('content_hash', 'id'))
+
+    entries, seen = [], set()
+    storage = GalleryImage._meta.get_field('image').storage
+    for upload in files:
+        entry = {'name': upload.name, 'status': 'queued'}
+        if upload.sha256 in known:
+            entry.update(status='duplicate', id=known[upload.sha256])
+        elif upload.sha256 in seen:
+            entry['status'] = 'duplicate'
+        else:
+            seen.add(upload.sha256)
+            # A rename for temporary uploads on FileSystemStorage
+            entry['path'] = storage.save(UPLOAD_TO + os.path.basename(upload.name), upload)
+            entry['hash'] = upload.sha256
+        entries.append(entry)
+
+    state = {'batch': batch_id, 'status': 'queued', 'owner': user.id, 'files': entries}
+    _save(batch_id, state)
+    args = (batch_id, state, user.id, title, event.id if event else None)
+    if CONFIG.get('ASYNC', True):
+        _batches.submit(_run_batch, *args)
+    else:
+        _process(*args)
+    return get_batch(batch_id)
+
+
+def describe(state):
+    """The client's view of a batch: no owner, storage paths or hashes."""
+    files = [{k: v for k, v in entry.items() if k not in ('path', 'hash')} for entry in state['files']]
+    return {**{k: v for k, v in state.items() if k != 'owner'}, 'files': files}
+
+
+def _check(storage, path):
+    """None if `path` holds a decodable image, else the reason it does not."""
+    try:
+        with storage.open(path, 'rb') as fh, Image.open(fh) as img:
+            img.verify()
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        return str(e) or e.__class__.__name__
+    return None
+
+
+def _run_batch(*args):
+    close_old_connections()
+    try:
+        _process(*args)
+    except Exception as e:
+        logger.exception("Gallery batch %s failed", args[0])
+        state = args[1]
+        _save(args[0], {**state, 'status': 'failed', 'error': str(e)})
+    finally:
+        close_old_connections()
+
+
+def _create(storage, entries, **fields):
+    """
+    [(entry, GalleryImage)] for `entries`, in one bulk_create. A hash stored by
+    another batch since start_batch checked it violates the unique constraint;
+    rows are then created one by one and such entries become duplicates.
+    """
+    def row(entry):
+        return GalleryImage(image=entry['path'], content_hash=entry['hash'], **fields)
+
+    try:
+        with transaction.atomic():
+            return list(zip(entries, GalleryImage.objects.bulk_create([row(entry) for entry in entries])))
+    except IntegrityError:
+        pass
+
+    created = []
+    for entry in entries:
+        try:
+            with transaction.atomic():
+                created.append((entry, GalleryImage.objects.bulk_create([row(entry)])[0]))
+        except IntegrityError:
+            storage.delete(entry['path'])
+            existing = GalleryImage.objects.filter(content_hash=entry['hash']).values_list('id', flat=True).first()
+            entry.update(status='duplicate', id=existing)
+    return created
+
+
+def _process(batch_id, state, user_id, title, event_id):
+    state = {**state, 'status': 'running', 'files': [dict(entry) for entry in state['files']]}
+    _save(batch_id, state)
+    storage = GalleryImage._meta.get_field('image').storage
+
+    pending = [entry for entry in state['files'] if entry['status'] == 'queued']
+    for entry, error in zip(pending, _decoders.map(lambda e: _check(storage, e['path']), pending)):
+        if error:
+            storage.delete(entry['path'])
+            entry.update(status='invalid', error=error)
+
+    valid = [entry for entry in pending if entry['status'] == 'queued']
+    created = _create(storage, valid, title=title, event_id=event_id, uploaded_by_id=user_id)
+    for entry, row in created:
+        entry.update(status='created', id=row.id)
+        # bulk_create sends no post_save
+        images.enqueue(row, 'image')
+
+    counts = {}
+    for entry in state['files']:
+        counts[entry['status']] = counts.get(entry['status'], 0) + 1
+    _save(batch_id, {**state, 'status': 'done', 'counts': counts})
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.images import IMAGE_FIELDS, backfill
+
+
+class Command(BaseCommand):
+    help = "Render responsive variants (thumbnails, WebP/JPEG) for existing uploaded images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', dest='models', metavar='LABEL',
+                            help=f"Only these models (repeatable): {', '.join(IMAGE_FIELDS)}")
+        parser.add_argument('--force', action='store_true', help="Re-render images whose variants are up to date")
+        parser.add_argument('--workers', type=int, default=None, help="Rendering threads (default: IMAGE_VARIANTS['WORKERS'])")
+
+    def handle(self, *args, **opts):
+        unknown = set(opts['models'] or ()) - set(IMAGE_FIELDS)
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(sorted(unknown))}")
+
+        def progress(finished, total):
+            if finished % 50 == 0 or finished == total:
+                self.stdout.write(f"  {finished}/{total}")
+
+        stats = backfill(opts['models'], force=opts['force'], workers=opts['workers'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {stats['rendered']} of {stats['queued']} images in {stats['seconds']}s "
+            f"({stats['images_per_second']}/s), {stats['failed']} failed"
+        ))
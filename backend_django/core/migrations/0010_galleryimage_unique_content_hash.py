@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:01
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def forget_duplicate_hashes(apps, schema_editor):
+    # Concurrent batches could store the same file twice; keep the hash on the oldest copy only
+    GalleryImage = apps.get_model('core', 'GalleryImage')
+    duplicates = (GalleryImage.objects.exclude(content_hash='').values('content_hash')
+                  .annotate(n=Count('id'), first=Min('id')).filter(n__gt=1))
+    for row in duplicates:
+        GalleryImage.objects.filter(content_hash=row['content_hash']).exclude(pk=row['first']).update(content_hash='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_galleryimage_content_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(forget_duplicate_hashes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='galleryimage',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='galleryimage',
+            constraint=models.UniqueConstraint(condition=models.Q(('content_hash', ''), _negated=True), fields=('content_hash',), name='unique_gallery_content_hash'),
+        ),
+    ]
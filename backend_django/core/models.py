@@ -17,11 +17,20 @@ class Announcement(models.Model):
 # 2. Gallery
 class GalleryImage(models.Model):
     image = models.ImageField(upload_to='gallery/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # core.images
+    # SHA-256 of the uploaded bytes; batch uploads (core.ingest) skip files already in the gallery.
+    # Blank for images uploaded one at a time, so only non-blank hashes are unique.
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
     title = models.CharField(max_length=200, blank=True)
     event = models.ForeignKey('events.Event', on_delete=models.SET_NULL, null=True, blank=True, related_name='gallery_images')
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash'], condition=~models.Q(content_hash=''), name='unique_gallery_content_hash'),
+        ]
+
 # 3. Contact/Sponsorship
 class Sponsorship(models.Model):
     name = models.CharField(max_length=100)
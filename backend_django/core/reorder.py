@@ -0,0 +1,79 @@
+"""
+Bulk reordering of ordered rows.
+
+ReorderMixin adds POST <list>/reorder/ to a viewset:
+
+    {"items": [{"id": 4, "order": 0}, {"id": 9, "order": 1}, ...], "form": 3}
+
+All positions are written by a single UPDATE ... SET order = CASE pk WHEN ...
+statement, however many rows move. Ids are checked against the viewset's
+queryset first; when `reorder_scope` names a parent FK (e.g. 'form'), every
+item must belong to the same parent, and to the parent given in the body if
+one is given.
+"""
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+# Rows per UPDATE; keeps the CASE expression within database parameter limits
+BATCH_SIZE = 500
+
+
+def parse_positions(items):
+    """[{"id": .., "order": ..}, ...] -> {id: order}"""
+    if not isinstance(items, list):
+        raise ValidationError({"items": "Expected a list of {id, order} objects."})
+    positions = {}
+    for item in items:
+        try:
+            positions[int(item['id'])] = int(item['order'])
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError({"items": f"Invalid item {item!r}, expected integer 'id' and 'order'."})
+    return positions
+
+
+def apply_positions(queryset, positions, key='pk', field='order'):
+    """Set `field` for every row whose `key` is in `positions`, one statement per BATCH_SIZE rows."""
+    ids = list(positions)
+    updated = 0
+    with transaction.atomic():
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            value = Case(*[When(**{key: i}, then=Value(positions[i])) for i in batch], output_field=IntegerField())
+            updated += queryset.filter(**{f'{key}__in': batch}).update(**{field: value})
+    return updated
+
+
+class ReorderMixin:
+    reorder_field = 'order'
+    reorder_scope = None
+
+    def reordered(self, positions):
+        """Hook for caches that bulk .update() bypasses (it sends no save signals)."""
+
+    @action(detail=False, methods=['post'])
+    def reorder(self, request):
+        positions = parse_positions(request.data.get('items'))
+        if not positions:
+            return Response({"status": "updated", "count": 0})
+
+        # Validate against the viewset's (permission-scoped) queryset, then update by primary key
+        queryset = self.get_queryset()
+        scope = self.reorder_scope
+        rows = list(queryset.filter(pk__in=positions).values_list('pk', f'{scope}_id' if scope else 'pk'))
+
+        missing = set(positions) - {pk for pk, _ in rows}
+        if missing:
+            return Response({"error": f"Unknown ids: {sorted(missing)}"}, status=status.HTTP_400_BAD_REQUEST)
+        if scope:
+            parents = {parent for _, parent in rows}
+            expected = request.data.get(scope)
+            if len(parents) > 1 or (expected not in (None, '') and str(expected) != str(next(iter(parents)))):
+                return Response({"error": f"All items must belong to the same {scope}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        count = apply_positions(queryset.model._default_manager.all(), positions, field=self.reorder_field)
+        self.reordered(positions)
+        return Response({"status": "updated", "count": count})
@@ -0,0 +1,8 @@
+from django.apps import apps
+from django.db.models.signals import post_save
+
+from . import images
+
+# --- Responsive image variants (core.images) ---
+for _label in images.IMAGE_FIELDS:
+    post_save.connect(images.queue_stale_variants, sender=apps.get_model(_label), dispatch_uid=f'image-variants:{_label}')
@@ -0,0 +1,183 @@
+"""
+Django cache backend on a SQLite file: shared by every worker on the host,
+with no service to run.
+
+    CACHES = {'default': {'BACKEND': 'core.sqlite_cache.SQLiteCache', 'LOCATION': '/path/cache.sqlite3'}}
+
+The file is in WAL mode, so reads never wait for a writer. add() and incr()
+are single statements and therefore atomic across processes, which the
+version counters and single-flight locks of core.caching rely on. Integers
+are stored as SQLite integers (incr() is `value = value + n`), everything
+else pickled. Each thread keeps its own connection, separate from the
+Django database connection, so cache traffic never shows up as queries.
+
+When a write finds more than MAX_ENTRIES rows (checked every CULL_EVERY
+writes), expired rows go first, then 1/CULL_FREQUENCY of the rest, those
+closest to expiring first.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+CULL_EVERY = 200
+# SQLite's default limit on bound parameters is 999 on older builds
+CHUNK = 500
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+)
+
+
+def _encode(value):
+    if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+        return value
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(raw):
+    return raw if isinstance(raw, int) else pickle.loads(raw)
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        # A forked worker must not share its parent's connection
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self._path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _expiry(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    # --- Reads ---
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._conn().execute(
+            'SELECT value FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone()
+        return default if row is None else _decode(row[0])
+
+    def get_many(self, keys, version=None):
+        by_key = {self.make_and_validate_key(k, version=version): k for k in keys}
+        found = {}
+        now = time.time()
+        names = list(by_key)
+        for start in range(0, len(names), CHUNK):
+            chunk = names[start:start + CHUNK]
+            rows = self._conn().execute(
+                f"SELECT key, value FROM cache WHERE key IN ({','.join('?' * len(chunk))}) "
+                f"AND (expires IS NULL OR expires > ?)", (*chunk, now),
+            )
+            found.update((by_key[key], _decode(value)) for key, value in rows)
+        return found
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._conn().execute(
+            'SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)', (key, time.time())
+        ).fetchone() is not None
+
+    # --- Writes ---
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout, version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self._expiry(timeout)
+        rows = [(self.make_and_validate_key(k, version=version), _encode(v), expires) for k, v in data.items()]
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany('INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)', rows)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._wrote(len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        # Inserts, or takes over an expired row; a live row is left alone
+        cursor = self._conn().execute(
+            'INSERT INTO cache (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires '
+            'WHERE cache.expires IS NOT NULL AND cache.expires <= ?',
+            (key, _encode(value), self._expiry(timeout), time.time()),
+        )
+        self._wrote(1)
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._conn().execute(
+            "UPDATE cache SET value = value + ? WHERE key = ? AND typeof(value) = 'integer' "
+            "AND (expires IS NULL OR expires > ?) RETURNING value",
+            (delta, key, time.time()),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._conn().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self._expiry(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._conn().execute('DELETE FROM cache WHERE key = ?', (key,)).rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        names = [self.make_and_validate_key(k, version=version) for k in keys]
+        for start in range(0, len(names), CHUNK):
+            chunk = names[start:start + CHUNK]
+            self._conn().execute(f"DELETE FROM cache WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+
+    def clear(self):
+        self._conn().execute('DELETE FROM cache')
+
+    def close(self, **kwargs):
+        # Connections are per thread and reused across requests
+        pass
+
+    # --- Culling ---
+
+    def _wrote(self, count):
+        self._writes += count
+        if self._writes < CULL_EVERY:
+            return
+        self._writes = 0
+        conn = self._conn()
+        conn.execute('DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?', (time.time(),))
+        total = conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+        if total > self._max_entries:
+            doomed = total // self._cull_frequency if self._cull_frequency else total
+            # Rows that never expire (version counters) are culled last
+            conn.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY expires IS NULL, expires LIMIT ?)',
+                (doomed,),
+            )
@@ -1,3 +1,428 @@
-from django.test import TestCase
+import csv
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from attendance.models import AttendanceSession
+from quizzes.models import Quiz
+from users.models import MemberProfile, Role, TeamPosition, User
+from . import ingest
+from .caching import Namespace
+from .models import Form, FormField, FormResponse, FormSection, GalleryImage
+from .sqlite_cache import SQLiteCache
+
+
+class ExportTests(TestCase):
+    """core.exports: streamed CSV/NDJSON that round-trips awkward values, gated by the export's flag."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.form = Form.objects.create(title='Sign Up', created_by=self.admin)
+        FormField.objects.create(form=self.form, label='Answer', order=0)
+        FormField.objects.create(form=self.form, label='Tags', order=1)
+        self.tricky = 'He said "hi", then\nleft'
+        FormResponse.objects.create(form=self.form, user=self.admin, data={'Answer': self.tricky, 'Tags': ['a', 'b']})
+        FormResponse.objects.create(form=self.form, data={'Answer': 'plain'})
+        self.url = f'/api/forms/{self.form.id}/export_responses_csv/'
+
+    def _download(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_round_trips_awkward_values(self):
+        response, body = self._download(self.url)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Sign_Up_responses.csv"')
+        header, *rows = csv.reader(StringIO(body))
+        self.assertEqual(header, ['Response ID', 'User', 'Submitted At', 'Answer', 'Tags'])
+        by_user = {row[1]: row for row in rows}
+        self.assertEqual(by_user['admin'][3:], [self.tricky, 'a, b'])
+        self.assertEqual(by_user['Anonymous'][3:], ['plain', ''])
+
+        # Unknown formats fall back to CSV
+        self.assertEqual(self._download(self.url, fmt='xml')[0]['Content-Type'], 'text/csv')
+
+    def test_ndjson_is_one_object_per_line(self):
+        response, body = self._download(self.url, fmt='ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = body.splitlines()
+        self.assertEqual(len(lines), 2)
+        answers = {json.loads(line)['user']: json.loads(line)['Answer'] for line in lines}
+        self.assertEqual(answers, {'admin': self.tricky, 'Anonymous': 'plain'})
+
+    def test_rows_cost_no_queries_of_their_own(self):
+        def count():
+            with CaptureQueriesContext(connection) as ctx:
+                self._download('/api/management/export_csv/')
+            return len(ctx)
+
+        few = count()
+        for i in range(10):
+            MemberProfile.objects.create(user=User.objects.create_user(f'u{i}'), full_name=f'U {i}')
+        self.assertEqual(count(), few)
+
+    def test_flagged_exports_need_the_flag(self):
+        quiz = Quiz.objects.create(title='Q', creator=self.admin, join_code='JOIN')
+        session = AttendanceSession.objects.create(date=timezone.now())
+        urls = {
+            'can_manage_forms': f'/api/quizzes/{quiz.id}/export_attempts/',
+            'can_manage_events': f'/api/attendance/sessions/{session.id}/export/',
+        }
+        member = User.objects.create_user('member')
+        self.client.force_authenticate(member)
+        for url in urls.values():
+            self.assertEqual(self.client.get(url).status_code, 403)
+
+        for flag, url in urls.items():
+            manager = User.objects.create_user(f'manager-{flag}')
+            manager.user_roles.add(Role.objects.create(name=flag, **{flag: True}))
+            self.client.force_authenticate(manager)
+            self.assertEqual(self._download(url)[0]['Content-Type'], 'text/csv')
+
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get('/api/management/export_csv/').status_code, 401)
+
+
+class ReorderTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.form = Form.objects.create(title='F', created_by=self.admin)
+        self.fields = [FormField.objects.create(form=self.form, label=f'L{i}', order=i) for i in range(50)]
+
+    def test_reorder_is_one_update(self):
+        items = [{'id': f.id, 'order': 49 - i} for i, f in enumerate(self.fields)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/form-fields/reorder/', {'form': self.form.id, 'items': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 50)
+        self.assertEqual([q['sql'].split()[0] for q in ctx].count('UPDATE'), 1)
+        self.assertEqual(list(FormField.objects.filter(form=self.form).values_list('label', flat=True))[:2], ['L49', 'L48'])
+
+    def test_reorder_rejects_other_scope(self):
+        other = Form.objects.create(title='G', created_by=self.admin)
+        stray = FormField.objects.create(form=other, label='X')
+        items = [{'id': self.fields[0].id, 'order': 1}, {'id': stray.id, 'order': 0}]
+        response = self.client.post('/api/form-fields/reorder/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/form-fields/reorder/', {'form': other.id, 'items': items[:1]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/form-fields/reorder/', {'items': [{'id': 999999, 'order': 0}]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(FormField.objects.get(pk=self.fields[0].pk).order, 0)
+
+    def test_reorder_positions_moves_their_members(self):
+        lead, member = TeamPosition.objects.create(name='Lead', rank=0), TeamPosition.objects.create(name='Member', rank=1)
+        for name, position in (('ann', member), ('bob', lead)):
+            MemberProfile.objects.create(user=User.objects.create_user(name), full_name=name, team_position=position, order=position.rank)
+        anon = APIClient()
+        self.assertEqual([m['username'] for m in anon.get('/api/team/public/').json()], ['bob', 'ann'])
+
+        items = [{'id': member.id, 'order': 0}, {'id': lead.id, 'order': 1}]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post('/api/positions/reorder/', {'items': items}, format='json').status_code, 200)
+        self.assertEqual(dict(MemberProfile.objects.values_list('user__username', 'order')), {'ann': 0, 'bob': 1})
+        self.assertEqual([m['username'] for m in anon.get('/api/team/public/').json()], ['ann', 'bob'])
+
+    def test_reorder_team_skips_users_without_profile(self):
+        members = [MemberProfile.objects.create(user=User.objects.create_user(f'm{i}'), order=i) for i in range(2)]
+        bare = User.objects.create_user('bare')
+        items = [{'id': members[0].user_id, 'order': 5}, {'id': bare.id, 'order': 0}, {'id': members[1].user_id, 'order': 4}]
+        response = self.client.post('/api/management/reorder-team/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.order for p in MemberProfile.objects.order_by('pk')], [5, 4])
+        self.assertFalse(MemberProfile.objects.filter(user=bare).exists())
+
+
+class SparseFieldsetTests(TestCase):
+    """core.fieldsets on a nested endpoint: /api/forms/ -> sections -> fields."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        for i in range(3):
+            form = Form.objects.create(title=f'F{i}', created_by=self.admin)
+            for j in range(2):
+                section = FormSection.objects.create(form=form, title=f'S{i}.{j}', order=j)
+                for k in range(2):
+                    FormField.objects.create(form=form, section=section, label=f'L{i}.{j}.{k}', order=k)
+
+    def _get(self, params, queries):
+        with self.assertNumQueries(queries):
+            response = self.client.get('/api/forms/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_dotted_fields_reach_into_nested_serializers(self):
+        # forms + prefetched sections; the fields under them are not loaded
+        forms = self._get({'fields': 'id,sections.title'}, 2)
+        self.assertEqual(set(forms[0]), {'id', 'sections'})
+        self.assertEqual([set(s) for s in forms[0]['sections']], [{'title'}, {'title'}])
+
+    def test_expand_loads_only_what_it_names(self):
+        forms = self._get({'fields': 'id', 'expand': 'sections.fields'}, 3)
+        self.assertEqual(set(forms[0]), {'id', 'sections'})
+        section = forms[0]['sections'][0]
+        self.assertIn('title', section)
+        self.assertEqual([f['label'] for f in section['fields']], ['L2.0.0', 'L2.0.1'])
+
+        # Expanding one level leaves the deeper serializer (and its prefetch) out
+        forms = self._get({'expand': 'sections'}, 2)
+        self.assertNotIn('fields', forms[0]['sections'][0])
+        self.assertNotIn('response_count', forms[0])
+        self.assertIn('title', forms[0])
+
+    def test_query_count_does_not_grow_with_rows(self):
+        params = {'fields': 'id,title,sections.title', 'expand': 'sections.fields'}
+        self._get(params, 3)
+        form = Form.objects.create(title='More', created_by=self.admin)
+        for j in range(4):
+            section = FormSection.objects.create(form=form, title=f'M{j}', order=j)
+            FormField.objects.create(form=form, section=section, label=f'M{j}')
+        self.assertEqual(len(self._get(params, 3)), 4)
+
+
+class ImageVariantTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+
+    def _photo(self, size=(2000, 1000)):
+        # A sideways phone photo: EXIF orientation 6 (rotate 90 CW) plus a GPS block
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x8825] = {1: 'N', 2: (12.0, 58.0, 0.0)}
+        buf = BytesIO()
+        Image.new('RGB', size, (200, 30, 30)).save(buf, 'JPEG', exif=exif)
+        return SimpleUploadedFile('phone.jpg', buf.getvalue(), content_type='image/jpeg')
+
+    def test_upload_renders_oriented_stripped_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            photo = GalleryImage.objects.create(image=self._photo(), uploaded_by=self.admin)
+        record = GalleryImage.objects.get(pk=photo.pk).image_variants
+
+        self.assertEqual((record['source'], record['width'], record['height']), (photo.image.name, 1000, 2000))
+        # Never upscaled: 320, 640 and the 1000px original width, once per format
+        self.assertEqual(sorted({(v['width'], v['height']) for v in record['variants']}), [(320, 640), (640, 1280), (1000, 2000)])
+        for variant in record['variants']:
+            with Image.open(f"{self.media}/{variant['path']}") as img:
+                self.assertEqual(img.size, (variant['width'], variant['height']))
+                self.assertEqual(len(img.getexif()), 0)
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        srcset = client.get(f'/api/gallery/{photo.pk}/').data['image_srcset']
+        self.assertTrue(srcset['src'].endswith('_1000w.jpg'))
+        self.assertIn('_320w.jpg 320w', srcset['srcset']['jpeg'])
+
+    def test_replacing_the_image_replaces_its_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            photo = GalleryImage.objects.create(image=self._photo(), uploaded_by=self.admin)
+        old = GalleryImage.objects.get(pk=photo.pk).image_variants['variants']
+
+        photo.refresh_from_db()
+        photo.image = self._photo((800, 600))
+        with self.captureOnCommitCallbacks(execute=True):
+            photo.save()
+
+        record = GalleryImage.objects.get(pk=photo.pk).image_variants
+        self.assertEqual(record['source'], photo.image.name)
+        self.assertEqual(max(v['width'] for v in record['variants']), 600)
+        for variant in old:
+            self.assertFalse(photo.image.storage.exists(variant['path']))
+
+
+class GalleryBatchUploadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _jpeg(self, name, color):
+        buf = BytesIO()
+        Image.new('RGB', (64, 48), color).save(buf, 'JPEG')
+        return SimpleUploadedFile(name, buf.getvalue(), content_type='image/jpeg')
+
+    def test_batch_skips_duplicates_and_rejects_non_images(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.post('/api/gallery/batches/', {'images': [self._jpeg('red.jpg', 'red')]}, format='multipart')
+        existing = first.data['files'][0]['id']
+
+        files = [
+            self._jpeg('red-again.jpg', 'red'),
+            self._jpeg('blue.jpg', 'blue'),
+            self._jpeg('blue-copy.jpg', 'blue'),
+            SimpleUploadedFile('notes.jpg', b'not an image', content_type='image/jpeg'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/gallery/batches/', {'images': files, 'title': 'Expo'}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+
+        status = self.client.get(f"/api/gallery/batches/{response.data['batch']}/").data
+        self.assertEqual(status['status'], 'done')
+        self.assertEqual([f['status'] for f in status['files']], ['duplicate', 'created', 'duplicate', 'invalid'])
+        self.assertEqual(status['files'][0]['id'], existing)
+        self.assertEqual(status['counts'], {'duplicate': 2, 'created': 1, 'invalid': 1})
+        self.assertNotIn('hash', status['files'][1])
+
+        blue = GalleryImage.objects.get(pk=status['files'][1]['id'])
+        self.assertEqual((blue.title, len(blue.content_hash)), ('Expo', 64))
+        self.assertTrue(blue.image_variants['variants'])
+        self.assertEqual(GalleryImage.objects.count(), 2)
+
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('other', password='x'))
+        self.assertEqual(other.get(f"/api/gallery/batches/{response.data['batch']}/").status_code, 404)
+
+    def test_hash_stored_by_a_concurrent_batch_is_a_duplicate(self):
+        storage = GalleryImage._meta.get_field('image').storage
+        red = GalleryImage.objects.create(image=storage.save('gallery/red.jpg', self._jpeg('red.jpg', 'red')), content_hash='a' * 64)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            GalleryImage.objects.create(image='gallery/x.jpg', content_hash='a' * 64)
+        GalleryImage.objects.create(image='gallery/y.jpg')  # blank hashes are not unique
+        GalleryImage.objects.create(image='gallery/z.jpg')
+
+        # Both files passed start_batch's check before the other batch committed red
+        files = [
+            {'name': 'red.jpg', 'status': 'queued', 'path': storage.save('gallery/red.jpg', self._jpeg('red.jpg', 'red')), 'hash': 'a' * 64},
+            {'name': 'blue.jpg', 'status': 'queued', 'path': storage.save('gallery/blue.jpg', self._jpeg('blue.jpg', 'blue')), 'hash': 'b' * 64},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest._process('batch', {'batch': 'batch', 'status': 'queued', 'owner': self.admin.id, 'files': files}, self.admin.id, '', None)
+        state = ingest.get_batch('batch')
+        self.assertEqual([(f['status'], f['id'] == red.id) for f in state['files']], [('duplicate', True), ('created', False)])
+        self.assertFalse(storage.exists(files[0]['path']))
+        self.assertEqual(GalleryImage.objects.filter(content_hash='b' * 64).count(), 1)
+
+
+def _bump_many(path, n):
+    backend = SQLiteCache(path, {})
+    for _ in range(n):
+        backend.incr('counter')
+
+
+class SQLiteCacheTests(TestCase):
+    """The default shared backend: one file, seen and updated atomically by every worker."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {})
+
+    def test_cache_semantics(self):
+        c = self.cache
+        c.set('a', {'x': 1})
+        c.set('n', 5)
+        self.assertEqual(c.get('a'), {'x': 1})
+        self.assertFalse(c.add('a', 'other'))
+        self.assertEqual(c.incr('n', 2), 7)
+        with self.assertRaises(ValueError):
+            c.incr('missing')
+
+        c.set('gone', 1, timeout=-1)
+        self.assertIsNone(c.get('gone'))
+        self.assertTrue(c.add('gone', 2))
+        self.assertEqual(c.get_many(['a', 'n', 'gone', 'nope']), {'a': {'x': 1}, 'n': 7, 'gone': 2})
+        c.delete_many(['a', 'n'])
+        self.assertEqual(c.get_many(['a', 'n']), {})
+
+        # Another worker's connection sees the same entries
+        self.assertEqual(SQLiteCache(self.path, {}).get('gone'), 2)
+
+    def test_incr_is_atomic_across_processes(self):
+        self.cache.set('counter', 0, None)
+        workers = [multiprocessing.get_context('fork').Process(target=_bump_many, args=(self.path, 200)) for _ in range(4)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        self.assertEqual(self.cache.get('counter'), 800)
+
+    def test_culls_beyond_max_entries(self):
+        c = SQLiteCache(self.path, {'OPTIONS': {'MAX_ENTRIES': 100, 'CULL_FREQUENCY': 2}})
+        c.set('version', 1, None)
+        c.set_many({f'k{i}': i for i in range(300)})
+        self.assertLessEqual(c._conn().execute('SELECT COUNT(*) FROM cache').fetchone()[0], 151)
+        # Entries that never expire go last
+        self.assertEqual(c.get('version'), 1)
+
+
+class NamespaceTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ns = Namespace('t', ttl=60)
+
+    def test_keys_and_versions(self):
+        ns = self.ns
+        self.assertEqual(ns.key('a', ('user', 3)), 't:a:user:3')
+        ns.set_many({('a', 1): 'x', ('a', 2): 'y'})
+        self.assertEqual(ns.get_many([('a', 1), ('a', 2), ('a', 3)]), {('a', 1): 'x', ('a', 2): 'y'})
+
+        first = ns.version(('user', 3))
+        self.assertEqual(ns.versions(['all', ('user', 3)])[1], first)
+        self.assertEqual(ns.bump(('user', 3)), [first + 1])
+        with self.captureOnCommitCallbacks(execute=True):
+            ns.bump_on_commit(('user', 3))
+        self.assertEqual(ns.version(('user', 3)), first + 2)
+
+        # A counter lost from the cache restarts past every value handed out
+        cache.clear()
+        self.assertGreater(ns.version(('user', 3)), first + 2)
+
+    def test_get_or_set_computes_once(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'value'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.ns.get_or_set('t:k', compute))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual((len(calls), results), (1, ['value'] * 8))
+
+        # Another worker holds the lock: wait for its result instead of computing
+        cache.add('t:j:lock', 1, 10)
+        threading.Timer(0.1, lambda: cache.set('t:j', 'theirs')).start()
+        self.assertEqual(self.ns.get_or_set('t:j', lambda: 'mine'), 'theirs')
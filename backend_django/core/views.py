@@ -2,8 +2,6 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from django.http import HttpResponse
-import csv
 from .models import (
     Announcement, GalleryImage, Sponsorship, ContactMessage, 
     Form, FormSection, FormField, FormResponse
@@ -14,8 +12,12 @@ from .serializers import (
     FormFieldSerializer, FormResponseSerializer
 )
 from users.permissions import GlobalPermission
+from .exports import FormResponsesExport
+from .fieldsets import SparseQuerysetMixin
+from . import ingest
+from .reorder import ReorderMixin
 
-class AnnouncementViewSet(viewsets.ModelViewSet):
+class AnnouncementViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Announcement.objects.all().order_by('-created_at')
     serializer_class = AnnouncementSerializer
     permission_classes = [GlobalPermission]
@@ -27,7 +29,7 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         ann.save()
         return Response({'status': 'published'})
 
-class GalleryViewSet(viewsets.ModelViewSet):
+class GalleryViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     permission_classes = [GlobalPermission]
     serializer_class = GalleryImageSerializer
 
@@ -63,23 +65,46 @@ class GalleryViewSet(viewsets.ModelViewSet):
             created.append(obj)
         return Response(GalleryImageSerializer(created, many=True).data)
 
+    @action(detail=False, methods=['post'], url_path='batches')
+    def create_batch(self, request):
+        """Batch upload (core.ingest): stores the files, answers 202 with per-file status, inserts in the background."""
+        # Must be set before request.data is first read
+        request._request.upload_handlers = [ingest.HashingUploadHandler(request._request)]
+        files = request.FILES.getlist('images')
+        if not files:
+            return Response({"error": "No images provided."}, status=status.HTTP_400_BAD_REQUEST)
+
+        from events.models import Event
+        event_id = request.data.get('event_id')
+        event = Event.objects.filter(id=event_id).first() if str(event_id or '').isdigit() else None
+
+        state = ingest.start_batch(files, request.user, title=request.data.get('title', ''), event=event)
+        return Response(ingest.describe(state), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'], url_path=r'batches/(?P<batch_id>[0-9a-f]{32})')
+    def batch(self, request, batch_id=None):
+        state = ingest.get_batch(batch_id)
+        if state is None or state['owner'] != request.user.id:
+            return Response({"error": "Unknown batch."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ingest.describe(state))
+
     @action(detail=True, methods=['delete'])
     def image(self, request, pk=None):
         return self.destroy(request, pk)
 
-class SponsorshipViewSet(viewsets.ModelViewSet):
+class SponsorshipViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Sponsorship.objects.all().order_by('-created_at')
     serializer_class = SponsorshipSerializer
     permission_classes = [GlobalPermission]
 
-class ContactMessageViewSet(viewsets.ModelViewSet):
+class ContactMessageViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = ContactMessage.objects.all().order_by('-created_at')
     serializer_class = ContactMessageSerializer
     permission_classes = [GlobalPermission]
 
 # --- DYNAMIC FORMS ---
 
-class FormViewSet(viewsets.ModelViewSet):
+class FormViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Form.objects.all().order_by('-created_at')
     serializer_class = FormSerializer
     permission_classes = [GlobalPermission]
@@ -90,55 +115,27 @@ class FormViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def responses(self, request, pk=None):
         form = self.get_object()
-        responses = form.responses.all().order_by('-submitted_at')
+        responses = form.responses.select_related('user__profile').prefetch_related('user__profile__sigs').order_by('-submitted_at')
         return Response(FormResponseSerializer(responses, many=True).data)
 
     @action(detail=True, methods=['get'])
     def export_responses_csv(self, request, pk=None):
-        form = self.get_object()
-        responses = form.responses.all().order_by('-submitted_at')
-        fields = form.fields.all().order_by('order')
-        
-        response = HttpResponse(content_type='text/csv')
-        filename = f"{form.title.replace(' ', '_')}_responses.csv"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-
-        writer = csv.writer(response)
-        
-        # Headers
-        headers = ['Response ID', 'User', 'Submitted At'] + [f.label for f in fields]
-        writer.writerow(headers)
-
-        for resp in responses:
-            user_str = resp.user.username if resp.user else 'Anonymous'
-            row = [
-                resp.id, 
-                user_str, 
-                resp.submitted_at.strftime("%Y-%m-%d %H:%M:%S")
-            ]
-            
-            # Map data
-            data = resp.data or {}
-            for field in fields:
-                val = data.get(field.label, '')
-                if isinstance(val, list): val = ", ".join(map(str, val))
-                row.append(str(val))
-            
-            writer.writerow(row)
-            
-        return response
+        """Streams responses as CSV, or NDJSON with ?fmt=ndjson."""
+        return FormResponsesExport(self.get_object()).response(request)
 
-class FormSectionViewSet(viewsets.ModelViewSet):
+class FormSectionViewSet(ReorderMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = FormSection.objects.all()
     serializer_class = FormSectionSerializer
     permission_classes = [GlobalPermission]
+    reorder_scope = 'form'
 
-class FormFieldViewSet(viewsets.ModelViewSet):
+class FormFieldViewSet(ReorderMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = FormField.objects.all()
     serializer_class = FormFieldSerializer
     permission_classes = [GlobalPermission]
+    reorder_scope = 'form'
 
-class FormResponseViewSet(viewsets.ModelViewSet):
+class FormResponseViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = FormResponse.objects.all()
     serializer_class = FormResponseSerializer
     permission_classes = [GlobalPermission]
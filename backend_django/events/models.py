@@ -38,6 +38,7 @@ class Event(models.Model):
     
     # Media
     image = models.ImageField(upload_to='events/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # core.images
     registration_link = models.URLField(blank=True, null=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
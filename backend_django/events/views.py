@@ -1,9 +1,10 @@
 from rest_framework import viewsets, permissions
 from .models import Event
 from .serializers import EventSerializer
-from users.permissions import GlobalPermission
+from users.permissions import GlobalPermission, has_flag
+from core.fieldsets import SparseQuerysetMixin
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Event.objects.all().order_by('-date')
     serializer_class = EventSerializer
     permission_classes = [GlobalPermission]
@@ -31,7 +32,7 @@ class EventViewSet(viewsets.ModelViewSet):
         # - See DRAFT events if they have management permissions (simplified: if lead or can_manage_events)
         
         # Check if user has global event management permission
-        has_perm = user.user_roles.filter(can_manage_events=True).exists()
+        has_perm = has_flag(user, 'can_manage_events')
         
         if has_perm:
             # Manager: See all events except OTHER people's Personal events
@@ -0,0 +1,265 @@
+"""
+Live project events, pushed to open dashboards over Server-Sent Events.
+
+Each project is a channel. projects.signals and projects.presence publish
+to it (after commit); /api/projects/<id>/stream/ (projects.streams) relays it:
+
+    message   a new thread message, as ThreadMessageSerializer renders it
+    typing    {"thread", "user", "username"}; the indicator lasts TYPING_TTL seconds
+    task      {"id", "action": "saved" | "deleted", "status", "title", "assigned_to"}
+    presence  {"user", "state": "online" | "idle" | "offline", "thread"} (projects.presence)
+    sync      {"version"}: anything else sync_state reports changed (projects.sync)
+    resync    the listener fell behind and dropped events; refetch sync_state
+
+Events are encoded once, when published, so fanning one out to N listeners
+costs N queue puts and no JSON work; `data` may be a callable, rendered only
+if the channel has listeners.
+
+The broker is PROJECT_STREAMS['BROKER']. LocalBroker delivers to listeners in
+this process only, so publishers and streams must share a process (tests, or a
+single ASGI worker). CacheBroker, the default, relays through the shared cache,
+so the WSGI workers that handle writes reach streams held by any ASGI process.
+Another broker (Redis pub/sub...) implements the same methods - subscribe(),
+unsubscribe(), publish(), listeners() (None if it cannot tell) - and nothing
+else changes.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.renderers import JSONRenderer
+
+from core.caching import Namespace
+
+logger = logging.getLogger(__name__)
+
+CONFIG = getattr(settings, 'PROJECT_STREAMS', {})
+TYPING_TTL = 4
+
+RESYNC = b'event: resync\ndata: {}\n\n'
+
+
+def channel(project_id):
+    return f'project:{project_id}'
+
+
+def encode(kind, data):
+    """One SSE frame; compact JSON never contains a raw newline."""
+    return b'event: %s\ndata: %s\n\n' % (kind.encode(), JSONRenderer().render(data))
+
+
+class Subscription:
+    """A listener's bounded queue. Created, read and closed on its event loop."""
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.lagged = False
+
+    def deliver(self, payload):
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # A stalled client must not grow memory; it resyncs instead
+            self.lagged = True
+
+    async def get(self, timeout):
+        """The next frame, RESYNC after an overflow, or None when `timeout` passes quietly."""
+        if self.lagged:
+            self.lagged = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return RESYNC
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """In-process fan-out. publish() may be called from any thread."""
+
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+
+    def subscribe(self, channel):
+        sub = Subscription(self, channel, self.queue_size)
+        with self._lock:
+            self._channels[channel].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._channels.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._channels[sub.channel]
+
+    def publish(self, channel, payload):
+        with self._lock:
+            subs = list(self._channels.get(channel, ()))
+        by_loop = defaultdict(list)
+        for sub in subs:
+            by_loop[sub.loop].append(sub)
+        for loop, group in by_loop.items():
+            # One wake-up per event loop, however many listeners it serves
+            try:
+                loop.call_soon_threadsafe(_fan_out, group, payload)
+            except RuntimeError:
+                # Loop closed under its subscribers (worker shutting down)
+                for sub in group:
+                    self.unsubscribe(sub)
+
+    def listeners(self, channel):
+        with self._lock:
+            return len(self._channels.get(channel, ()))
+
+
+def _fan_out(subs, payload):
+    for sub in subs:
+        sub.deliver(payload)
+
+
+class CacheBroker(LocalBroker):
+    """
+    Fan-out across processes through the shared cache (settings.CACHES).
+
+    publish() appends the frame to the channel's log: a sequence number (a
+    Namespace version) and one key per frame, kept LOG_TTL seconds. A process
+    with listeners runs one thread that reads the logs of their channels every
+    POLL_INTERVAL and hands new frames to the in-process fan-out, so events
+    arrive up to POLL_INTERVAL late. A frame gone from the cache before it was
+    read, or a listener too far behind, becomes a resync.
+
+    Processes with listeners keep a 'listening' key alive per channel, so
+    listeners() can still tell publishers that nobody is listening.
+    """
+    LOG_TTL = 60
+    LISTENING_TTL = 15
+    # Seconds a sequence number may go without its frame (publish() sets it just after) before it counts as lost
+    GRACE = 1.0
+
+    log = Namespace('events', ttl=LOG_TTL)
+
+    def __init__(self, queue_size=256, poll_interval=None):
+        super().__init__(queue_size)
+        self.poll_interval = poll_interval or CONFIG.get('POLL_INTERVAL', 0.25)
+        self._cursors = {}  # channel -> last sequence number relayed here
+        self._missing = {}  # channel -> (sequence number, when it was first found without its frame)
+        self._poller = None
+
+    def subscribe(self, channel):
+        start = self.log.version(channel)
+        sub = super().subscribe(channel)
+        with self._lock:
+            self._cursors.setdefault(channel, start)
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, name='project-events', daemon=True)
+                self._poller.start()
+        self.log.set(('listening', channel), True, self.LISTENING_TTL)
+        return sub
+
+    def unsubscribe(self, sub):
+        super().unsubscribe(sub)
+        with self._lock:
+            if sub.channel not in self._channels:
+                self._cursors.pop(sub.channel, None)
+                self._missing.pop(sub.channel, None)
+
+    def publish(self, channel, payload):
+        seq = self.log.bump(channel)[0]
+        self.log.set(('frame', channel, seq), payload)
+
+    def listeners(self, channel):
+        return None if self.log.get(('listening', channel)) else 0
+
+    def _poll(self):
+        refreshed = time.monotonic()
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                cursors = dict(self._cursors)
+                if not cursors:
+                    self._poller = None
+                    return
+            try:
+                self._relay(cursors)
+                if time.monotonic() - refreshed > self.LISTENING_TTL / 3:
+                    refreshed = time.monotonic()
+                    self.log.set_many({('listening', c): True for c in cursors}, self.LISTENING_TTL)
+            except Exception:
+                logger.exception("Relaying project events failed")
+
+    def _relay(self, cursors):
+        channels = list(cursors)
+        for channel, seq in zip(channels, self.log.versions(channels)):
+            last = cursors[channel]
+            if seq == last:
+                continue
+            if not 0 < seq - last <= self.queue_size:
+                # The counter was lost from the cache, or these listeners are too far behind to replay
+                super().publish(channel, RESYNC)
+                self._advance(channel, seq)
+                continue
+            frames = self.log.get_many([('frame', channel, n) for n in range(last + 1, seq + 1)])
+            for n in range(last + 1, seq + 1):
+                payload = frames.get(('frame', channel, n))
+                if payload is None:
+                    pending, since = self._missing.get(channel, (n, time.monotonic()))
+                    if pending != n:
+                        since = time.monotonic()
+                    if time.monotonic() - since < self.GRACE:
+                        self._missing[channel] = (n, since)
+                        break
+                    payload = RESYNC
+                self._missing.pop(channel, None)
+                super().publish(channel, payload)
+                last = n
+            self._advance(channel, last)
+
+    def _advance(self, channel, seq):
+        with self._lock:
+            if channel in self._cursors:
+                self._cursors[channel] = seq
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                cls = import_string(CONFIG.get('BROKER', 'projects.events.LocalBroker'))
+                _broker = cls(queue_size=CONFIG.get('QUEUE_SIZE', 256))
+    return _broker
+
+
+def publish_now(project_id, kind, data):
+    """Send right away: typing and presence, which belong to no transaction."""
+    name = channel(project_id)
+    target = broker()
+    if target.listeners(name) == 0:
+        return
+    target.publish(name, encode(kind, data() if callable(data) else data))
+
+
+def publish(project_id, kind, data):
+    """Send an event to the project's listeners once the current transaction commits."""
+    if project_id:
+        transaction.on_commit(lambda: publish_now(project_id, kind, data))
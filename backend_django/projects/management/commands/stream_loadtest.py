@@ -0,0 +1,152 @@
+"""
+How many concurrent project streams (projects.streams) one worker can hold.
+
+    python manage.py stream_loadtest --listeners 2000 --events 20
+
+Opens the streams against config.asgi's application on this process's event
+loop - no server or sockets, so the figures are Django, the view and the
+broker, i.e. what a worker pays per listener, not the network - then
+publishes events from a thread the way a view would and times how long each
+takes to reach every listener. Streams beyond MAX_STREAMS are refused (503)
+and counted.
+"""
+import asyncio
+import json
+import resource
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from projects import events, streams
+from projects.models import Project
+
+
+class Listener:
+    """One client: an ASGI receive/send pair that records event arrival times."""
+
+    def __init__(self):
+        self.status = None
+        self.ready = asyncio.Event()
+        self.hang_up = asyncio.Event()
+        self.requested = False
+        self.arrivals = {}
+        self.frames = []
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.hang_up.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+            return
+        now = time.perf_counter()
+        for frame in filter(None, message.get('body', b'').split(b'\n\n')):
+            self.frames.append(frame)
+            if frame.startswith(b'event: hello'):
+                self.ready.set()
+            elif frame.startswith(b'event: loadtest'):
+                data = json.loads(frame.split(b'data: ', 1)[1])
+                self.arrivals[data['seq']] = now - data['sent']
+        if self.status != 200 or not message.get('more_body'):
+            self.ready.set()
+
+
+def stream_scope(project_id, token=None):
+    """The ASGI scope of GET /api/projects/<id>/stream/."""
+    host = (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.')
+    headers = [(b'host', host.encode())]
+    if token:
+        headers.append((b'authorization', f'Bearer {token}'.encode()))
+    return {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': f'/api/projects/{project_id}/stream/', 'raw_path': b'', 'query_string': b'', 'root_path': '',
+        'headers': headers, 'client': ('127.0.0.1', 0), 'server': (host, 80),
+    }
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run(application, project_id, token, listeners, count, timeout=30):
+    """Open `listeners` streams, publish `count` events, hang up; returns the measurements."""
+    scope = stream_scope(project_id, token)
+    rss_before = _peak_rss_mb()
+    clients = [Listener() for _ in range(listeners)]
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(application(dict(scope), c.receive, c.send)) for c in clients]
+    # Connecting is bounded by the auth/membership check on the sync thread, a few ms per stream
+    await asyncio.wait_for(asyncio.gather(*(c.ready.wait() for c in clients)), timeout + listeners * 0.02)
+    open_seconds = time.perf_counter() - started
+    accepted = [c for c in clients if c.status == 200]
+
+    fan_out = []
+    for seq in range(count):
+        await asyncio.to_thread(events.publish_now, project_id, 'loadtest', {'seq': seq, 'sent': time.perf_counter()})
+        deadline = time.perf_counter() + timeout
+        while any(seq not in c.arrivals for c in accepted) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.001)
+        fan_out.append(max((c.arrivals.get(seq, timeout) for c in accepted), default=0))
+
+    latencies = sorted(v for c in accepted for v in c.arrivals.values())
+    stats = {
+        'listeners': listeners,
+        'accepted': len(accepted),
+        'refused': sum(1 for c in clients if c.status == 503),
+        'open_seconds': round(open_seconds, 2),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'rss_per_listener_kb': round((_peak_rss_mb() - rss_before) * 1024 / max(len(accepted), 1), 1),
+        'events': count,
+        'delivered': len(latencies),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2) if latencies else None,
+        'fan_out_ms': round(statistics.mean(fan_out) * 1000, 2) if fan_out else None,
+    }
+
+    for c in clients:
+        c.hang_up.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    stats['still_open'] = streams.open_streams()
+    return stats
+
+
+class Command(BaseCommand):
+    help = "Hold N project streams open in this process and measure connect time, memory and event fan-out."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listeners', type=int, default=1000)
+        parser.add_argument('--events', type=int, default=20, help="Events published once every stream is open")
+        parser.add_argument('--project', type=int, help="Project id (default: the first one with a lead)")
+        parser.add_argument('--max-streams', type=int, help="Override PROJECT_STREAMS['MAX_STREAMS'] for this run")
+
+    def handle(self, *args, **opts):
+        projects = Project.objects.filter(lead__isnull=False).select_related('lead').order_by('pk')
+        project = projects.filter(pk=opts['project']).first() if opts['project'] else projects.first()
+        if project is None:
+            raise CommandError("Need a project with a lead to stream as.")
+        if opts['max_streams']:
+            streams.CONFIG = {**streams.CONFIG, 'MAX_STREAMS': opts['max_streams']}
+
+        from config.asgi import application
+        token = str(AccessToken.for_user(project.lead))
+        stats = asyncio.run(run(application, project.pk, token, opts['listeners'], opts['events']))
+
+        self.stdout.write(
+            f"{stats['accepted']}/{stats['listeners']} streams open in {stats['open_seconds']}s "
+            f"({stats['refused']} refused), peak RSS {stats['peak_rss_mb']} MB, "
+            f"~{stats['rss_per_listener_kb']} KB per stream"
+        )
+        self.stdout.write(
+            f"{stats['delivered']} deliveries of {stats['events']} events: "
+            f"p50 {stats['p50_ms']} ms, p99 {stats['p99_ms']} ms, full fan-out {stats['fan_out_ms']} ms"
+        )
+        style = self.style.SUCCESS if stats['still_open'] == 0 else self.style.ERROR
+        self.stdout.write(style(f"{stats['still_open']} streams left open after disconnect"))
@@ -0,0 +1,41 @@
+"""
+Project membership, answered in SQL instead of by loading member lists.
+
+A user belongs to a project they lead or are a member of.
+
+    belongs(user, project)       Q for querysets; `project` is the path to the project
+                                 ('pk' on Project, 'project' on ProjectThread, 'thread__project' ...)
+    member_exists(user, project) Exists() over the members table, for annotations
+    member_project_ids(request)  ids of the requesting user's projects: one query, kept on the request
+
+Serializers and permission classes use member_project_ids, so checking N
+objects costs one query rather than one member list per object.
+"""
+from django.db.models import Exists, OuterRef, Q
+
+from .models import Project
+
+
+def member_exists(user, project='pk'):
+    return Exists(Project.members.through.objects.filter(project=OuterRef(project), user=user.pk))
+
+
+def belongs(user, project='pk'):
+    lead = 'lead' if project == 'pk' else f'{project}__lead'
+    return Q(**{lead: user.pk}) | Q(member_exists(user, project))
+
+
+def member_project_ids(request):
+    ids = getattr(request, '_member_project_ids', None)
+    if ids is None:
+        user = request.user
+        ids = set()
+        if user.is_authenticated:
+            ids = set(Project.objects.filter(belongs(user)).values_list('id', flat=True))
+        request._member_project_ids = ids
+    return ids
+
+
+def forget(request):
+    """Drop the cached ids after the request itself changed a membership."""
+    request.__dict__.pop('_member_project_ids', None)
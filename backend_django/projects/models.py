@@ -29,6 +29,7 @@ class Project(models.Model):
     is_open_source = models.BooleanField(default=False)
     github_url = models.URLField(blank=True, null=True)
     cover_image = models.ImageField(upload_to='projects/', blank=True, null=True)
+    cover_image_variants = models.JSONField(default=dict, blank=True, editable=False)  # core.images
     
     created_at = models.DateTimeField(auto_now_add=True)
 
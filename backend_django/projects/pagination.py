@@ -0,0 +1,19 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProjectItemPagination(PageNumberPagination):
+    """Tasks, threads and join requests of one project (ProjectViewSet sub-resources)."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class ThreadMessagePagination(CursorPagination):
+    """
+    A thread's messages, newest first. Keyset pagination keeps pages stable
+    while new messages arrive; `next` walks back through the history.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'limit'
+    max_page_size = 200
@@ -1,8 +1,12 @@
 from rest_framework import permissions
 
+from .membership import member_project_ids
+from .models import Project
+
 class IsProjectMember(permissions.BasePermission):
     """
     Custom permission to only allow members of a project to view/edit.
+    Membership comes from membership.member_project_ids (one query per request).
     """
 
     def has_permission(self, request, view):
@@ -14,18 +18,14 @@ class IsProjectMember(permissions.BasePermission):
         # Read permissions are allowed to any member
         if request.user.is_superuser:
             return True
-            
-        # If obj is Project
-        if hasattr(obj, 'members'):
-            return request.user == obj.lead or request.user in obj.members.all()
-            
-        # If obj is ProjectThread
-        if hasattr(obj, 'project'):
-            return request.user == obj.project.lead or request.user in obj.project.members.all()
-
-        # If obj is ThreadMessage
-        if hasattr(obj, 'thread'):
-            project = obj.thread.project
-            return request.user == project.lead or request.user in project.members.all()
 
-        return False
+        # Project, ProjectThread, or ThreadMessage (via its thread)
+        if isinstance(obj, Project):
+            project_id = obj.pk
+        elif hasattr(obj, 'project_id'):
+            project_id = obj.project_id
+        elif hasattr(obj, 'thread'):
+            project_id = obj.thread.project_id
+        else:
+            return False
+        return project_id in member_project_ids(request)
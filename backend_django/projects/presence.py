@@ -0,0 +1,80 @@
+"""
+Who is in a project's workspace right now: online, idle, which thread they
+have open and whether they are typing there.
+
+Each open dashboard sends a heartbeat (POST /projects/<id>/presence/) every
+HEARTBEAT seconds and when the user types. A beat is one cache write: the
+member's entry under presence:<project>:<user>, which expires after
+ONLINE_TTL, so a closed tab drops out on its own.
+
+    {"username": ..., "seen": t, "active": t - idle_for, "thread": id|None, "typing_until": t}
+
+Reading a project is one get_many over its members' entries, whatever their
+number; the member ids come from the cached sync payload (projects.sync), so
+neither side runs a query.
+
+    members   {user id: {"state": "online" | "idle", "thread": id|None}}   absent = offline
+    threads   {thread id: {"viewing": [user ids], "typing": [{"id", "username"}]}}
+
+A member is idle after IDLE_AFTER seconds without input, and typing for
+TYPING_TTL seconds after a typing beat. Beats are also published to the
+project's live streams (projects.events).
+"""
+import time
+
+from core.caching import Namespace
+from . import events, sync
+
+HEARTBEAT = 20
+ONLINE_TTL = 2 * HEARTBEAT + 5
+IDLE_AFTER = 120
+
+entries = Namespace('presence', ttl=ONLINE_TTL)
+
+
+def beat(project_id, user, thread=None, typing=False, idle_for=0):
+    now = time.time()
+    entry = {
+        'username': user.username,
+        'seen': now,
+        'active': now - max(0, idle_for),
+        'thread': thread,
+        'typing_until': now + events.TYPING_TTL if typing and thread else 0,
+    }
+    entries.set((project_id, user.id), entry)
+
+    events.publish_now(project_id, 'presence', {'user': user.id, **_describe(entry, now)})
+    if entry['typing_until']:
+        events.publish_now(project_id, 'typing', {'thread': thread, 'user': user.id, 'username': user.username})
+
+
+def leave(project_id, user_id):
+    entries.delete((project_id, user_id))
+    events.publish_now(project_id, 'presence', {'user': user_id, 'state': 'offline', 'thread': None})
+
+
+def _describe(entry, now):
+    return {
+        'state': 'idle' if now - entry['active'] > IDLE_AFTER else 'online',
+        'thread': entry['thread'],
+    }
+
+
+def snapshot(project_id, member_ids):
+    now = time.time()
+    found = entries.get_many([(project_id, uid) for uid in member_ids])
+    members, threads = {}, {}
+    for (_, uid), entry in found.items():
+        members[uid] = _describe(entry, now)
+        if entry['thread']:
+            thread = threads.setdefault(entry['thread'], {'viewing': [], 'typing': []})
+            thread['viewing'].append(uid)
+            if entry['typing_until'] > now:
+                thread['typing'].append({'id': uid, 'username': entry['username']})
+    return {'members': members, 'threads': threads}
+
+
+def project_snapshot(project_id):
+    """snapshot() for every member, or None if the project does not exist."""
+    _, payload = sync.state(project_id)
+    return None if payload is None else snapshot(project_id, payload['members'])
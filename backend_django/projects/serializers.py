@@ -1,29 +1,47 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from users.serializers import UserSerializer
+from core.fieldsets import SparseModelSerializer
+from core.images import SrcsetField
+from users.models import User
+from users.serializers import UserSummarySerializer
+from .membership import member_project_ids
 from .models import Project, Task, TaskComment, ProjectRequest, ProjectThread, ThreadMessage
 
-class ThreadMessageSerializer(serializers.ModelSerializer):
-    author_details = UserSerializer(source='author', read_only=True)
+# Members shown on a project card; the rest are only counted
+AVATAR_MEMBERS = 5
+
+
+class AnnotatedField(serializers.ReadOnlyField):
+    """A value the viewset annotates onto the queryset (counts, flags); None on rows loaded without it."""
+
+    def get_attribute(self, instance):
+        return getattr(instance, self.source, None)
+
+
+class ThreadMessageSerializer(SparseModelSerializer):
+    author_details = UserSummarySerializer(source='author', read_only=True)
     class Meta:
         model = ThreadMessage
         fields = '__all__'
         read_only_fields = ['author']
 
-class ProjectThreadSerializer(serializers.ModelSerializer):
-    messages = ThreadMessageSerializer(many=True, read_only=True)
-    created_by_details = UserSerializer(source='created_by', read_only=True)
+class ProjectThreadSerializer(SparseModelSerializer):
+    # Messages are paged separately: /projects/<id>/threads/<thread id>/messages/
+    message_count = AnnotatedField()
+    last_message_id = AnnotatedField()
+    created_by_details = UserSummarySerializer(source='created_by', read_only=True)
     class Meta:
         model = ProjectThread
         fields = '__all__'
 
-class ProjectRequestSerializer(serializers.ModelSerializer):
-    user_details = UserSerializer(source='user', read_only=True)
+class ProjectRequestSerializer(SparseModelSerializer):
+    user_details = UserSummarySerializer(source='user', read_only=True)
     user_position = serializers.CharField(source='user.profile.position', read_only=True)
     class Meta:
         model = ProjectRequest
         fields = '__all__'
 
-class TaskCommentSerializer(serializers.ModelSerializer):
+class TaskCommentSerializer(SparseModelSerializer):
     author_name = serializers.CharField(source='author.username', read_only=True)
     
     class Meta:
@@ -31,42 +49,75 @@ class TaskCommentSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['author']
 
-class TaskSerializer(serializers.ModelSerializer):
-    assigned_to_details = UserSerializer(source='assigned_to', read_only=True)
+class TaskSerializer(SparseModelSerializer):
+    assigned_to_details = UserSummarySerializer(source='assigned_to', read_only=True)
     comments = TaskCommentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Task
         fields = '__all__'
 
-class ProjectSerializer(serializers.ModelSerializer):
-    lead_details = UserSerializer(source='lead', read_only=True)
-    members_details = UserSerializer(source='members', many=True, read_only=True)
-    tasks = TaskSerializer(many=True, read_only=True)
-    threads = ProjectThreadSerializer(many=True, read_only=True)
-    join_requests = ProjectRequestSerializer(many=True, read_only=True)
-    
+class ProjectSummarySerializer(SparseModelSerializer):
+    """
+    Project card for list views. Counts and the membership flags come from
+    annotations (ProjectViewSet.get_queryset); tasks, threads and join requests
+    are separate paginated endpoints under /projects/<id>/.
+    """
+    lead_details = UserSummarySerializer(source='lead', read_only=True)
+    member_avatars = UserSummarySerializer(source='avatar_members', many=True, read_only=True)
+    member_count = AnnotatedField()
+    task_count = AnnotatedField()
+    done_task_count = AnnotatedField()
+    thread_count = AnnotatedField()
+    pending_request_count = AnnotatedField()
+    is_member = AnnotatedField()
+    my_request_status = AnnotatedField()
+    cover_image_srcset = SrcsetField('cover_image')
+
     class Meta:
         model = Project
-        fields = '__all__'
+        fields = (
+            'id', 'title', 'description', 'status', 'deadline', 'is_public', 'is_open_source', 'github_url',
+            'cover_image', 'cover_image_srcset', 'lead', 'lead_details', 'member_avatars', 'member_count',
+            'task_count', 'done_task_count', 'thread_count', 'pending_request_count', 'status_update_requested',
+            'is_member', 'my_request_status', 'last_updated_at', 'created_at',
+        )
+        related_lookups = {
+            'member_avatars': (Prefetch(
+                'members', queryset=User.objects.select_related('profile').order_by('id')[:AVATAR_MEMBERS],
+                to_attr='avatar_members',
+            ),),
+        }
+
+    # Management data only members (and superusers) see
+    MEMBER_ONLY = ('pending_request_count', 'status_update_requested', 'status_requested_by')
+
+    def is_member_of(self, instance):
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if not (user and user.is_authenticated):
+            return False
+        if user.is_superuser or instance.lead_id == user.id:
+            return True
+        annotated = getattr(instance, 'is_member', None)
+        if annotated is not None:
+            return annotated
+        # Rows loaded without the annotation (create/update responses): one query per request
+        return instance.id in member_project_ids(request)
 
     def to_representation(self, instance):
         ret = super().to_representation(instance)
-        request = self.context.get('request')
-        
-        # Security: Only show inner details to members/leads or staff
-        is_member = False
-        if request and request.user.is_authenticated:
-            user = request.user
-            if user.is_superuser or instance.lead == user or instance.members.filter(id=user.id).exists():
-                is_member = True
-        
-        if not is_member:
-            # Strip sensitive management data for public view
-            ret.pop('threads', None)
-            ret.pop('tasks', None)
-            ret.pop('join_requests', None)
-            ret.pop('status_update_requested', None)
-            ret.pop('status_requested_by', None)
-            
+        if not self.is_member_of(instance):
+            for name in self.MEMBER_ONLY:
+                ret.pop(name, None)
         return ret
+
+
+class ProjectSerializer(ProjectSummarySerializer):
+    """A single project: every field plus the member list."""
+    members_details = UserSummarySerializer(source='members', many=True, read_only=True)
+    member_avatars = None
+
+    class Meta:
+        model = Project
+        exclude = ('cover_image_variants',)
@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import events, sync
+from .models import Project, ProjectThread, Task, TaskComment, ThreadMessage
+from .serializers import ThreadMessageSerializer
+
+User = get_user_model()
+
+
+# --- Dashboard change versions (projects.sync) ---
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    sync.bump(instance.pk)
+
+@receiver(post_save, sender=ProjectThread)
+@receiver(post_delete, sender=ProjectThread)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def project_item_changed(sender, instance, **kwargs):
+    # Task changes reach streams as `task` events
+    sync.bump(instance.project_id, announce=sender is not Task)
+
+@receiver(post_save, sender=ThreadMessage)
+@receiver(post_delete, sender=ThreadMessage)
+def message_changed(sender, instance, created=False, **kwargs):
+    # Messages created or deleted through thread.messages carry their thread already.
+    # A new message reaches streams as a `message` event.
+    sync.bump(instance.thread.project_id, announce=not created)
+
+@receiver(post_save, sender=TaskComment)
+@receiver(post_delete, sender=TaskComment)
+def task_comment_changed(sender, instance, **kwargs):
+    sync.bump(instance.task.project_id)
+
+@receiver(m2m_changed, sender=Project.members.through)
+def members_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # user.projects.clear() reports no pk_set
+        sync.bump(*instance.projects.values_list('id', flat=True))
+    elif action.startswith('post_'):
+        if not reverse:
+            sync.bump(instance.pk)
+        else:
+            sync.bump(*(pk_set or ()))
+
+@receiver(post_save, sender=User)
+def member_logged_in(sender, instance, created, update_fields=None, **kwargs):
+    # sync_state reports members' last_login
+    if created or (update_fields and 'last_login' not in update_fields):
+        return
+    sync.bump(*Project.objects.filter(Q(lead=instance) | Q(members=instance)).values_list('id', flat=True).distinct())
+
+
+# --- Live events (projects.events) ---
+@receiver(post_save, sender=ThreadMessage)
+def message_posted(sender, instance, created, **kwargs):
+    if created:
+        # Rendered after commit, and only if the project has listeners
+        events.publish(instance.thread.project_id, 'message', lambda: ThreadMessageSerializer(instance).data)
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_published(sender, instance, signal, **kwargs):
+    events.publish(instance.project_id, 'task', {
+        'id': instance.pk,
+        'action': 'deleted' if signal is post_delete else 'saved',
+        'status': instance.status,
+        'title': instance.title,
+        'assigned_to': instance.assigned_to_id,
+    })
@@ -0,0 +1,117 @@
+"""
+GET /api/projects/<id>/stream/ - a project's live events (projects.events)
+as text/event-stream, for its members. Authenticated like the rest of the API
+(Authorization: Bearer <access token>), so dashboards read it with fetch():
+EventSource cannot send that header.
+
+    retry: 3000
+    event: hello     {"version": <sync version>, "presence": <projects.presence snapshot>}
+    event: ...       see projects.events
+    : ping           every HEARTBEAT seconds, so proxies keep the connection open
+
+Opening a stream counts as a presence heartbeat (projects.presence), and a
+member whose last stream in this worker is closed by the client goes offline
+at once rather than when the heartbeat expires. The stream ends after
+MAX_AGE seconds and the client reconnects, which checks its token and
+membership again without marking the member offline in between.
+
+Under ASGI an open stream is a coroutine waiting on a queue, not a thread.
+WSGI cannot serve an endless async stream (Django would buffer it whole), so
+there the view answers 501 and dashboards keep polling sync_state.
+
+A worker holds at most MAX_STREAMS streams and answers 503 with Retry-After
+beyond that (`manage.py stream_loadtest` measures what one worker sustains).
+"""
+import time
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import APIException
+
+from users.authentication import CachedJWTAuthentication
+from . import events, presence, sync
+
+CONFIG = getattr(settings, 'PROJECT_STREAMS', {})
+RETRY_MS = 3000
+
+# Streams open in this worker, and who holds them: {project id: Counter(user id)}
+_open = 0
+_online = defaultdict(Counter)
+
+
+def open_streams():
+    return _open
+
+
+def _authorize(request, project_id):
+    """(user, hello data, None) or (None, None, error response)."""
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except APIException as e:
+        return None, None, JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+    if result is None:
+        return None, None, JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    user = result[0]
+    # Membership from the cached sync payload: no query while the project is unchanged
+    current, payload = sync.state(project_id)
+    if payload is None:
+        return None, None, JsonResponse({'detail': 'Not found.'}, status=404)
+    if not (user.is_superuser or user.id in payload['members']):
+        return None, None, JsonResponse({'detail': 'Must be a project member.'}, status=403)
+    presence.beat(project_id, user)
+    return user, {'version': current, 'presence': presence.snapshot(project_id, payload['members'])}, None
+
+
+async def project_stream(request, pk):
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Live streams need an ASGI server; poll sync_state instead.'}, status=501)
+
+    user, hello, error = await sync_to_async(_authorize)(request, pk)
+    if error is not None:
+        return error
+    # Soft limit: streams count themselves once they start
+    if _open >= CONFIG.get('MAX_STREAMS', 1000):
+        response = JsonResponse({'detail': 'Too many open streams, retry later.'}, status=503)
+        response['Retry-After'] = str(CONFIG.get('RETRY_AFTER', 30))
+        return response
+
+    response = StreamingHttpResponse(_events(pk, user.id, hello), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx would otherwise buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def _events(project_id, user_id, hello):
+    global _open
+    _open += 1
+    sub = events.broker().subscribe(events.channel(project_id))
+    online = _online[project_id]
+    online[user_id] += 1
+    expired = False
+    try:
+        yield b'retry: %d\n\n' % RETRY_MS
+        yield events.encode('hello', hello)
+
+        heartbeat = CONFIG.get('HEARTBEAT', 15)
+        deadline = time.monotonic() + CONFIG.get('MAX_AGE', 300)
+        while (remaining := deadline - time.monotonic()) > 0:
+            frame = await sub.get(min(heartbeat, remaining))
+            yield frame if frame is not None else b': ping\n\n'
+        expired = True
+    finally:
+        # Also reached when the client disconnects: Django cancels the response task
+        sub.close()
+        _open -= 1
+        online[user_id] -= 1
+        if online[user_id] <= 0:
+            del online[user_id]
+            if not online:
+                _online.pop(project_id, None)
+            # An expired stream is reconnected right away; only a hang-up means the member left
+            if not expired:
+                presence.leave(project_id, user_id)
@@ -0,0 +1,73 @@
+"""
+Change versions for open project dashboards.
+
+Each project has a version (core.caching) in the shared cache. projects.signals bumps it
+(after commit) whenever something sync_state reports may have changed:
+thread messages, threads, tasks and task comments, membership, the project
+row itself (status, lead...) and a member's last_login.
+
+Each bump is also announced to the project's live streams as a `sync` event
+(projects.events), unless the change has an event of its own.
+
+The sync_state payload is cached under the current version, so a poll that
+finds nothing new costs two cache reads and no queries. A rebuild is three
+queries, with thread heads from a single Max('messages__id') aggregate.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max, Q
+
+from core.caching import Namespace
+from . import events
+
+# Bounds anything the signals miss
+PAYLOAD_TTL = 3600
+
+# Versions and payloads, keyed by project id
+projects = Namespace('project:sync', ttl=PAYLOAD_TTL)
+
+
+def version(project_id):
+    return projects.version(project_id)
+
+
+def bump(*project_ids, announce=True):
+    """
+    Move these projects to a new version once the current transaction commits,
+    telling their streams unless `announce` is False.
+    """
+    project_ids = {pid for pid in project_ids if pid}
+    if not project_ids:
+        return
+
+    def _bump():
+        for pid, current in zip(project_ids, projects.bump(*project_ids)):
+            if announce:
+                events.publish_now(pid, 'sync', {'version': current})
+
+    transaction.on_commit(_bump)
+
+
+def build(project_id):
+    """The sync payload of a project, or None if it does not exist."""
+    from .models import Project, ProjectThread
+
+    lead = Project.objects.filter(pk=project_id).values_list('lead_id', flat=True)
+    if not lead:
+        return None
+    lead_id = lead[0]
+    members = dict(
+        get_user_model().objects.filter(Q(projects=project_id) | Q(pk=lead_id or 0)).values_list('id', 'last_login')
+    )
+    heads = ProjectThread.objects.filter(project=project_id).annotate(head=Max('messages__id')).values_list('id', 'head')
+    return {
+        'members': set(members),
+        'members_status': members,
+        'threads_state': {tid: head or 0 for tid, head in heads},
+    }
+
+
+def state(project_id):
+    """(version, payload); the payload is None for a missing project."""
+    current = version(project_id)
+    return current, projects.get_or_set(projects.key(project_id, current), lambda: build(project_id))
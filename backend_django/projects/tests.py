@@ -1,3 +1,441 @@
+import asyncio
+import time
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core import signals
+from django.core.cache import cache
+from django.db import close_old_connections, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users import refdata
+from users.models import User, MemberProfile, Role
+from users.serializers import UserSerializer
+from . import events, presence, streams
+from .management.commands.stream_loadtest import Listener, run, stream_scope
+from .models import Project, ProjectRequest, Task, ProjectThread, ThreadMessage
+from .serializers import ProjectSummarySerializer
+
+
+class ProjectListQueryBenchmarkTests(TestCase):
+    """Queries for /api/projects/ with nested UserSummarySerializer vs. the full UserSerializer."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('viewer', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.seq = 0
+        # Position names come from the reference-data snapshot; load it outside the measurements
+        # (dropping any copy left by an earlier test, whose version cache.clear() discarded)
+        refdata.invalidate()
+        refdata.get_snapshot()
+
+    def _add_projects(self, n, members=5):
+        for _ in range(n):
+            self.seq += 1
+            people = []
+            for j in range(members):
+                u = User.objects.create_user(f'm{self.seq}_{j}', password='x')
+                MemberProfile.objects.create(user=u, full_name=f'Member {self.seq}.{j}')
+                people.append(u)
+            project = Project.objects.create(title=f'P{self.seq}', description='-', lead=people[0], is_public=True)
+            project.members.add(self.user, *people)
+            Task.objects.create(project=project, title='T', assigned_to=people[1])
+            thread = ProjectThread.objects.create(project=project, title='General', created_by=people[0])
+            for u in people:
+                ThreadMessage.objects.create(thread=thread, author=u, content='hi')
+
+    def _count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/projects/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_nested_users_cost_no_queries(self):
+        self._add_projects(2)
+        small = self._count()
+        self._add_projects(6)
+        large = self._count()
+
+        full = {'lead_details': UserSerializer(source='lead', read_only=True)}
+        with mock.patch.dict(ProjectSummarySerializer._declared_fields, full):
+            heavy = self._count()
+
+        self.assertEqual(small, large)
+        self.assertLess(large, heavy)
+
+    def test_list_is_a_summary(self):
+        self._add_projects(2)
+        project = self.client.get('/api/projects/').data[0]
+        self.assertNotIn('tasks', project)
+        self.assertNotIn('threads', project)
+        self.assertEqual((project['member_count'], project['task_count'], project['thread_count']), (6, 1, 1))
+        self.assertEqual(len(project['member_avatars']), 5)
+        self.assertTrue(project['is_member'])
+
+    def test_sparse_fields_skip_nested_relations(self):
+        self._add_projects(3)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/projects/?fields=id,title')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data[0]), {'id', 'title'})
+        self.assertLess(len(ctx), self._count())
+
+    def test_public_pages_hide_private_fields(self):
+        self._add_projects(1)
+        project = Project.objects.get()
+        response = APIClient().get(f'/api/projects/{project.pk}/')
+        self.assertEqual(response.status_code, 200)
+        for nested in [response.data['lead_details'], *response.data['members_details']]:
+            self.assertEqual(set(nested), {'id', 'username', 'full_name', 'position', 'avatar'})
+
+
+class ProjectSubResourceTests(TestCase):
+    """Tasks, threads, messages and join requests are paginated, members-only endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.member = User.objects.create_user('member', password='x')
+        self.outsider = User.objects.create_user('outsider', password='x')
+        self.project = Project.objects.create(title='P', description='-', lead=self.member, is_public=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_paginated_sub_resources(self):
+        for i in range(60):
+            Task.objects.create(project=self.project, title=f'T{i}', status='DONE' if i % 2 else 'TODO')
+        thread = ProjectThread.objects.create(project=self.project, title='General', created_by=self.member)
+        for i in range(70):
+            ThreadMessage.objects.create(thread=thread, author=self.member, content=f'm{i}')
+
+        page = self.client.get(f'/api/projects/{self.project.id}/tasks/').data
+        self.assertEqual((page['count'], len(page['results'])), (60, 50))
+        self.assertEqual(self.client.get(f'/api/projects/{self.project.id}/tasks/?status=DONE').data['count'], 30)
+
+        threads = self.client.get(f'/api/projects/{self.project.id}/threads/').data['results']
+        self.assertEqual((threads[0]['message_count'], threads[0]['last_message_id']), (70, thread.messages.last().id))
+        self.assertNotIn('messages', threads[0])
+
+        url = f'/api/projects/{self.project.id}/threads/{thread.id}/messages/'
+        newest = self.client.get(url).data
+        self.assertEqual(newest['results'][0]['content'], 'm69')
+        older = self.client.get(newest['next']).data
+        self.assertEqual([m['content'] for m in older['results']][-1], 'm0')
+
+        detail = self.client.get(f'/api/projects/{self.project.id}/').data
+        self.assertEqual((detail['task_count'], detail['done_task_count']), (60, 30))
+        self.assertNotIn('tasks', detail)
+
+    def test_members_only(self):
+        ProjectRequest.objects.create(project=self.project, user=self.outsider, message='let me in')
+        self.assertEqual(self.client.get(f'/api/projects/{self.project.id}/join_requests/').data['count'], 1)
+
+        self.client.force_authenticate(self.outsider)
+        for sub in ('tasks', 'threads', 'join_requests'):
+            self.assertEqual(self.client.get(f'/api/projects/{self.project.id}/{sub}/').status_code, 403)
+        card = self.client.get('/api/projects/').data[0]
+        self.assertEqual((card['is_member'], card['my_request_status']), (False, 'PENDING'))
+        self.assertNotIn('pending_request_count', card)
+
+
+class ProjectMembershipTests(TestCase):
+    """Membership checks run as one query per request, not one member list per object."""
+
+    def setUp(self):
+        cache.clear()
+        self.member = User.objects.create_user('member', password='x')
+        self.outsider = User.objects.create_user('outsider', password='x')
+        self.project = Project.objects.create(title='P', description='-', lead=User.objects.create_user('lead'))
+        self.project.members.add(self.member, *[User.objects.create_user(f'crew{i}') for i in range(30)])
+        self.thread = ProjectThread.objects.create(project=self.project, title='General')
+        self.client = APIClient()
+
+    def test_thread_access(self):
+        self.client.force_authenticate(self.member)
+        response = self.client.post('/api/messages/', {'thread': self.thread.id, 'content': 'hi'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        message_id = response.data['id']
+
+        # Membership: one query however many members the project has
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(f'/api/messages/{message_id}/').status_code, 200)
+        self.assertFalse([q for q in ctx.captured_queries if 'FROM "users_user"' in q['sql']])
+
+        self.client.force_authenticate(self.outsider)
+        response = self.client.post('/api/messages/', {'thread': self.thread.id, 'content': 'hi'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get(f'/api/messages/{message_id}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/threads/{self.thread.id}/').status_code, 404)
+
+    def test_list_flags(self):
+        for i in range(5):
+            Project.objects.create(title=f'Public {i}', description='-', is_public=True)
+        self.client.force_authenticate(self.member)
+        cards = {p['title']: p for p in self.client.get('/api/projects/').data}
+        self.assertEqual(len(cards), 6)  # no duplicates without DISTINCT
+        self.assertTrue(cards['P']['is_member'])
+        self.assertFalse(cards['Public 0']['is_member'])
+
+
+class JoinRequestDecisionTests(TestCase):
+    """Who may approve or reject a request to join a project."""
+
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(title='P', description='-', lead=User.objects.create_user('lead'))
+        self.client = APIClient()
+        self.seq = 0
+
+    def _decide(self, user, verdict='approve'):
+        self.seq += 1
+        self.applicant = User.objects.create_user(f'applicant{self.seq}')
+        request = ProjectRequest.objects.create(project=self.project, user=self.applicant)
+        self.client.force_authenticate(user)
+        return self.client.post(f'/api/join-requests/{request.id}/{verdict}/').status_code
+
+    def _holder(self, username, **role):
+        user = User.objects.create_user(username)
+        user.user_roles.add(Role.objects.create(**role))
+        return user
+
+    def test_security_managers_are_not_web_leads(self):
+        # can_manage_security opens GlobalPermission, but only a WEB_LEAD role decides
+        security = self._holder('security', name='Security', can_manage_security=True)
+        self.assertEqual((self._decide(security), self._decide(security, 'reject')), (403, 403))
+
+        web_lead = self._holder('weblead', name='WEB_LEAD', can_manage_security=True)
+        self.assertEqual(self._decide(web_lead), 200)
+        self.assertTrue(self.project.members.filter(pk=self.applicant.pk).exists())
+        self.assertEqual(self._decide(web_lead, 'reject'), 200)
+
+        manager = self._holder('manager', name='Projects', can_manage_projects=True, can_manage_security=True)
+        self.assertEqual(self._decide(manager), 200)
+
+
+class SyncStateTests(TestCase):
+    """sync_state: O(1) when nothing changed, one aggregate for thread heads when something did."""
+
+    def setUp(self):
+        cache.clear()
+        self.member = User.objects.create_user('member', password='x')
+        self.project = Project.objects.create(title='P', description='-', lead=self.member)
+        self.threads = [ProjectThread.objects.create(project=self.project, title=f'T{i}') for i in range(5)]
+        for thread in self.threads:
+            for i in range(3):
+                ThreadMessage.objects.create(thread=thread, author=self.member, content=f'm{i}')
+        self.url = f'/api/projects/{self.project.id}/sync_state/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def test_unchanged_poll_is_query_free(self):
+        with self.assertNumQueries(3):
+            state = self.client.get(self.url).data
+        self.assertEqual(state['threads_state'][self.threads[0].id], self.threads[0].messages.last().id)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, {'since': state['version']}).data['unchanged'], True)
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{state["version"]}"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_changes_bump_the_version(self):
+        version = self.client.get(self.url).data['version']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            message = self.threads[0].messages.create(author=self.member, content='new')
+        state = self.client.get(self.url, {'since': version}).data
+        self.assertNotIn('unchanged', state)
+        self.assertEqual(state['threads_state'][self.threads[0].id], message.id)
+
+        for change in (
+            lambda: Task.objects.create(project=self.project, title='T'),
+            lambda: self.project.members.add(User.objects.create_user('new')),
+            lambda: Project.objects.get(pk=self.project.pk).save(),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertNotEqual(self.client.get(self.url).data['version'], state['version'])
+            state = self.client.get(self.url).data
+
+        self.client.force_authenticate(User.objects.create_user('outsider'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class PresenceTests(TestCase):
+    """/projects/<id>/presence/: one cache write per beat, one get_many per read, no queries."""
+
+    def setUp(self):
+        cache.clear()
+        self.lead = User.objects.create_user('lead', password='x')
+        self.project = Project.objects.create(title='P', description='-', lead=self.lead)
+        self.members = [User.objects.create_user(f'm{i}') for i in range(30)]
+        self.project.members.add(*self.members)
+        self.thread = ProjectThread.objects.create(project=self.project, title='T')
+        self.url = f'/api/projects/{self.project.id}/presence/'
+        self.client = APIClient()
+
+    def _beat(self, user, **data):
+        self.client.force_authenticate(user)
+        return self.client.post(self.url, data, format='json')
+
+    def test_reads_are_one_fetch_whatever_the_team_size(self):
+        self._beat(self.lead)
+        reads = mock.patch.object(presence.entries, 'get_many', wraps=presence.entries.get_many)
+        with self.assertNumQueries(0), reads as get_many:
+            for member in self.members:
+                self._beat(member, thread=self.thread.id)
+            state = self.client.get(self.url).data
+        self.assertEqual(get_many.call_count, len(self.members) + 1)
+        self.assertEqual(len(state['members']), len(self.members) + 1)
+        self.assertEqual(state['members'][self.lead.id], {'state': 'online', 'thread': None})
+        self.assertEqual(len(state['threads'][self.thread.id]['viewing']), len(self.members))
+
+    def test_idle_typing_and_expiry(self):
+        self._beat(self.lead, thread=self.thread.id, idle_for=presence.IDLE_AFTER + 1)
+        state = self._beat(self.members[0], thread=self.thread.id, typing=True).data
+        self.assertEqual(state['members'][self.lead.id]['state'], 'idle')
+        self.assertEqual(state['threads'][self.thread.id]['typing'], [{'id': self.members[0].id, 'username': 'm0'}])
+        # Only a thread of this project counts
+        other = ProjectThread.objects.create(project=Project.objects.create(title='Q', description='-'), title='X')
+        self.assertIsNone(self._beat(self.members[1], thread=other.id).data['members'][self.members[1].id]['thread'])
+
+        self.client.force_authenticate(self.lead)
+        typers = self.client.get(f'/api/threads/{self.thread.id}/get_typing_status/').data['typers']
+        self.assertEqual([t['id'] for t in typers], [self.members[0].id])
+
+        later = time.time() + presence.ONLINE_TTL + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(self.client.get(self.url).data, {'members': {}, 'threads': {}})
+
+    def test_members_only(self):
+        outsider = User.objects.create_user('outsider')
+        self.assertEqual(self._beat(outsider).status_code, 403)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get('/api/projects/999999/presence/').status_code, 404)
+
+
+class ProjectStreamTests(TestCase):
+    """/projects/<id>/stream/ driven through the ASGI application, as a server would."""
+
+    def setUp(self):
+        cache.clear()
+        self.lead = User.objects.create_user('lead', password='x')
+        self.project = Project.objects.create(title='P', description='-', lead=self.lead)
+        self.thread = ProjectThread.objects.create(project=self.project, title='T')
+        self.token = str(AccessToken.for_user(self.lead))
+        # The ASGI handler would otherwise close the connection holding the test transaction
+        for signal in (signals.request_started, signals.request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    async def _open(self, token=None):
+        from config.asgi import application
+
+        listener = Listener()
+        task = asyncio.create_task(application(stream_scope(self.project.pk, token), listener.receive, listener.send))
+        await asyncio.wait_for(listener.ready.wait(), 5)
+        return listener, task
+
+    async def _until(self, listener, kind):
+        for _ in range(500):
+            found = [f for f in listener.frames if f.startswith(b'event: ' + kind)]
+            if found:
+                return found
+            await asyncio.sleep(0.01)
+        self.fail(f"no {kind} event")
+
+    def _post(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ThreadMessage.objects.create(thread=self.thread, author=self.lead, content='hello there')
+            Task.objects.create(project=self.project, title='Wire it', status='IN_PROGRESS')
+
+    async def test_stream_relays_project_events(self):
+        listener, task = await self._open(self.token)
+        self.assertEqual(listener.status, 200)
+        self.assertTrue(listener.frames[1].startswith(b'event: hello'))
+        self.assertIn(b'"presence":{"members":{"%d":{"state":"online"' % self.lead.pk, listener.frames[1])
+        self.assertEqual(streams.open_streams(), 1)
+
+        await sync_to_async(self._post)()
+        self.assertIn(b'hello there', (await self._until(listener, b'message'))[0])
+        self.assertIn(b'"action":"saved"', (await self._until(listener, b'task'))[0])
+        # The new message and task are their own events, not a sync_state refetch
+        self.assertFalse([f for f in listener.frames if f.startswith(b'event: sync')])
+
+        listener.hang_up.set()
+        await task
+        self.assertEqual(streams.open_streams(), 0)
+        # Hanging up is leaving
+        self.assertIsNone(presence.entries.get((self.project.pk, self.lead.pk)))
+
+    async def test_stream_refusals(self):
+        listener, _ = await self._open()
+        self.assertEqual(listener.status, 401)
+        outsider = await sync_to_async(User.objects.create_user)('outsider')
+        listener, _ = await self._open(str(AccessToken.for_user(outsider)))
+        self.assertEqual(listener.status, 403)
+
+        with mock.patch.object(streams, 'CONFIG', {**streams.CONFIG, 'MAX_STREAMS': 1}):
+            first, task = await self._open(self.token)
+            second, _ = await self._open(self.token)
+        self.assertEqual((first.status, second.status), (200, 503))
+        first.hang_up.set()
+        await task
+
+    def test_wsgi_requests_are_told_to_poll(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(client.get(f'/api/projects/{self.project.pk}/stream/').status_code, 501)
+
+    async def test_load_one_worker(self):
+        from config.asgi import application
+
+        stats = await run(application, self.project.pk, self.token, listeners=200, count=5)
+        self.assertEqual((stats['accepted'], stats['refused'], stats['delivered'], stats['still_open']), (200, 0, 1000, 0))
+
+
+class CacheBrokerTests(TestCase):
+    """Two CacheBrokers over one cache stand for a writing process and a streaming one."""
+
+    def setUp(self):
+        cache.clear()
+        self.writer = events.CacheBroker(poll_interval=0.01)
+        self.reader = events.CacheBroker(poll_interval=0.01)
+        self.channel = events.channel(1)
+
+    async def test_frames_reach_other_processes_in_order(self):
+        self.assertEqual(self.writer.listeners(self.channel), 0)
+        sub = self.reader.subscribe(self.channel)
+        self.addCleanup(sub.close)
+        self.assertIsNone(self.writer.listeners(self.channel))
+
+        for frame in (b'one', b'two', b'three'):
+            self.writer.publish(self.channel, frame)
+        self.assertEqual([await sub.get(2) for _ in range(3)], [b'one', b'two', b'three'])
+        self.assertIsNone(await sub.get(0.05))
+
+    async def test_lost_frames_and_gaps_resync(self):
+        self.reader.GRACE = 0
+        sub = self.reader.subscribe(self.channel)
+        self.addCleanup(sub.close)
+
+        # A sequence number whose frame is gone from the cache
+        self.writer.log.bump(self.channel)
+        self.writer.publish(self.channel, b'after')
+        self.assertEqual([await sub.get(2), await sub.get(2)], [events.RESYNC, b'after'])
+
+        # More frames than a listener's queue holds
+        for _ in range(self.reader.queue_size + 1):
+            self.writer.publish(self.channel, b'x')
+        self.assertEqual(await sub.get(2), events.RESYNC)
 
-# Create your tests here.
+    async def test_poller_stops_with_the_last_listener(self):
+        sub = self.reader.subscribe(self.channel)
+        poller = self.reader._poller
+        sub.close()
+        await asyncio.to_thread(poller.join, 2)
+        self.assertFalse(poller.is_alive())
+        self.assertIsNone(self.reader._poller)
@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .streams import project_stream
 from .views import ProjectViewSet, TaskViewSet, ProjectRequestViewSet, ProjectThreadViewSet, ThreadMessageViewSet
 
 router = DefaultRouter()
@@ -10,5 +11,6 @@ router.register(r'threads', ProjectThreadViewSet, basename='threads')
 router.register(r'messages', ThreadMessageViewSet, basename='messages')
 
 urlpatterns = [
+    path('projects/<int:pk>/stream/', project_stream, name='project-stream'),
     path('', include(router.urls)),
 ]
@@ -1,37 +1,136 @@
-from django.db.models import Q
-from rest_framework import viewsets, permissions, status
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from . import presence, sync
+from .membership import belongs, forget, member_exists, member_project_ids
 from .models import Project, Task, TaskComment, ProjectRequest, ProjectThread, ThreadMessage
+from .pagination import ProjectItemPagination, ThreadMessagePagination
 from .serializers import (
-    ProjectSerializer, TaskSerializer, TaskCommentSerializer,
+    ProjectSerializer, ProjectSummarySerializer, TaskSerializer, TaskCommentSerializer,
     ProjectRequestSerializer, ProjectThreadSerializer, ThreadMessageSerializer
 )
-from users.permissions import GlobalPermission
+from core.conditional import conditional_response
+from core.fieldsets import SparseQuerysetMixin
+from users.permissions import GlobalPermission, has_flag
 from .permissions import IsProjectMember
 from rest_framework.permissions import IsAuthenticated
 
-class ProjectViewSet(viewsets.ModelViewSet):
+def _count(model, fk='project', **filters):
+    """COUNT(*) of `model` rows pointing at the outer row, as a correlated subquery (no join fan-out)."""
+    rows = model.objects.filter(**{fk: OuterRef('pk')}, **filters).order_by().values(fk)
+    return Coalesce(Subquery(rows.annotate(n=Count('*')).values('n')), 0)
+
+
+def with_thread_stats(queryset):
+    """Annotate message_count and last_message_id onto a ProjectThread queryset."""
+    return queryset.annotate(
+        message_count=_count(ThreadMessage, fk='thread'),
+        last_message_id=Subquery(ThreadMessage.objects.filter(thread=OuterRef('pk')).order_by('-id').values('id')[:1]),
+    )
+
+
+class ProjectViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
+    """
+    list returns ProjectSummarySerializer cards; everything else the full
+    project. A project's tasks, threads, thread messages and join requests
+    are paginated, members-only sub-resources:
+
+        /projects/<id>/tasks/  /threads/  /threads/<thread id>/messages/  /join_requests/
+    """
     serializer_class = ProjectSerializer
     permission_classes = [GlobalPermission]
 
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ProjectSummarySerializer
+        return ProjectSerializer
+
     def get_queryset(self):
         user = self.request.user
         
         # 1. Base Query: Everything for Superusers
         if user.is_authenticated and user.is_superuser:
-            return Project.objects.all().order_by('-created_at')
+            qs = Project.objects.all()
             
         # 2. Logic for Authenticated Members/Leads
-        if user.is_authenticated:
-            return Project.objects.filter(
-                Q(is_public=True) | 
-                Q(lead=user) | 
-                Q(members=user)
-            ).distinct().order_by('-created_at')
+        elif user.is_authenticated:
+            # EXISTS instead of a members join: no duplicate rows, no DISTINCT
+            qs = Project.objects.filter(Q(is_public=True) | belongs(user))
             
         # 3. Logic for Public/Anonymous Users
-        return Project.objects.filter(is_public=True).order_by('-created_at')
+        else:
+            qs = Project.objects.filter(is_public=True)
+        if self.action in ('list', 'retrieve'):
+            qs = self.annotate_summary(qs, user)
+        return qs.order_by('-created_at')
+
+    @staticmethod
+    def annotate_summary(qs, user):
+        qs = qs.annotate(
+            member_count=_count(Project.members.through),
+            task_count=_count(Task),
+            done_task_count=_count(Task, status='DONE'),
+            thread_count=_count(ProjectThread),
+            pending_request_count=_count(ProjectRequest, status='PENDING'),
+        )
+        if not user.is_authenticated:
+            return qs
+        return qs.annotate(
+            is_member=member_exists(user),
+            my_request_status=Subquery(
+                ProjectRequest.objects.filter(project=OuterRef('pk'), user=user.id).values('status')[:1]
+            ),
+        )
+
+    # --- Sub-resources ---
+
+    def _member_project(self, request, pk):
+        project = get_object_or_404(Project.objects.only('id', 'lead'), pk=pk)
+        if not (request.user.is_superuser or project.id in member_project_ids(request)):
+            raise PermissionDenied("Must be a project member.")
+        return project
+
+    def _page(self, request, queryset, serializer_class, paginator_class=ProjectItemPagination):
+        context = self.get_serializer_context()
+        queryset = serializer_class(context=context).optimize(queryset)
+        paginator = paginator_class()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(serializer_class(page, many=True, context=context).data)
+
+    @action(detail=True, methods=['get'])
+    def tasks(self, request, pk=None):
+        """?status=TODO|IN_PROGRESS|REVIEW|DONE"""
+        project = self._member_project(request, pk)
+        qs = project.tasks.order_by('id')
+        if request.query_params.get('status'):
+            qs = qs.filter(status=request.query_params['status'])
+        return self._page(request, qs, TaskSerializer)
+
+    @action(detail=True, methods=['get'])
+    def threads(self, request, pk=None):
+        project = self._member_project(request, pk)
+        return self._page(request, with_thread_stats(project.threads.order_by('id')), ProjectThreadSerializer)
+
+    @action(detail=True, methods=['get'], url_path=r'threads/(?P<thread_id>\d+)/messages')
+    def thread_messages(self, request, pk=None, thread_id=None):
+        """Newest first; follow `next` for older messages."""
+        project = self._member_project(request, pk)
+        thread = get_object_or_404(project.threads.only('id'), pk=thread_id)
+        return self._page(request, thread.messages.all(), ThreadMessageSerializer, ThreadMessagePagination)
+
+    @action(detail=True, methods=['get'])
+    def join_requests(self, request, pk=None):
+        """?status=PENDING|APPROVED|REJECTED"""
+        project = self._member_project(request, pk)
+        qs = project.join_requests.order_by('-created_at', '-id')
+        if request.query_params.get('status'):
+            qs = qs.filter(status=request.query_params['status'])
+        return self._page(request, qs, ProjectRequestSerializer)
 
     def perform_create(self, serializer):
         # Save project first
@@ -45,6 +144,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         # Auto-add creator to members so they can access it immediately
         if self.request.user:
             project.members.add(self.request.user)
+            forget(self.request)
 
     @action(detail=True, methods=['post'])
     def request_status(self, request, pk=None):
@@ -71,7 +171,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
         user = request.user
         message = request.data.get('message', '')
         
-        if project.members.filter(id=user.id).exists():
+        if project.id in member_project_ids(request):
             return Response({'error': 'Already a member'}, status=status.HTTP_400_BAD_REQUEST)
             
         obj, created = ProjectRequest.objects.get_or_create(
@@ -83,37 +183,66 @@ class ProjectViewSet(viewsets.ModelViewSet):
             
         return Response({'status': 'Join request sent'})
 
+    def _sync_payload(self, request, pk):
+        """(version, payload) of the cached sync state, for members only; no query when warm."""
+        if not str(pk).isdigit():
+            raise Http404
+        current, payload = sync.state(int(pk))
+        if payload is None:
+            raise Http404
+        user = request.user
+        if not (user.is_superuser or user.id in payload['members']):
+            raise PermissionDenied("Must be a project member.")
+        return current, payload
+
+    # Membership is checked in _sync_payload: any member may beat, not just project managers
+    @action(detail=True, methods=['get', 'post'], permission_classes=[IsAuthenticated])
+    def presence(self, request, pk=None):
+        """
+        Who is in the workspace (members only; projects.presence):
+
+            {"members": {user id: {"state": "online" | "idle", "thread": id}},
+             "threads": {thread id: {"viewing": [user ids], "typing": [{"id", "username"}]}}}
+
+        Members not listed are offline. POST {"thread": id, "typing": false,
+        "idle_for": seconds} is the caller's heartbeat and gets the same answer.
+        Neither touches the database.
+        """
+        _, payload = self._sync_payload(request, pk)
+        if request.method == 'POST':
+            thread = request.data.get('thread')
+            thread = int(thread) if str(thread).isdigit() and int(thread) in payload['threads_state'] else None
+            try:
+                idle_for = float(request.data.get('idle_for') or 0)
+            except (TypeError, ValueError):
+                idle_for = 0
+            presence.beat(int(pk), request.user, thread=thread, typing=bool(request.data.get('typing')), idle_for=idle_for)
+        return Response(presence.snapshot(int(pk), payload['members']))
+
     @action(detail=True, methods=['get'])
     def sync_state(self, request, pk=None):
         """
-        Lightweight endpoint for polling.
-        Returns:
-        - members_status: { id: last_login } for all members + lead
-        - threads_hash: { thread_id: last_message_id } to detect new messages
+        Polled by open dashboards (members only):
+
+            {"version": 42, "members_status": {id: last_login}, "threads_state": {thread id: last message id}}
+
+        With ?since=<version> or If-None-Match: "<version>" an unchanged
+        project answers {"version": 42, "unchanged": true} or 304, straight
+        from the cache (projects.sync). Who is online right now is presence/.
         """
-        try:
-            project = self.get_object()
-            
-            # 1. Members Status
-            members = list(project.members.all())
-            if project.lead: members.append(project.lead)
-            members_status = {m.id: m.last_login for m in members}
-            
-            # 2. Threads State
-            threads_state = {}
-            for t in project.threads.all():
-                last_msg = t.messages.last()
-                threads_state[t.id] = last_msg.id if last_msg else 0
-                
+        current, payload = self._sync_payload(request, pk)
+
+        def body():
+            if request.query_params.get('since') == str(current):
+                return Response({'version': current, 'unchanged': True})
             return Response({
-                "members_status": members_status,
-                "threads_state": threads_state
+                'version': current,
+                'members_status': payload['members_status'],
+                'threads_state': payload['threads_state'],
             })
-        except Exception as e:
-            print(f"Sync State Error: {e}")
-            return Response({'error': str(e)}, status=500)
+        return conditional_response(request, f'"{current}"', body)
 
-class TaskViewSet(viewsets.ModelViewSet):
+class TaskViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
     permission_classes = [GlobalPermission]
@@ -132,7 +261,22 @@ class TaskViewSet(viewsets.ModelViewSet):
         TaskComment.objects.create(task=task, author=request.user, content=content)
         return Response({'status': 'Comment added'})
 
-class ProjectRequestViewSet(viewsets.ModelViewSet):
+def _can_decide(user, project):
+    """
+    Who may approve or reject a join request: superusers, the project lead,
+    can_manage_projects holders, and users assigned the WEB_LEAD role by name
+    (not every holder of the wider can_manage_everything flag).
+    """
+    return (
+        user.is_superuser
+        or project.lead_id == user.id
+        or has_flag(user, 'can_manage_projects')
+        # user_roles is prefetched by the cached auth loader
+        or any(role.name == 'WEB_LEAD' for role in user.user_roles.all())
+    )
+
+
+class ProjectRequestViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = ProjectRequest.objects.all()
     serializer_class = ProjectRequestSerializer
     permission_classes = [GlobalPermission]
@@ -141,12 +285,7 @@ class ProjectRequestViewSet(viewsets.ModelViewSet):
     def approve(self, request, pk=None):
         join_req = self.get_object()
         # Verify if requester is lead or admin
-        user = request.user
-        is_lead = join_req.project.lead == user
-        has_perm = user.user_roles.filter(can_manage_projects=True).exists()
-        is_web_lead = user.user_roles.filter(name='WEB_LEAD').exists()
-        
-        if not (user.is_superuser or is_lead or has_perm or is_web_lead):
+        if not _can_decide(request.user, join_req.project):
              return Response({"error": "Unauthorized"}, status=403)
              
         join_req.status = 'APPROVED'
@@ -157,14 +296,13 @@ class ProjectRequestViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def reject(self, request, pk=None):
         join_req = self.get_object()
-        user = request.user
-        if not (user.is_superuser or join_req.project.lead == user or user.user_roles.filter(can_manage_projects=True).exists() or user.user_roles.filter(name='WEB_LEAD').exists()):
+        if not _can_decide(request.user, join_req.project):
              return Response({"error": "Unauthorized"}, status=403)
         join_req.status = 'REJECTED'
         join_req.save()
         return Response({"status": "rejected"})
 
-class ProjectThreadViewSet(viewsets.ModelViewSet):
+class ProjectThreadViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = ProjectThread.objects.all()
     serializer_class = ProjectThreadSerializer
     permission_classes = [IsAuthenticated, IsProjectMember]
@@ -172,13 +310,15 @@ class ProjectThreadViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
-            return ProjectThread.objects.all()
-        return ProjectThread.objects.filter(Q(project__lead=user) | Q(project__members=user)).distinct()
+            qs = ProjectThread.objects.all()
+        else:
+            qs = ProjectThread.objects.filter(belongs(user, 'project'))
+        return with_thread_stats(qs)
 
     def perform_create(self, serializer):
         project = serializer.validated_data.get('project')
-        if project and not (self.request.user == project.lead or self.request.user in project.members.all()):
-            raise permissions.PermissionDenied("Must be a project member.")
+        if project and project.id not in member_project_ids(self.request):
+            raise PermissionDenied("Must be a project member.")
         serializer.save(created_by=self.request.user)
 
     @action(detail=True, methods=['post'])
@@ -199,42 +339,21 @@ class ProjectThreadViewSet(viewsets.ModelViewSet):
         count = thread.messages.all().delete()[0]
         return Response({'status': 'purged', 'count': count})
 
+    # Typing now lives in projects.presence; POST/GET /projects/<id>/presence/ covers both of these
     @action(detail=True, methods=['post'])
     def signal_typing(self, request, pk=None):
-        try:
-            from django.core.cache import cache
-            thread = self.get_object()
-            user_id = request.user.id
-            key = f"typing:{thread.id}:{user_id}"
-            cache.set(key, request.user.username, timeout=4)
-            return Response({'status': 'ok'})
-        except Exception as e:
-            print(f"Typing Signal Error: {e}")
-            return Response({'error': str(e)}, status=500)
+        thread = self.get_object()
+        presence.beat(thread.project_id, request.user, thread=thread.id, typing=True)
+        return Response({'status': 'ok'})
 
     @action(detail=True, methods=['get'])
     def get_typing_status(self, request, pk=None):
-        try:
-            from django.core.cache import cache
-            thread = self.get_object()
-            
-            active_typers = []
-            members = list(thread.project.members.all())
-            if thread.project.lead: members.append(thread.project.lead)
-            
-            for m in members:
-                if m.id == request.user.id: continue
-                key = f"typing:{thread.id}:{m.id}"
-                username = cache.get(key)
-                if username:
-                    active_typers.append({'id': m.id, 'username': username})
-                    
-            return Response({'typers': active_typers})
-        except Exception as e:
-            print(f"Typing Status Error: {e}")
-            return Response({'error': str(e)}, status=500)
-
-class ThreadMessageViewSet(viewsets.ModelViewSet):
+        thread = self.get_object()
+        state = presence.project_snapshot(thread.project_id) or {'threads': {}}
+        typing = state['threads'].get(thread.id, {}).get('typing', [])
+        return Response({'typers': [t for t in typing if t['id'] != request.user.id]})
+
+class ThreadMessageViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = ThreadMessage.objects.all()
     serializer_class = ThreadMessageSerializer
     permission_classes = [IsAuthenticated, IsProjectMember]
@@ -243,12 +362,12 @@ class ThreadMessageViewSet(viewsets.ModelViewSet):
         user = self.request.user
         if user.is_superuser:
             return ThreadMessage.objects.all()
-        return ThreadMessage.objects.filter(Q(thread__project__lead=user) | Q(thread__project__members=user)).distinct()
+        return ThreadMessage.objects.filter(belongs(user, 'thread__project')).select_related('thread')
 
     def perform_create(self, serializer):
         thread = serializer.validated_data.get('thread')
-        if thread and not (self.request.user == thread.project.lead or self.request.user in thread.project.members.all()):
-            raise permissions.PermissionDenied("Must be a project member.")
+        if thread and thread.project_id not in member_project_ids(self.request):
+            raise PermissionDenied("Must be a project member.")
         message = serializer.save(author=self.request.user)
         
         # EPHEMERAL CLEANUP: If thread is ephemeral, delete messages older than 1 hour
@@ -256,6 +375,6 @@ class ThreadMessageViewSet(viewsets.ModelViewSet):
             from django.utils import timezone
             from datetime import timedelta
             expiry = timezone.now() - timedelta(hours=1)
-            ThreadMessage.objects.filter(thread=message.thread, created_at__lt=expiry).delete()
+            message.thread.messages.filter(created_at__lt=expiry).delete()
             # Also log for audit
             print(f"Cleanup performed for ephemeral thread: {message.thread.title}")
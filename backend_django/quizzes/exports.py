@@ -0,0 +1,25 @@
+from core.exports import Export, Column, fmt_datetime
+
+
+class QuizAttemptsExport(Export):
+    permission = 'can_manage_forms'
+    columns = (
+        Column('id', 'Attempt ID'),
+        Column('name', 'Name', lambda r: r['user__profile__full_name'] or r['candidate_name'] or r['user__username'] or ''),
+        Column('email', 'Email', lambda r: r['user__email'] or r['candidate_email'] or ''),
+        Column('username', 'Username', lambda r: r['user__username'] or ''),
+        Column('status', 'Status'),
+        Column('score', 'Score'),
+        Column('start_time', 'Started At', lambda r: fmt_datetime(r['start_time'])),
+        Column('submitted_at', 'Submitted At', lambda r: fmt_datetime(r['submitted_at'])),
+    )
+
+    def __init__(self, quiz):
+        self.quiz = quiz
+        self.filename = f"{quiz.title.replace(' ', '_')}_attempts"
+
+    def get_queryset(self):
+        return self.quiz.attempts.order_by('-score', 'submitted_at').values(
+            'id', 'user__profile__full_name', 'user__username', 'user__email',
+            'candidate_name', 'candidate_email', 'status', 'score', 'start_time', 'submitted_at'
+        )
@@ -1,31 +1,33 @@
 from rest_framework import serializers
+from core.fieldsets import SparseModelSerializer
 from .models import Quiz, Question, Option, QuizAttempt
-from users.serializers import UserSerializer
+from users.serializers import UserSummarySerializer, UserContactSerializer
 
-class OptionSerializer(serializers.ModelSerializer):
+class OptionSerializer(SparseModelSerializer):
     class Meta:
         model = Option
         fields = ['id', 'question', 'text', 'is_correct', 'order']
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(SparseModelSerializer):
     options = OptionSerializer(many=True, read_only=True)
     
     class Meta:
         model = Question
         fields = ['id', 'quiz', 'text', 'question_type', 'marks', 'negative_marks', 'order', 'options']
 
-class QuizSerializer(serializers.ModelSerializer):
+class QuizSerializer(SparseModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
-    creator_details = UserSerializer(source='creator', read_only=True)
+    creator_details = UserSummarySerializer(source='creator', read_only=True)
     question_count = serializers.IntegerField(source='questions.count', read_only=True)
     
     class Meta:
         model = Quiz
         fields = '__all__'
         read_only_fields = ['creator', 'created_at']
+        expandable = ('question_count',)
 
-class QuizAttemptSerializer(serializers.ModelSerializer):
-    user_details = UserSerializer(source='user', read_only=True)
+class QuizAttemptSerializer(SparseModelSerializer):
+    user_details = UserContactSerializer(source='user', read_only=True)
     time_left = serializers.IntegerField(source='time_left_seconds', read_only=True)
     
     class Meta:
@@ -34,23 +36,24 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'score', 'submitted_at', 'candidate_name', 'candidate_email']
 
 # Public/Safe Serializers (No Answers)
-class PublicOptionSerializer(serializers.ModelSerializer):
+class PublicOptionSerializer(SparseModelSerializer):
     class Meta:
         model = Option
         fields = ['id', 'question', 'text', 'order'] # Exclude is_correct
 
-class PublicQuestionSerializer(serializers.ModelSerializer):
+class PublicQuestionSerializer(SparseModelSerializer):
     options = PublicOptionSerializer(many=True, read_only=True)
     class Meta:
         model = Question
         fields = ['id', 'quiz', 'text', 'question_type', 'marks', 'negative_marks', 'order', 'options']
 
-class PublicQuizSerializer(serializers.ModelSerializer):
+class PublicQuizSerializer(SparseModelSerializer):
     questions = PublicQuestionSerializer(many=True, read_only=True)
-    creator_details = UserSerializer(source='creator', read_only=True)
+    creator_details = UserSummarySerializer(source='creator', read_only=True)
     question_count = serializers.IntegerField(source='questions.count', read_only=True)
     
     class Meta:
         model = Quiz
         fields = '__all__'
         read_only_fields = ['creator', 'created_at']
+        expandable = ('question_count',)
@@ -5,9 +5,12 @@ from django.utils import timezone
 from datetime import timedelta
 from .models import Quiz, Question, Option, QuizAttempt
 from .serializers import QuizSerializer, QuestionSerializer, OptionSerializer, QuizAttemptSerializer, PublicQuizSerializer
-from users.permissions import GlobalPermission
+from users.permissions import GlobalPermission, has_flag
+from .exports import QuizAttemptsExport
+from core.fieldsets import SparseQuerysetMixin
+from core.reorder import ReorderMixin
 
-class QuizViewSet(viewsets.ModelViewSet):
+class QuizViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Quiz.objects.all().order_by('-created_at')
     serializer_class = QuizSerializer
     permission_classes = [GlobalPermission]
@@ -22,11 +25,7 @@ class QuizViewSet(viewsets.ModelViewSet):
         # But simpler: If action is list/retrieve for PUBLIC access, use Safe Serializer.
         # If user has role with 'can_manage_forms', use Full.
         
-        has_manage_perm = False
-        if self.request.user.is_authenticated:
-            if self.request.user.user_roles.filter(can_manage_forms=True).exists(): has_manage_perm = True
-        
-        if not has_manage_perm:
+        if not has_flag(self.request.user, 'can_manage_forms'):
             return PublicQuizSerializer
             
         return QuizSerializer
@@ -164,17 +163,24 @@ class QuizViewSet(viewsets.ModelViewSet):
             
         return Response({"status": "saved", "time_left": attempt.time_left_seconds})
 
-class QuestionViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def export_attempts(self, request, pk=None):
+        """Streams all attempts as CSV, or NDJSON with ?fmt=ndjson. Form managers only."""
+        return QuizAttemptsExport(self.get_object()).response(request)
+
+class QuestionViewSet(ReorderMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
     permission_classes = [GlobalPermission]
+    reorder_scope = 'quiz'
 
-class OptionViewSet(viewsets.ModelViewSet):
+class OptionViewSet(ReorderMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Option.objects.all()
     serializer_class = OptionSerializer
     permission_classes = [GlobalPermission]
+    reorder_scope = 'question'
 
-class QuizAttemptViewSet(viewsets.ReadOnlyModelViewSet):
+class QuizAttemptViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = QuizAttempt.objects.all()
     serializer_class = QuizAttemptSerializer
     permission_classes = [GlobalPermission]
@@ -184,7 +190,7 @@ class QuizAttemptViewSet(viewsets.ReadOnlyModelViewSet):
         if not user.is_authenticated:
             return QuizAttempt.objects.none()
             
-        if user.is_superuser or user.user_roles.filter(can_manage_forms=True).exists():
+        if user.is_superuser or has_flag(user, 'can_manage_forms'):
             return QuizAttempt.objects.all()
             
         return QuizAttempt.objects.filter(user=user)
@@ -1,16 +1,18 @@
 from rest_framework import serializers
+from core.fieldsets import SparseModelSerializer
 from .models import RecruitmentDrive, TimelineEvent, RecruitmentAssignment, RecruitmentApplication
 
-class TimelineEventSerializer(serializers.ModelSerializer):
+class TimelineEventSerializer(SparseModelSerializer):
     class Meta:
         model = TimelineEvent
         fields = '__all__'
 
-class RecruitmentAssignmentSerializer(serializers.ModelSerializer):
+class RecruitmentAssignmentSerializer(SparseModelSerializer):
     sig_name = serializers.SerializerMethodField()
     class Meta:
         model = RecruitmentAssignment
         fields = '__all__'
+        related_lookups = {'sig_name': ('sig',)}
 
     def get_sig_name(self, obj):
         try:
@@ -18,22 +20,23 @@ class RecruitmentAssignmentSerializer(serializers.ModelSerializer):
         except:
             return "N/A"
 
-class RecruitmentApplicationSerializer(serializers.ModelSerializer):
+class RecruitmentApplicationSerializer(SparseModelSerializer):
     sig_name = serializers.SerializerMethodField()
     
     class Meta:
         model = RecruitmentApplication
         fields = '__all__'
+        related_lookups = {'sig_name': ('user__profile',)}
 
     def get_sig_name(self, obj):
         try:
             if obj.user and hasattr(obj.user, 'profile') and obj.user.profile.sig:
-                return obj.user.profile.sig.name
+                return obj.user.profile.sig
         except:
             pass
         return "N/A"
 
-class RecruitmentDriveSerializer(serializers.ModelSerializer):
+class RecruitmentDriveSerializer(SparseModelSerializer):
     timeline = TimelineEventSerializer(many=True, read_only=True)
     assignments = RecruitmentAssignmentSerializer(many=True, read_only=True)
     applications_count = serializers.IntegerField(source='applications.count', read_only=True)
@@ -41,3 +44,4 @@ class RecruitmentDriveSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecruitmentDrive
         fields = '__all__'
+        expandable = ('applications_count',)
@@ -4,8 +4,10 @@ from rest_framework.response import Response
 from .models import RecruitmentDrive, TimelineEvent, RecruitmentAssignment, RecruitmentApplication
 from .serializers import RecruitmentDriveSerializer, TimelineEventSerializer, RecruitmentAssignmentSerializer, RecruitmentApplicationSerializer
 from django.db import transaction
+from core.fieldsets import SparseQuerysetMixin
+from core.reorder import ReorderMixin
 
-class RecruitmentDriveViewSet(viewsets.ModelViewSet):
+class RecruitmentDriveViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = RecruitmentDrive.objects.all().order_by('-created_at')
     serializer_class = RecruitmentDriveSerializer
     # permission_classes = [GlobalPermission] -> Moved to get_permissions
@@ -57,16 +59,17 @@ class RecruitmentDriveViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({"error": str(e)}, status=500)
 
-class TimelineEventViewSet(viewsets.ModelViewSet):
+class TimelineEventViewSet(ReorderMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = TimelineEvent.objects.all()
     serializer_class = TimelineEventSerializer
+    reorder_scope = 'drive'
     # permission_classes = [GlobalPermission] -> Moved to get_permissions
     
     def get_permissions(self):
         from users.permissions import GlobalPermission
         return [GlobalPermission()]
 
-class RecruitmentApplicationViewSet(viewsets.ModelViewSet):
+class RecruitmentApplicationViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = RecruitmentApplication.objects.all()
     serializer_class = RecruitmentApplicationSerializer
     
@@ -91,7 +94,7 @@ class RecruitmentApplicationViewSet(viewsets.ModelViewSet):
              serializer.save(original_date=instance.date)
         else:
              serializer.save()
-class RecruitmentAssignmentViewSet(viewsets.ModelViewSet):
+class RecruitmentAssignmentViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = RecruitmentAssignment.objects.all()
     serializer_class = RecruitmentAssignmentSerializer
     
@@ -0,0 +1,158 @@
+"""
+Buffered audit-log pipeline.
+
+Request threads only build an (unsaved) AuditLog and put it on an in-process
+queue; a background thread drains the queue and writes with bulk_create when
+either BATCH_SIZE entries are waiting or FLUSH_INTERVAL seconds have passed.
+The queue is bounded: once MAX_QUEUE entries are pending the OVERFLOW policy
+applies ('sync' writes the entry inline, 'drop' discards and counts it).
+Anything still buffered is flushed when the worker exits.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ASYNC': True,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 2.0,
+    'MAX_QUEUE': 5000,
+    'OVERFLOW': 'sync',
+}
+
+
+def _conf(name):
+    return getattr(settings, 'AUDIT_LOG', {}).get(name, DEFAULTS[name])
+
+
+class AuditWriter:
+    def __init__(self):
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+        self.counters = {'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'inline': 0}
+
+    def _count(self, name, n=1):
+        # Request threads and the writer thread all update these
+        with self._counters_lock:
+            self.counters[name] += n
+
+    # --- Producer side ---
+
+    def submit(self, entry):
+        if not _conf('ASYNC'):
+            self._write([entry])
+            return
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(entry)
+            self._count('queued')
+        except queue.Full:
+            if _conf('OVERFLOW') == 'drop':
+                self._count('dropped')
+                logger.warning("Audit queue full, dropped %s entry", entry.event_type)
+            else:
+                self._count('inline')
+                self._write([entry])
+
+    def _ensure_started(self):
+        # Lazily (re)start per process: a thread started before a gunicorn fork does not survive it
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue(maxsize=_conf('MAX_QUEUE'))
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    # --- Consumer side ---
+
+    def _run(self):
+        batch_size = _conf('BATCH_SIZE')
+        interval = _conf('FLUSH_INTERVAL')
+        batch = []
+        deadline = time.monotonic() + interval
+
+        while not self._stop.is_set():
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            if len(batch) >= batch_size or (batch and time.monotonic() >= deadline):
+                self._write_from_thread(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + interval
+
+        if batch:
+            self._write_from_thread(batch)
+
+    def _write_from_thread(self, batch):
+        # The writer thread owns its connection and, unlike a request, has no
+        # handler to recycle it: drop it when broken or past CONN_MAX_AGE.
+        # Never called on a request thread, where it would close the request's
+        # connection (and break any atomic block in progress).
+        close_old_connections()
+        self._write(batch)
+
+    def _write(self, batch):
+        from .models import AuditLog
+
+        with self._write_lock:
+            try:
+                AuditLog.objects.bulk_create(batch)
+                self._count('written', len(batch))
+            except Exception:
+                self._count('failed', len(batch))
+                logger.exception("Failed to write %d audit log entries", len(batch))
+
+    def flush(self):
+        """Stop the background thread and synchronously write everything still queued."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout=10)
+
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if pending:
+            self._write(pending)
+
+
+writer = AuditWriter()
+atexit.register(writer.flush)
+
+
+def record(event_type, target, actor=None, ip_address=None, details='', success=True):
+    from .models import AuditLog
+
+    writer.submit(AuditLog(
+        event_type=event_type,
+        actor=actor,
+        target=target,
+        ip_address=ip_address,
+        details=str(details),
+        success=success,
+    ))
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.caching import Namespace
+
+User = get_user_model()
+
+# Short on purpose: signals invalidate eagerly, the TTL only bounds anything they miss
+USER_CACHE_TTL = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+# Bundles keyed by user id and that user's version
+bundles = Namespace('authuser', ttl=USER_CACHE_TTL)
+
+
+def invalidate_cached_user(user_id):
+    if user_id:
+        bundles.bump(user_id)
+
+
+def load_user_bundle(user_id):
+    """User + profile + roles + SIGs in one query bundle (1 join + 2 prefetches)."""
+    return (
+        User.objects.select_related('profile')
+        .prefetch_related('user_roles', 'profile__sigs')
+        .filter(**{api_settings.USER_ID_FIELD: user_id})
+        .first()
+    )
+
+
+def get_cached_user(user_id):
+    key = bundles.key(user_id, bundles.version(user_id))
+    return bundles.get_or_set(key, lambda: load_user_bundle(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves the authenticated user (with profile, roles
+    and SIGs preloaded) from the shared cache instead of a SELECT per request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
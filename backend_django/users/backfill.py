@@ -0,0 +1,84 @@
+"""
+Backfill MemberProfile.primary_sig / team_position from the legacy free-text
+columns (legacy_sig / legacy_position).
+
+Names are matched case-insensitively against Sig.name / TeamPosition.name.
+Only profiles whose FK is still empty are touched, so running it again is a
+no-op; a matched legacy SIG is also added to the profile's `sigs`.
+
+The functions take the model classes as arguments. Migration 0017 keeps its
+own frozen copy (with create_missing) rather than importing this module.
+"""
+from django.db import transaction
+
+
+def _legacy_names(queryset, column):
+    """{lowercased name: spelling as first seen} over the non-empty values of `column`."""
+    names = {}
+    for value in queryset.exclude(**{column: ''}).values_list(column, flat=True).distinct():
+        names.setdefault(value.strip().lower(), value.strip())
+    names.pop('', None)
+    return names
+
+
+def _resolve(target, names, create_missing):
+    """Map lowercased names to ids of `target` rows, optionally creating unknown ones."""
+    existing = {name.lower(): pk for pk, name in target.objects.values_list('pk', 'name')}
+    missing = [spelling for key, spelling in names.items() if key not in existing]
+    if create_missing and missing:
+        target.objects.bulk_create([target(name=name) for name in missing], ignore_conflicts=True)
+        existing.update({name.lower(): pk for pk, name in target.objects.filter(name__in=missing).values_list('pk', 'name')})
+    return existing, sorted(name for key, name in names.items() if key not in existing)
+
+
+def _pending(profiles, column, fk, key):
+    return profiles.filter(**{f'{fk}__isnull': True, f'{column}__iexact': key})
+
+
+def _link(profiles, column, fk, ids, names):
+    """One UPDATE per distinct legacy name."""
+    return sum(_pending(profiles, column, fk, key).update(**{fk: ids[key]}) for key in names if key in ids)
+
+
+def _count(profiles, column, fk, ids, names):
+    return sum(_pending(profiles, column, fk, key).count() for key in names if key in ids)
+
+
+def backfill_profile_relations(MemberProfile, Sig, TeamPosition, create_missing=False, dry_run=False):
+    """
+    Returns {'positions': n, 'sigs': n, 'unmatched_positions': [...], 'unmatched_sigs': [...]}
+    where n counts profiles linked (or, with dry_run, that would be).
+    """
+    profiles = MemberProfile.objects.all()
+    position_names = _legacy_names(profiles.filter(team_position__isnull=True), 'legacy_position')
+    sig_names = _legacy_names(profiles.filter(primary_sig__isnull=True), 'legacy_sig')
+
+    if dry_run:
+        position_ids, unmatched_positions = _resolve(TeamPosition, position_names, False)
+        sig_ids, unmatched_sigs = _resolve(Sig, sig_names, False)
+        return {
+            'positions': _count(profiles, 'legacy_position', 'team_position', position_ids, position_names),
+            'sigs': _count(profiles, 'legacy_sig', 'primary_sig', sig_ids, sig_names),
+            'unmatched_positions': unmatched_positions,
+            'unmatched_sigs': unmatched_sigs,
+        }
+
+    with transaction.atomic():
+        position_ids, unmatched_positions = _resolve(TeamPosition, position_names, create_missing)
+        sig_ids, unmatched_sigs = _resolve(Sig, sig_names, create_missing)
+        positions = _link(profiles, 'legacy_position', 'team_position', position_ids, position_names)
+        sigs = _link(profiles, 'legacy_sig', 'primary_sig', sig_ids, sig_names)
+
+        # The primary SIG is also a membership; the through table's unique pair skips existing links
+        SigLink = MemberProfile.sigs.through
+        SigLink.objects.bulk_create([
+            SigLink(memberprofile_id=profile_id, sig_id=sig_id)
+            for profile_id, sig_id in profiles.filter(primary_sig__isnull=False).values_list('id', 'primary_sig_id')
+        ], batch_size=500, ignore_conflicts=True)
+
+    return {
+        'positions': positions,
+        'sigs': sigs,
+        'unmatched_positions': unmatched_positions,
+        'unmatched_sigs': unmatched_sigs,
+    }
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+
+from core.exports import Export, Column, fmt_datetime
+
+User = get_user_model()
+
+
+class AuditLogExport(Export):
+    filename = 'audit_logs'
+    columns = (
+        Column('event_type', 'Event Type'),
+        Column('actor', 'Actor', lambda r: r['actor__username'] or 'System/Proton'),
+        Column('target', 'Target'),
+        Column('ip_address', 'IP Address'),
+        Column('details', 'Details'),
+        Column('created_at', 'Created At', lambda r: fmt_datetime(r['created_at'])),
+    )
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def get_queryset(self):
+        return self.queryset.values('event_type', 'actor__username', 'target', 'ip_address', 'details', 'created_at')
+
+
+class UserExport(Export):
+    filename = 'users'
+    columns = (
+        Column('username', 'Username'),
+        Column('email', 'Email'),
+        Column('full_name', 'Full Name', lambda r: r['profile__full_name'] or ''),
+        Column('role', 'Role'),
+        Column('position', 'Team Position', lambda r: r['profile__team_position__name'] or ''),
+        Column('sig', 'SIG', lambda r: r['profile__primary_sig__name'] or ''),
+        Column('status', 'Status', lambda r: 'Active' if r['is_active'] else 'Inactive'),
+    )
+
+    def get_queryset(self):
+        return User.objects.order_by('id').values(
+            'username', 'email', 'profile__full_name', 'role', 'profile__team_position__name',
+            'profile__primary_sig__name', 'is_active'
+        )
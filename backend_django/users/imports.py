@@ -0,0 +1,223 @@
+"""
+Bulk member import.
+
+Rows come from CSV (header row) or JSON (a list of objects) with the columns
+
+    username (required), email, password, full_name, roll_number, department,
+    year, year_of_joining, branch, team_name, description, position,
+    sigs, roles, is_alumni, is_public, is_active
+
+`sigs` and `roles` hold names separated by ';' (or JSON lists); `position`
+is a TeamPosition name. SIGs, roles and positions are resolved against the
+reference-data snapshot, so validation costs no per-row queries.
+
+Every row is validated first and problems are collected into a per-row error
+report; only valid rows are written. Passwords are hashed in a process pool
+started with forkserver (spawn where that is unavailable): forking a
+multi-threaded web worker itself is unsafe. Users, profiles, SIG and role
+links are then inserted with bulk_create in batches inside one transaction.
+
+Use it from `manage.py import_members` or POST /api/management/bulk_import/.
+"""
+import csv
+import io
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import MemberProfile
+from . import refdata, search, team_snapshot
+
+User = get_user_model()
+
+PROFILE_FIELDS = ('full_name', 'roll_number', 'department', 'year', 'branch', 'team_name', 'description')
+# Columns only callers with can_manage_security may set (same guard as UserViewSet._update_profile)
+SENSITIVE_FIELDS = ('position', 'sigs', 'roles')
+TRUE_VALUES = ('true', '1', 'yes', 'y')
+# Below this many passwords a process pool costs more than it saves
+POOL_THRESHOLD = 16
+# Pool workers start from a clean server process, never from a fork of the caller
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def read_rows(data, fmt=None, filename=''):
+    """Parse CSV text/bytes or JSON into a list of dicts."""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    fmt = fmt or ('json' if filename.endswith('.json') or data.lstrip().startswith('[') else 'csv')
+    if fmt == 'json':
+        try:
+            rows = json.loads(data)
+        except ValueError as e:
+            raise ImportFormatError(f"Invalid JSON: {e}")
+        if not isinstance(rows, list):
+            raise ImportFormatError("JSON input must be a list of objects.")
+        return rows
+    return list(csv.DictReader(io.StringIO(data)))
+
+
+def _names(value):
+    if not value:
+        return []
+    if isinstance(value, (list, tuple)):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split(';') if v.strip()]
+
+
+def _flag(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _hash_all(passwords, workers=None):
+    """make_password for each entry (None -> unusable password), in a process pool for large batches."""
+    usable = [p for p in passwords if p]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(usable) < POOL_THRESHOLD:
+        return [make_password(p or None) for p in passwords]
+    context = multiprocessing.get_context(START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        hashed = iter(list(pool.map(make_password, usable, chunksize=max(1, len(usable) // (workers * 4)))))
+    return [next(hashed) if p else make_password(None) for p in passwords]
+
+
+def _validate(rows, allow_sensitive):
+    """Returns (valid, errors): valid is a list of (row number, cleaned dict)."""
+    snapshot = refdata.get_snapshot()
+    valid, errors, seen = [], [], set()
+
+    usernames = [str(r.get('username') or '').strip() for r in rows if isinstance(r, dict)]
+    taken = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'username': '', 'errors': ["Row must be an object."]})
+            continue
+        username = str(row.get('username') or '').strip()
+        problems = []
+
+        if not username:
+            problems.append("username is required")
+        elif username in taken:
+            problems.append("username already exists")
+        elif username in seen:
+            problems.append("duplicate username in import")
+        seen.add(username)
+
+        clean = {
+            'username': username,
+            'email': str(row.get('email') or '').strip(),
+            'password': row.get('password') or None,
+            'is_active': _flag(row.get('is_active'), True),
+            'is_alumni': _flag(row.get('is_alumni'), False),
+            'is_public': _flag(row.get('is_public'), True),
+            'profile': {f: str(row.get(f) or '').strip() for f in PROFILE_FIELDS},
+            'position': None, 'sigs': [], 'roles': [],
+        }
+
+        year = row.get('year_of_joining')
+        if year not in (None, ''):
+            try:
+                clean['profile']['year_of_joining'] = int(year)
+            except (TypeError, ValueError):
+                problems.append(f"year_of_joining '{year}' is not a number")
+
+        if allow_sensitive:
+            position = str(row.get('position') or '').strip()
+            if position:
+                clean['position'] = snapshot.positions_by_name.get(position.lower())
+                if clean['position'] is None:
+                    problems.append(f"unknown position '{position}'")
+            for column, lookup in (('sigs', snapshot.sigs_by_name), ('roles', snapshot.roles_by_name)):
+                for name in _names(row.get(column)):
+                    obj = lookup.get(name.lower())
+                    if obj is None:
+                        problems.append(f"unknown {column[:-1]} '{name}'")
+                    else:
+                        clean[column].append(obj)
+
+        if problems:
+            errors.append({'row': number, 'username': username, 'errors': problems})
+        else:
+            valid.append((number, clean))
+    return valid, errors
+
+
+def import_members(rows, allow_sensitive=True, dry_run=False, batch_size=500, workers=None):
+    """
+    Validate and insert `rows`. Returns a report dict: created, errors (per row),
+    ignored_columns, seconds, rows_per_second. `workers` hashing processes
+    default to the CPU count.
+    """
+    started = time.monotonic()
+    valid, errors = _validate(rows, allow_sensitive)
+    ignored = [] if allow_sensitive else [c for c in SENSITIVE_FIELDS if any(isinstance(r, dict) and r.get(c) for r in rows)]
+
+    created = 0
+    if valid and not dry_run:
+        hashes = _hash_all([clean['password'] for _, clean in valid], workers)
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=c['username'], email=c['email'], password=h, is_active=c['is_active'])
+                for (_, c), h in zip(valid, hashes)
+            ], batch_size=batch_size)
+            # Re-read the ids: not every backend returns them from bulk_create
+            user_ids = dict(User.objects.filter(username__in=[c['username'] for _, c in valid]).values_list('username', 'id'))
+
+            profiles = MemberProfile.objects.bulk_create([
+                MemberProfile(
+                    user_id=user_ids[c['username']],
+                    team_position_id=c['position'].id if c['position'] else None,
+                    order=c['position'].rank if c['position'] else 100,
+                    is_alumni=c['is_alumni'],
+                    is_public=c['is_public'],
+                    email=c['email'],
+                    **c['profile'],
+                )
+                for _, c in valid
+            ], batch_size=batch_size)
+            profile_ids = dict(MemberProfile.objects.filter(user_id__in=user_ids.values()).values_list('user_id', 'id'))
+
+            SigLink = MemberProfile.sigs.through
+            RoleLink = User.user_roles.through
+            SigLink.objects.bulk_create([
+                SigLink(memberprofile_id=profile_ids[user_ids[c['username']]], sig_id=s.id)
+                for _, c in valid for s in c['sigs']
+            ], batch_size=batch_size)
+            RoleLink.objects.bulk_create([
+                RoleLink(user_id=user_ids[c['username']], role_id=r.id)
+                for _, c in valid for r in c['roles']
+            ], batch_size=batch_size)
+            # bulk_create bypasses the signals that maintain the search index
+            search.reindex(profile_ids.values())
+            created = len(profiles)
+
+        # bulk_create sends no save signals
+        team_snapshot.invalidate()
+
+    elapsed = time.monotonic() - started
+    return {
+        'created': created,
+        'valid': len(valid),
+        'errors': errors,
+        'ignored_columns': ignored,
+        'dry_run': dry_run,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(created / elapsed, 1) if created and elapsed else 0.0,
+    }
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from users import me_cache, refdata, search, team_snapshot
+from users.backfill import backfill_profile_relations
+from users.models import MemberProfile, Sig, TeamPosition
+
+
+class Command(BaseCommand):
+    help = "Link profiles to their Sig / TeamPosition from the legacy free-text sig and position columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--create-missing', action='store_true',
+                            help="Create a Sig / TeamPosition for legacy names that match none")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would be linked, write nothing")
+
+    def handle(self, *args, **opts):
+        report = backfill_profile_relations(
+            MemberProfile, Sig, TeamPosition, create_missing=opts['create_missing'], dry_run=opts['dry_run'],
+        )
+        if not opts['dry_run']:
+            # Bulk updates send no save signals
+            refdata.invalidate()
+            team_snapshot.invalidate()
+            search.rebuild()
+            me_cache.invalidate_all()
+
+        for kind in ('positions', 'sigs'):
+            for name in report[f'unmatched_{kind}']:
+                self.stderr.write(f"  no {kind[:-1]} named '{name}'")
+        verb = "Would link" if opts['dry_run'] else "Linked"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['positions']} positions and {report['sigs']} SIGs; "
+            f"{len(report['unmatched_positions']) + len(report['unmatched_sigs'])} names unmatched"
+        ))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.imports import ImportFormatError, import_members, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk-create members (users, profiles, SIGs, roles, positions) from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV with a header row, or a JSON list of objects")
+        parser.add_argument('--format', choices=('csv', 'json'), default=None, help="Defaults to the file extension")
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, write nothing")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=None, help="Password hashing processes (default: CPU count)")
+
+    def handle(self, *args, **opts):
+        try:
+            with open(opts['path'], 'rb') as fh:
+                rows = read_rows(fh.read(), opts['format'], opts['path'])
+        except (OSError, ImportFormatError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        report = import_members(rows, dry_run=opts['dry_run'], batch_size=opts['batch_size'], workers=opts['workers'])
+
+        for error in report['errors']:
+            self.stderr.write(f"  row {error['row']} ({error['username'] or '-'}): {'; '.join(error['errors'])}")
+        verb = "Validated" if opts['dry_run'] else "Imported"
+        count = report['valid'] if opts['dry_run'] else report['created']
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {count} of {len(rows)} rows in {report['seconds']}s, {len(report['errors'])} rejected"
+        ))
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.retention import expired_logs, purge_audit_logs
+
+
+class Command(BaseCommand):
+    help = "Delete old AuditLog rows in bounded batches, optionally archiving them to gzip NDJSON first."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, required=True, help="Delete entries older than this many days")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.05, help="Seconds to sleep between batches")
+        parser.add_argument('--archive-dir', default=settings.AUDIT_LOG.get('ARCHIVE_DIR'),
+                            help="Write purged rows to <dir>/auditlog-<timestamp>.ndjson.gz before deleting")
+        parser.add_argument('--every', type=float, default=None,
+                            help="Keep running and purge every N hours (background schedule)")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many entries would be deleted")
+
+    def handle(self, *args, **opts):
+        if opts['dry_run']:
+            count = expired_logs(opts['days']).count()
+            self.stdout.write(f"Would delete {count} audit logs older than {opts['days']} days")
+            return
+        while True:
+            self._purge(opts)
+            if not opts['every']:
+                break
+            time.sleep(opts['every'] * 3600)
+
+    def _purge(self, opts):
+        def progress(deleted, batches, rate):
+            self.stdout.write(f"  batch {batches}: {deleted} deleted ({rate:.0f} rows/s)")
+
+        stats = purge_audit_logs(
+            opts['days'],
+            batch_size=opts['batch_size'],
+            pause=opts['pause'],
+            archive_dir=opts['archive_dir'],
+            progress=progress,
+        )
+        msg = f"Deleted {stats['deleted']} audit logs in {stats['batches']} batches, {stats['seconds']}s ({stats['rows_per_second']} rows/s)"
+        if stats['archive']:
+            msg += f", archived to {stats['archive']}"
+        self.stdout.write(self.style.SUCCESS(msg))
@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the member directory full-text index (users.search) from scratch."
+
+    def handle(self, *args, **opts):
+        started = time.monotonic()
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} profiles in {time.monotonic() - started:.2f}s"))
@@ -0,0 +1,45 @@
+"""
+Cached /api/me/ payloads.
+
+The rendered UserSerializer JSON for each user is kept in the shared cache
+under the user's version plus a global one (core.caching), with a strong
+ETag (hash of the body). Signals (users.signals) bump a user's version when
+their User, MemberProfile, roles, SIGs or project memberships change, and
+the global one when reference data (roles, positions, SIGs) changes. A request whose
+If-None-Match matches gets a 304 from two cache reads and no queries, given
+the authenticated user is served by CachedJWTAuthentication.
+"""
+import hashlib
+
+from rest_framework.renderers import JSONRenderer
+
+from core.caching import Namespace
+
+# Bounds anything the signals miss; rebuilding yields the same ETag if nothing changed
+PAYLOAD_TTL = 3600
+
+payloads = Namespace('me', ttl=PAYLOAD_TTL)
+
+
+def build(user_id):
+    from .authentication import load_user_bundle
+    from .serializers import UserSerializer
+
+    # Freshly loaded rather than the (up to AUTH_USER_CACHE_TTL old) request.user bundle
+    user = load_user_bundle(user_id)
+    body = JSONRenderer().render(UserSerializer(user).data)
+    return {'body': body, 'etag': f'"{hashlib.sha256(body).hexdigest()}"'}
+
+
+def get(user):
+    key = payloads.key(user.pk, *payloads.versions(['all', ('user', user.pk)]))
+    return payloads.get_or_set(key, lambda: build(user.pk))
+
+
+def invalidate(*user_ids):
+    """New versions for these users, published when the transaction commits."""
+    payloads.bump_on_commit(*(('user', uid) for uid in {uid for uid in user_ids if uid}))
+
+
+def invalidate_all():
+    payloads.bump_on_commit('all')
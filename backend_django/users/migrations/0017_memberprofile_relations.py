@@ -0,0 +1,65 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of users.backfill.backfill_profile_relations(create_missing=True):
+# migrations must not import code that keeps changing. Legacy names with no
+# Sig / TeamPosition row get one, so no profile loses its SIG or position.
+def _link(profiles, target, column, fk):
+    # Raw legacy values, which may differ from the row's name in case and surrounding spaces
+    values = [v for v in profiles.filter(**{f'{fk}__isnull': True}).values_list(column, flat=True).distinct() if v.strip()]
+    existing = {name.lower(): pk for pk, name in target.objects.values_list('pk', 'name')}
+    missing = {}
+    for value in values:
+        if value.strip().lower() not in existing:
+            missing.setdefault(value.strip().lower(), value.strip())
+    if missing:
+        target.objects.bulk_create([target(name=name) for name in missing.values()])
+        existing.update({name.lower(): pk for pk, name in target.objects.filter(name__in=missing.values()).values_list('pk', 'name')})
+    for value in values:
+        profiles.filter(**{f'{fk}__isnull': True, column: value}).update(**{fk: existing[value.strip().lower()]})
+
+
+def backfill(apps, schema_editor):
+    MemberProfile = apps.get_model('users', 'MemberProfile')
+    profiles = MemberProfile.objects.all()
+    _link(profiles, apps.get_model('users', 'TeamPosition'), 'legacy_position', 'team_position')
+    _link(profiles, apps.get_model('users', 'Sig'), 'legacy_sig', 'primary_sig')
+
+    # The primary SIG is also a membership
+    SigLink = MemberProfile.sigs.through
+    SigLink.objects.bulk_create([
+        SigLink(memberprofile_id=profile_id, sig_id=sig_id)
+        for profile_id, sig_id in profiles.filter(primary_sig__isnull=False).values_list('id', 'primary_sig_id')
+    ], batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0016_auditlog_indexes'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='memberprofile',
+            old_name='sig',
+            new_name='legacy_sig',
+        ),
+        migrations.RenameField(
+            model_name='memberprofile',
+            old_name='position',
+            new_name='legacy_position',
+        ),
+        migrations.AddField(
+            model_name='memberprofile',
+            name='primary_sig',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='primary_members', to='users.sig'),
+        ),
+        migrations.AddField(
+            model_name='memberprofile',
+            name='team_position',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='users.teamposition'),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
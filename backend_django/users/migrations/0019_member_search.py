@@ -0,0 +1,85 @@
+import re
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+POSTGRES = [
+    """CREATE TABLE users_membersearch (
+        profile_id bigint PRIMARY KEY REFERENCES users_memberprofile (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+        document tsvector NOT NULL
+    )""",
+    "CREATE INDEX users_membersearch_document_gin ON users_membersearch USING gin (document)",
+]
+SQLITE = [
+    "CREATE VIRTUAL TABLE users_membersearch USING fts5(name, tags, body, tokenize='unicode61 remove_diacritics 2')",
+]
+
+
+INSERT_POSTGRES = (
+    "INSERT INTO users_membersearch (profile_id, document) VALUES (%s, "
+    "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B') || "
+    "setweight(to_tsvector('simple', %s), 'C'))"
+)
+INSERT_SQLITE = "INSERT INTO users_membersearch (rowid, name, tags, body) VALUES (%s, %s, %s, %s)"
+
+
+# Frozen copy of users.search.document() as of this migration; later changes
+# to the live module reach existing rows through `manage.py rebuild_member_search`.
+def _words(*values):
+    text = ' '.join(str(v) for v in values if v not in (None, ''))
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def _document(profile):
+    user = profile.user
+    sigs = {s.name for s in profile.sigs.all()}
+    if profile.primary_sig_id:
+        sigs.add(profile.primary_sig.name)
+    custom = profile.custom_fields if isinstance(profile.custom_fields, dict) else {}
+    return (
+        _words(profile.full_name, user.username if user else ''),
+        _words(profile.roll_number, profile.team_position.name if profile.team_position_id else '',
+               *sorted(sigs), profile.department, profile.branch),
+        _words(profile.year, profile.team_name, user.email if user else profile.email, profile.description,
+               *(v for v in custom.values() if isinstance(v, (str, int, float)))),
+    )
+
+
+def create_index(apps, schema_editor):
+    postgres = schema_editor.connection.vendor == 'postgresql'
+    for sql in POSTGRES if postgres else SQLITE:
+        schema_editor.execute(sql)
+
+    MemberProfile = apps.get_model('users', 'MemberProfile')
+    profiles = MemberProfile.objects.select_related('user', 'team_position', 'primary_sig').prefetch_related('sigs')
+    rows = [(p.pk, *_document(p)) for p in profiles.order_by('pk').iterator(chunk_size=500)]
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(0, len(rows), 500):
+            cursor.executemany(INSERT_POSTGRES if postgres else INSERT_SQLITE, rows[start:start + 500])
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute("DROP TABLE users_membersearch")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0018_memberprofile_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberSearchDocument',
+            fields=[
+                ('profile', models.OneToOneField(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='users.memberprofile')),
+                ('document', django.contrib.postgres.search.SearchVectorField()),
+            ],
+            options={
+                'db_table': 'users_membersearch',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
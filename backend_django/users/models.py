@@ -1,5 +1,9 @@
 from django.contrib.auth.models import AbstractUser
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
+
+from . import refdata
 
 # 1. Dynamic SIG Model
 class Sig(models.Model):
@@ -77,6 +81,8 @@ class User(AbstractUser):
 
     role = models.CharField(max_length=20, choices=Roles.choices, default=Roles.CANDIDATE)
     user_roles = models.ManyToManyField(Role, blank=True, related_name="users")
+    # Bumped whenever roles/position change; JWT permission claims are trusted only while it matches
+    permissions_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.username}"
@@ -90,9 +96,13 @@ class MemberProfile(models.Model):
     department = models.CharField(max_length=100, blank=True) 
     year_of_joining = models.IntegerField(null=True, blank=True)
     
-    sig = models.CharField(max_length=100, blank=True) 
+    primary_sig = models.ForeignKey('Sig', on_delete=models.SET_NULL, null=True, blank=True, related_name='primary_members')
     sigs = models.ManyToManyField('Sig', blank=True, related_name='members') 
-    position = models.CharField(max_length=100, blank=True) 
+    team_position = models.ForeignKey('TeamPosition', on_delete=models.SET_NULL, null=True, blank=True, related_name='members')
+    # Free-text columns superseded by primary_sig / team_position; only read by
+    # the backfill_profile_relations command, to be dropped in a later release
+    legacy_sig = models.CharField(max_length=100, blank=True)
+    legacy_position = models.CharField(max_length=100, blank=True)
     team_name = models.CharField(max_length=100, blank=True) 
     
     is_public = models.BooleanField(default=True) 
@@ -100,6 +110,7 @@ class MemberProfile(models.Model):
     order = models.IntegerField(default=0) 
     
     image = models.ImageField(upload_to='team/', blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # core.images
     description = models.TextField(blank=True)
     
     linkedin_url = models.URLField(blank=True)
@@ -118,6 +129,40 @@ class MemberProfile(models.Model):
     def __str__(self):
         return f"{self.full_name}"
 
+    # 'sig' / 'position' keep the old string API: names are read from the
+    # reference-data snapshot (no query) and assigning a name sets the FK.
+    @property
+    def sig(self):
+        sig = refdata.get_snapshot().sigs_by_id.get(self.primary_sig_id)
+        return sig.name if sig else ''
+
+    @sig.setter
+    def sig(self, name):
+        sig = refdata.sig_by_name(name)
+        self.primary_sig_id = sig.id if sig else None
+
+    @property
+    def position(self):
+        pos = refdata.get_snapshot().positions_by_id.get(self.team_position_id)
+        return pos.name if pos else ''
+
+    @position.setter
+    def position(self, name):
+        pos = refdata.position_by_name(name)
+        self.team_position_id = pos.id if pos else None
+
+# Full-text index row (users.search). The table is created per database by
+# migration 0019: a tsvector + GIN index on PostgreSQL, an FTS5 table on SQLite,
+# so the model is unmanaged and only queried on PostgreSQL.
+class MemberSearchDocument(models.Model):
+    profile = models.OneToOneField(MemberProfile, primary_key=True, on_delete=models.DO_NOTHING,
+                                   db_constraint=False, related_name='search_document')
+    document = SearchVectorField()
+
+    class Meta:
+        managed = False
+        db_table = 'users_membersearch'
+
 # 6. Audit Log (NEW)
 class AuditLog(models.Model):
     event_type = models.CharField(max_length=50) # e.g. "USER_MODIFIED", "ROLE_CHANGED"
@@ -126,10 +171,19 @@ class AuditLog(models.Model):
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     details = models.TextField(blank=True) # JSON or text summary
     success = models.BooleanField(default=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event happens, not when the buffered writer flushes it (users.audit)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
-        ordering = ['-created_at']
+        ordering = ['-created_at', '-id']
+        # Match the keyset pagination order and the filters of AuditLogViewSet
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='auditlog_created_idx'),
+            models.Index(fields=['event_type', '-created_at'], name='auditlog_event_created_idx'),
+            models.Index(fields=['actor', '-created_at'], name='auditlog_actor_created_idx'),
+            models.Index(fields=['ip_address', '-created_at'], name='auditlog_ip_created_idx'),
+            models.Index(fields=['success', '-created_at'], name='auditlog_success_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.event_type} by {self.actor} at {self.created_at}"
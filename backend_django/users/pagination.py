@@ -0,0 +1,35 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class AuditLogCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id): each page is an indexed range
+    scan from the cursor, so cost does not grow with the table size.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'limit'
+    max_page_size = 200
+
+
+class UserPagination(PageNumberPagination):
+    """
+    Page-number pagination for user management. Only applied when the client
+    asks for a page (?page= / ?page_size=); member pickers that need the whole
+    roster keep getting a plain list.
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class MemberSearchPagination(PageNumberPagination):
+    """Directory search results (users.search) are always paged, best match first."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -1,5 +1,88 @@
 from rest_framework import permissions
 
+ROLE_FLAGS = (
+    'can_manage_users',
+    'can_manage_projects',
+    'can_manage_events',
+    'can_manage_team',
+    'can_manage_gallery',
+    'can_manage_announcements',
+    'can_manage_security',
+    'can_manage_messages',
+    'can_manage_sponsorship',
+    'can_manage_forms',
+    'can_manage_content',
+)
+
+# Flags granted by the 'can_manage_content' Super-flag (Content CMS)
+CONTENT_FLAGS = (
+    'can_manage_events',
+    'can_manage_announcements',
+    'can_manage_gallery',
+    'can_manage_sponsorship',
+    'can_manage_messages',
+    'can_manage_forms',
+)
+
+# Claims minted into access tokens by users.tokens
+PERMISSIONS_CLAIM = 'perms'
+PERMISSIONS_VERSION_CLAIM = 'pv'
+
+
+def resolve_permissions(user, token=None):
+    """
+    Union of every permission flag the user holds, computed once and memoised
+    on the user object (which lives for exactly one request):
+    - flags of directly assigned Roles (user.user_roles)
+    - flags of the Role linked to the user's Structure Position (role_link)
+    - content flags implied by the 'can_manage_content' super-flag
+    - virtual 'can_manage_everything' for WEB_LEAD / security managers
+
+    When the request's access token carries a permission claim minted at the
+    user's current permissions_version, the claim is trusted as-is (no queries).
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+
+    cached = getattr(user, '_resolved_permissions', None)
+    if cached is not None:
+        return cached
+
+    claim = token.get(PERMISSIONS_CLAIM) if token is not None else None
+    if claim is not None and token.get(PERMISSIONS_VERSION_CLAIM) == user.permissions_version:
+        perms = set(claim)
+    elif user.is_superuser:
+        perms = set(ROLE_FLAGS)
+        perms.add('can_manage_everything')
+    else:
+        from . import refdata
+
+        # Direct roles (served from prefetch when loaded) + position-linked role from the snapshot
+        roles = list(user.user_roles.all())
+        profile = getattr(user, 'profile', None)
+        pos = refdata.get_snapshot().positions_by_id.get(profile.team_position_id) if profile else None
+        if pos and pos.role_link:
+            roles.append(pos.role_link)
+
+        perms = set()
+        for role in roles:
+            perms.update(f for f in ROLE_FLAGS if getattr(role, f))
+            if role.name == 'WEB_LEAD':
+                perms.add('can_manage_everything')
+
+        if 'can_manage_content' in perms:
+            perms.update(CONTENT_FLAGS)
+        if 'can_manage_security' in perms:
+            perms.add('can_manage_everything')
+
+    user._resolved_permissions = frozenset(perms)
+    return user._resolved_permissions
+
+
+def has_flag(user, flag):
+    return flag in resolve_permissions(user)
+
+
 class GlobalPermission(permissions.BasePermission):
     """
     Role-Based Access Control via Structure Positions & Roles:
@@ -58,27 +141,11 @@ class GlobalPermission(permissions.BasePermission):
         if user.is_superuser:
             return True
 
-        # Helper: check for specific flag across all sources
-        def check_flag(flag_name):
-            # A. Check explicitly assigned roles
-            if user.user_roles.filter(**{flag_name: True}).exists():
-                return True
-            
-            # B. Check Role linked to user's Position (Structure Management)
-            try:
-                from .models import TeamPosition
-                profile = getattr(user, 'profile', None)
-                pos_name = getattr(profile, 'position', None) if profile else None
-                if pos_name:
-                    pos = TeamPosition.objects.filter(name__iexact=pos_name).first()
-                    if pos and pos.role_link and getattr(pos.role_link, flag_name):
-                        return True
-            except: pass
-            
-            return False
-            
+        # 2. Resolve the caller's flags once (memoised on the user for this request)
+        perms = resolve_permissions(user, request.auth)
+
         # 3. Web Lead / Security Manager check (Full Access)
-        if check_flag('can_manage_security'):
+        if 'can_manage_security' in perms:
             return True
 
         # 4. Shared Visibility Check removed to enforce Strict RBAC
@@ -133,22 +200,8 @@ class GlobalPermission(permissions.BasePermission):
         if not flag:
             return False # Strictly deny unmapped write actions
             
-        if check_flag(flag):
-            return True
-            
-        # 6. 'can_manage_content' Super-flag (Content CMS)
-        content_related_flags = [
-            'can_manage_events',
-            'can_manage_announcements',
-            'can_manage_gallery',
-            'can_manage_sponsorship',
-            'can_manage_messages',
-            'can_manage_forms'
-        ]
-        if flag in content_related_flags and check_flag('can_manage_content'):
-            return True
-            
-        return False
+        # 6. Direct/position flags, including content flags implied by 'can_manage_content'
+        return flag in perms
 
     def has_object_permission(self, request, view, obj):
         return self.has_permission(request, view)
@@ -158,4 +211,4 @@ class IsWebLead(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated: return False
         if request.user.is_superuser: return True
-        return request.user.user_roles.filter(can_manage_security=True).exists()
+        return 'can_manage_security' in resolve_permissions(request.user, request.auth)
@@ -0,0 +1,98 @@
+"""
+Process-wide snapshot of the small, rarely-changing reference tables:
+Role, Sig, TeamPosition and ProfileFieldDefinition.
+
+Every worker keeps its own in-memory copy. A shared version (core.caching)
+is bumped by save/delete signals (see users.signals), so all workers reload
+on their next access instead of querying on every request.
+"""
+import threading
+import time
+
+from django.db import transaction
+
+from core.caching import Namespace
+
+versions = Namespace('refdata')
+# How often (seconds) a worker re-reads the shared version key
+CHECK_INTERVAL = 1.0
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+class Snapshot:
+    def __init__(self, version):
+        from .models import Role, Sig, TeamPosition, ProfileFieldDefinition
+
+        self.version = version
+        self.checked_at = time.monotonic()
+
+        self.roles = list(Role.objects.all().order_by('id'))
+        self.sigs = list(Sig.objects.all())
+        self.positions = list(TeamPosition.objects.all())
+        self.profile_fields = list(ProfileFieldDefinition.objects.all())
+
+        self.roles_by_id = {r.id: r for r in self.roles}
+        self.roles_by_name = {r.name.lower(): r for r in self.roles}
+        self.sigs_by_id = {s.id: s for s in self.sigs}
+        self.sigs_by_name = {s.name.lower(): s for s in self.sigs}
+        self.positions_by_id = {p.id: p for p in self.positions}
+        self.positions_by_name = {p.name.lower(): p for p in self.positions}
+
+        # Attach linked roles from the snapshot so pos.role_link never queries
+        for pos in self.positions:
+            pos.role_link = self.roles_by_id.get(pos.role_link_id)
+
+
+def _shared_version():
+    return versions.version('all')
+
+
+def get_snapshot():
+    global _snapshot
+    snap = _snapshot
+    now = time.monotonic()
+    if snap is not None and now - snap.checked_at < CHECK_INTERVAL:
+        return snap
+
+    version = _shared_version()
+    if snap is not None and snap.version == version:
+        snap.checked_at = now
+        return snap
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = Snapshot(version)
+        return _snapshot
+
+
+def invalidate():
+    """Drop this worker's copy and publish a new version to the others."""
+    global _snapshot
+
+    def _bump():
+        global _snapshot
+        versions.bump('all')
+        _snapshot = None
+
+    _snapshot = None
+    transaction.on_commit(_bump)
+
+
+# --- Lookups ---
+
+def position_by_name(name):
+    if not name:
+        return None
+    return get_snapshot().positions_by_name.get(name.strip().lower())
+
+
+def sig_by_name(name):
+    if not name:
+        return None
+    return get_snapshot().sigs_by_name.get(name.strip().lower())
+
+
+def role_by_id(role_id):
+    return get_snapshot().roles_by_id.get(role_id)
@@ -0,0 +1,128 @@
+"""
+AuditLog retention.
+
+Old rows are deleted in bounded primary-key ranges with a short pause between
+batches, so a large purge never holds a long lock or loads the rows into
+memory. Rows can optionally be archived to gzip-compressed NDJSON first.
+
+Run it from `manage.py purge_audit_logs` (cron, or --every for a long-running
+scheduler) or enqueue it from the API with enqueue_purge().
+"""
+import gzip
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core.caching import Namespace
+from .models import AuditLog
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = ('id', 'event_type', 'actor_id', 'target', 'ip_address', 'details', 'success', 'created_at')
+JOB_TTL = 24 * 3600
+
+# One purge at a time per worker; the request only enqueues
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='audit-retention')
+
+
+def expired_logs(days):
+    """AuditLog rows older than `days` days."""
+    return AuditLog.objects.filter(created_at__lt=timezone.now() - timedelta(days=days))
+
+
+def purge_audit_logs(days, batch_size=1000, pause=0.05, archive_dir=None, progress=None):
+    """
+    Delete AuditLog rows older than `days` days. Returns a stats dict
+    (deleted, batches, seconds, rows_per_second, archive).
+    """
+    expired = expired_logs(days)
+
+    archive_path = None
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(archive_dir, f"auditlog-{timezone.now():%Y%m%d-%H%M%S}.ndjson.gz")
+
+    started = time.monotonic()
+    deleted = batches = 0
+    last_id = 0
+    with gzip.open(archive_path, 'wt', encoding='utf-8') if archive_path else nullcontext() as archive:
+        while True:
+            ids = list(expired.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            batch = expired.filter(id__gte=ids[0], id__lte=ids[-1])
+
+            if archive:
+                for row in batch.order_by('id').values(*ARCHIVE_FIELDS):
+                    archive.write(json.dumps(row, default=str) + '\n')
+
+            # AuditLog has no dependents, so this is a single DELETE ... WHERE id BETWEEN
+            count, _ = batch.delete()
+            deleted += count
+            batches += 1
+            last_id = ids[-1]
+
+            if progress:
+                elapsed = time.monotonic() - started
+                progress(deleted, batches, deleted / elapsed if elapsed else 0.0)
+            if pause:
+                time.sleep(pause)
+
+    elapsed = time.monotonic() - started
+    return {
+        'deleted': deleted,
+        'batches': batches,
+        'seconds': round(elapsed, 3),
+        'rows_per_second': round(deleted / elapsed, 1) if elapsed else 0.0,
+        'archive': archive_path,
+    }
+
+
+# --- Background jobs (API) ---
+
+jobs = Namespace('audit-retention:job', ttl=JOB_TTL)
+
+
+def get_job(job_id):
+    return jobs.get(job_id)
+
+
+def enqueue_purge(days, actor=None, ip_address=None, **options):
+    job_id = uuid.uuid4().hex
+    jobs.set(job_id, {'status': 'queued', 'days': days})
+    _executor.submit(_run_job, job_id, days, actor, ip_address, options)
+    return job_id
+
+
+def _run_job(job_id, days, actor, ip_address, options):
+    from . import audit
+
+    close_old_connections()
+    state = {'status': 'running', 'days': days}
+    jobs.set(job_id, state)
+
+    def progress(deleted, batches, rate):
+        jobs.set(job_id, {**state, 'deleted': deleted, 'batches': batches, 'rows_per_second': round(rate, 1)})
+
+    try:
+        stats = purge_audit_logs(days, progress=progress, **options)
+        jobs.set(job_id, {**state, **stats, 'status': 'done'})
+        audit.record(
+            event_type="LOGS_CLEANED",
+            actor=actor,
+            target=f"Deleted {stats['deleted']} logs older than {days} days",
+            ip_address=ip_address,
+        )
+    except Exception as e:
+        logger.exception("Audit log purge failed")
+        jobs.set(job_id, {**state, 'status': 'failed', 'error': str(e)})
+    finally:
+        close_old_connections()
@@ -0,0 +1,156 @@
+"""
+Full-text index over the member directory.
+
+One document per MemberProfile, in three weighted parts:
+
+    name   full name, username                                  (weight A)
+    tags   roll number, position, SIGs, department, branch      (weight B)
+    body   year, team, email, description, custom field values  (weight C)
+
+The index lives in a shadow table, users_membersearch, whose shape depends on
+the database (created by migration 0019):
+
+    PostgreSQL  (profile_id, document tsvector) with a GIN index, queried
+                through MemberSearchDocument and SearchQuery/SearchRank
+    SQLite      an FTS5 virtual table keyed by rowid = profile id, ranked by bm25()
+
+Queries are prefix matches on every term ("adi web" finds "Aditya ... Web
+Team"). Signals (users.signals) re-index a profile whenever it, its user, its
+SIGs or its position change; `manage.py rebuild_member_search` rebuilds
+everything.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Func, Value
+from django.db.models.expressions import RawSQL
+
+TABLE = 'users_membersearch'
+# FTS5 bm25() column weights, mirroring the A/B/C weights on PostgreSQL
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+CHUNK = 500
+
+
+def _words(*values):
+    """Lower-cased word tokens, so both backends see the same terms."""
+    text = ' '.join(str(v) for v in values if v not in (None, ''))
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def terms(query):
+    return re.findall(r'\w+', (query or '').lower())[:8]
+
+
+def document(profile):
+    """(name, tags, body) for a profile loaded with user, team_position, primary_sig and sigs."""
+    user = profile.user
+    sigs = {s.name for s in profile.sigs.all()}
+    if profile.primary_sig_id:
+        sigs.add(profile.primary_sig.name)
+    custom = profile.custom_fields if isinstance(profile.custom_fields, dict) else {}
+    return (
+        _words(profile.full_name, user.username if user else ''),
+        _words(profile.roll_number, profile.team_position.name if profile.team_position_id else '',
+               *sorted(sigs), profile.department, profile.branch),
+        _words(profile.year, profile.team_name, user.email if user else profile.email, profile.description,
+               *(v for v in custom.values() if isinstance(v, (str, int, float)))),
+    )
+
+
+# --- Writing ---
+
+def _profiles(MemberProfile, ids=None):
+    qs = MemberProfile.objects.select_related('user', 'team_position', 'primary_sig').prefetch_related('sigs')
+    return qs.filter(pk__in=ids) if ids is not None else qs.order_by('pk')
+
+
+def _write(rows):
+    """rows: [(profile_id, (name, tags, body))]"""
+    if not rows:
+        return
+    ids = [pk for pk, _ in rows]
+    with connection.cursor() as cursor:
+        marks = ','.join(['%s'] * len(ids))
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DELETE FROM {TABLE} WHERE profile_id IN ({marks})', ids)
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (profile_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'B') || "
+                f"setweight(to_tsvector('simple', %s), 'C'))",
+                [(pk, *doc) for pk, doc in rows],
+            )
+        else:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid IN ({marks})', ids)
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, name, tags, body) VALUES (%s, %s, %s, %s)',
+                [(pk, *doc) for pk, doc in rows],
+            )
+
+
+def reindex(profile_ids, MemberProfile=None):
+    """Rebuild the documents of these profiles (missing ones are dropped from the index)."""
+    if MemberProfile is None:
+        from .models import MemberProfile
+    profile_ids = list(profile_ids)
+    for start in range(0, len(profile_ids), CHUNK):
+        chunk = profile_ids[start:start + CHUNK]
+        profiles = list(_profiles(MemberProfile, chunk))
+        remove(set(chunk) - {p.pk for p in profiles})
+        _write([(p.pk, document(p)) for p in profiles])
+
+
+def remove(profile_ids):
+    profile_ids = list(profile_ids)
+    if not profile_ids:
+        return
+    column = 'profile_id' if connection.vendor == 'postgresql' else 'rowid'
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE {column} IN ({','.join(['%s'] * len(profile_ids))})", profile_ids)
+
+
+def rebuild(MemberProfile=None):
+    """Index every profile from scratch. Returns the number indexed."""
+    if MemberProfile is None:
+        from .models import MemberProfile
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    ids = list(MemberProfile.objects.order_by('pk').values_list('pk', flat=True))
+    reindex(ids, MemberProfile)
+    return len(ids)
+
+
+# --- Querying ---
+
+class Bm25Rank(Func):
+    """
+    Bm25Rank(match, profile id): -bm25() of that profile's FTS5 row for `match`.
+    The id is an expression, so the ORM supplies the profile join's alias
+    (which differs once the queryset is used as a subquery).
+    """
+    template = f'(SELECT -bm25({TABLE}, {", ".join(str(w) for w in BM25_WEIGHTS)}) FROM {TABLE} WHERE {TABLE} MATCH %(expressions)s)'
+    arg_joiner = f' AND {TABLE}.rowid = '
+    output_field = FloatField()
+
+
+def search_users(queryset, query):
+    """
+    Narrow a User queryset to members matching every term of `query` as a
+    prefix, annotated with `search_rank` (higher is better).
+    """
+    words = terms(query)
+    if not words:
+        return queryset.none()
+
+    if connection.vendor == 'postgresql':
+        # document @@ to_tsquery(...) is answered from the GIN index
+        tsquery = SearchQuery(' & '.join(f'{w}:*' for w in words), search_type='raw', config='simple')
+        return queryset.filter(profile__search_document__document=tsquery).annotate(
+            search_rank=SearchRank(F('profile__search_document__document'), tsquery)
+        )
+
+    # FTS5: "term"* AND ...; bm25() is lower-is-better, so negate it
+    match = ' AND '.join(f'"{w}"*' for w in words)
+    queryset = queryset.filter(profile__id__in=RawSQL(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', (match,)))
+    return queryset.annotate(search_rank=Bm25Rank(Value(match), F('profile__id')))
+
@@ -1,30 +1,36 @@
 from rest_framework import serializers
+from core import images
+from core.fieldsets import SparseModelSerializer
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from projects.models import Project
 from .models import Role, MemberProfile, Sig, ProfileFieldDefinition, TeamPosition, AuditLog
+from . import refdata
+from .permissions import resolve_permissions
 
 User = get_user_model()
 
-class SigSerializer(serializers.ModelSerializer):
+class SigSerializer(SparseModelSerializer):
     class Meta:
         model = Sig
         fields = '__all__'
 
-class TeamPositionSerializer(serializers.ModelSerializer):
+class TeamPositionSerializer(SparseModelSerializer):
     class Meta:
         model = TeamPosition
         fields = '__all__'
 
-class ProfileFieldDefinitionSerializer(serializers.ModelSerializer):
+class ProfileFieldDefinitionSerializer(SparseModelSerializer):
     class Meta:
         model = ProfileFieldDefinition
         fields = '__all__'
 
-class RoleSerializer(serializers.ModelSerializer):
+class RoleSerializer(SparseModelSerializer):
     class Meta:
         model = Role
         fields = '__all__'
 
-class AuditLogSerializer(serializers.ModelSerializer):
+class AuditLogSerializer(SparseModelSerializer):
     actor_name = serializers.SerializerMethodField()
 
     def get_actor_name(self, obj):
@@ -33,17 +39,109 @@ class AuditLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = AuditLog
         fields = '__all__'
+        related_lookups = {'actor_name': ('actor',)}
 
-class MemberProfileSerializer(serializers.ModelSerializer):
+class MemberProfileSerializer(SparseModelSerializer):
     image = serializers.ImageField(required=False)
+    image_srcset = images.SrcsetField()
     custom_fields = serializers.JSONField(required=False)
     sigs = SigSerializer(many=True, read_only=True)
+    # Names of primary_sig / team_position, under the keys clients have always read
+    sig = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    position = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     
     class Meta:
         model = MemberProfile
-        fields = '__all__'
+        exclude = ('legacy_sig', 'legacy_position', 'image_variants')
+
+    # The model setters store NULL for a name they cannot resolve; reject it here instead
+    def validate_sig(self, value):
+        if value and value.strip() and refdata.sig_by_name(value) is None:
+            raise serializers.ValidationError(f"Unknown SIG '{value}'.")
+        return value
+
+    def validate_position(self, value):
+        if value and value.strip() and refdata.position_by_name(value) is None:
+            raise serializers.ValidationError(f"Unknown position '{value}'.")
+        return value
+
+# --- Public team page (users.team_snapshot): no permissions, projects or contact/internal fields ---
+class PublicProfileSerializer(SparseModelSerializer):
+    sigs = serializers.SerializerMethodField()
+    sig = serializers.CharField(read_only=True)
+    position = serializers.CharField(read_only=True)
+    image_srcset = images.SrcsetField()
+
+    class Meta:
+        model = MemberProfile
+        fields = ('full_name', 'position', 'sig', 'sigs', 'team_name', 'year', 'branch', 'department',
+                  'is_alumni', 'order', 'image', 'image_srcset', 'description', 'linkedin_url', 'github_url', 'instagram_url')
+        related_lookups = {'sigs': ('sigs',)}
+
+    def get_sigs(self, obj):
+        return [{'id': s.id, 'name': s.name} for s in obj.sigs.all()]
+
+class PublicMemberSerializer(SparseModelSerializer):
+    profile = PublicProfileSerializer(read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'profile')
 
-class UserSerializer(serializers.ModelSerializer):
+# --- Nested users: everything below reads only the user row and its profile (+ profile.sigs for contact) ---
+def _profile(user):
+    try:
+        return user.profile
+    except (MemberProfile.DoesNotExist, AttributeError):
+        return None
+
+class UserSummarySerializer(SparseModelSerializer):
+    """
+    Compact user for nesting in other payloads (project members, authors, creators...).
+    select_related the 'profile' of the nested user and this costs no extra queries.
+    Public pages nest it too, so nothing private (email, last_login...) belongs here;
+    the project dashboard gets members' last_login from sync_state instead.
+    """
+    full_name = serializers.SerializerMethodField()
+    position = serializers.SerializerMethodField()
+    avatar = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'full_name', 'position', 'avatar')
+        related_lookups = {'full_name': ('profile',), 'position': ('profile',), 'avatar': ('profile',)}
+
+    def get_full_name(self, obj):
+        p = _profile(obj)
+        return (p.full_name if p else '') or obj.username
+
+    def get_position(self, obj):
+        p = _profile(obj)
+        return p.position if p else ''
+
+    def get_avatar(self, obj):
+        p = _profile(obj)
+        if not (p and p.image):
+            return None
+        # Avatars render small: the narrowest variant once it exists
+        path = images.pick(p.image_variants)
+        url = p.image.storage.url(path) if path else p.image.url
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+class UserContactSerializer(UserSummarySerializer):
+    """Summary plus email and SIGs, for admin review screens (quiz attempts, form responses). Prefetch 'profile__sigs'."""
+    sigs = serializers.SerializerMethodField()
+
+    class Meta(UserSummarySerializer.Meta):
+        fields = UserSummarySerializer.Meta.fields + ('email', 'sigs')
+        related_lookups = {**UserSummarySerializer.Meta.related_lookups, 'sigs': ('profile__sigs',)}
+
+    def get_sigs(self, obj):
+        p = _profile(obj)
+        return [{'id': s.id, 'name': s.name} for s in p.sigs.all()] if p else []
+
+class UserSerializer(SparseModelSerializer):
     user_roles = RoleSerializer(many=True, read_only=True)
     profile = MemberProfileSerializer(read_only=True)
     permissions = serializers.SerializerMethodField()
@@ -52,49 +150,21 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'role', 'user_roles', 'profile', 'is_active', 'permissions', 'projects_info', 'last_login')
+        expandable = ('permissions', 'projects_info')
+        related_lookups = {
+            'permissions': ('user_roles', 'profile'),
+            'projects_info': (
+                Prefetch('led_projects', queryset=Project.objects.only('id', 'title', 'lead')),
+                Prefetch('projects', queryset=Project.objects.only('id', 'title')),
+            ),
+        }
 
     def get_projects_info(self, obj):
+        # Reads the (prefetched) relations so a user list costs no per-row queries
         return {
-            'led': list(obj.led_projects.values('id', 'title')),
-            'member': list(obj.projects.values('id', 'title'))
+            'led': [{'id': p.id, 'title': p.title} for p in obj.led_projects.all()],
+            'member': [{'id': p.id, 'title': p.title} for p in obj.projects.all()]
         }
 
     def get_permissions(self, obj):
-        perms = set()
-        
-        # 1. Direct Roles
-        for r in obj.user_roles.all():
-            self._add_role_perms(r, perms)
-            
-        # 2. Position-Linked Roles (NEW)
-        try:
-            if hasattr(obj, 'profile') and obj.profile and obj.profile.position:
-                # Try to find Position by name
-                # Ideally user.profile.position would be a ForeignKey, but legacy string support
-                pos = TeamPosition.objects.filter(name__iexact=obj.profile.position).select_related('role_link').first()
-                if pos and pos.role_link:
-                    self._add_role_perms(pos.role_link, perms)
-                    # Add role name to perms for frontend visibility checks
-                    if pos.role_link.name == 'WEB_LEAD': perms.add('can_manage_everything') 
-        except Exception: 
-            pass
-
-        # 3. Virtual Sudo Permission
-        if 'can_manage_security' in perms:
-            perms.add('can_manage_everything')
-
-        return list(perms)
-
-    def _add_role_perms(self, r, perms):
-        if r.can_manage_users: perms.add('can_manage_users')
-        if r.can_manage_projects: perms.add('can_manage_projects')
-        if r.can_manage_events: perms.add('can_manage_events')
-        if r.can_manage_team: perms.add('can_manage_team')
-        if r.can_manage_gallery: perms.add('can_manage_gallery')
-        if r.can_manage_announcements: perms.add('can_manage_announcements')
-        if r.can_manage_security: perms.add('can_manage_security')
-        if r.can_manage_messages: perms.add('can_manage_messages')
-        if r.can_manage_sponsorship: perms.add('can_manage_sponsorship')
-        if r.can_manage_forms: perms.add('can_manage_forms')
-        if r.can_manage_content: perms.add('can_manage_content')
-        if r.name == 'WEB_LEAD': perms.add('can_manage_everything')  
+        return sorted(resolve_permissions(obj))
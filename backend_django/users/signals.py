@@ -1,11 +1,18 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete, m2m_changed
 from django.dispatch import receiver
-from .models import AuditLog
+from core import images
+from .models import Role, Sig, TeamPosition, ProfileFieldDefinition, User, MemberProfile
+from .tokens import bump_permissions_version
+from .authentication import invalidate_cached_user
+from . import refdata, audit, team_snapshot, search, me_cache
+from projects.models import Project
 
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     ip = request.META.get('REMOTE_ADDR')
-    AuditLog.objects.create(
+    audit.record(
         event_type="USER_LOGIN",
         actor=user,
         target=f"User Login: {user.username}",
@@ -17,10 +24,231 @@ def log_user_login(sender, request, user, **kwargs):
 def log_user_logout(sender, request, user, **kwargs):
     if user:
         ip = request.META.get('REMOTE_ADDR')
-        AuditLog.objects.create(
+        audit.record(
             event_type="USER_LOGOUT",
             actor=user,
             target=f"User Logout: {user.username}",
             ip_address=ip,
             details="User logged out successfully"
         )
+
+# --- Reference data snapshot invalidation ---
+# Connected per model: a sender-less post_delete receiver would disable fast (non-collecting) deletes everywhere
+REFERENCE_MODELS = (Role, Sig, TeamPosition, ProfileFieldDefinition)
+
+def invalidate_reference_data(sender, **kwargs):
+    refdata.invalidate()
+
+for _model in REFERENCE_MODELS:
+    post_save.connect(invalidate_reference_data, sender=_model)
+    post_delete.connect(invalidate_reference_data, sender=_model)
+
+# --- Permission claim versioning ---
+def _users_holding_position(*position_ids):
+    return User.objects.filter(profile__team_position_id__in=position_ids).values_list('id', flat=True)
+
+@receiver(m2m_changed, sender=User.user_roles.through)
+def user_roles_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        if action != 'pre_clear':
+            bump_permissions_version([instance.pk])
+    elif action == 'pre_clear':
+        # Role.users.clear(): pk_set is not provided, capture holders before the rows go
+        bump_permissions_version(instance.users.values_list('id', flat=True))
+    elif pk_set:
+        bump_permissions_version(pk_set)
+
+@receiver(pre_save, sender=User)
+def user_standing_changed(sender, instance, update_fields=None, **kwargs):
+    # A superuser's claim holds every flag: demotion (or deactivation) must retire it
+    if not instance.pk or (update_fields is not None and not {'is_superuser', 'is_active'} & set(update_fields)):
+        return
+    old = User.objects.filter(pk=instance.pk).values_list('is_superuser', 'is_active', 'permissions_version').first()
+    if old is None or old[:2] == (instance.is_superuser, instance.is_active):
+        return
+    if update_fields is None:
+        # Written with this save, so a later save of the same instance cannot put the old version back
+        instance.permissions_version = old[2] + 1
+    else:
+        bump_permissions_version([instance.pk])
+
+@receiver(pre_save, sender=MemberProfile)
+def profile_position_changed(sender, instance, **kwargs):
+    if not instance.user_id:
+        return
+    old = MemberProfile.objects.filter(pk=instance.pk).values_list('team_position_id', flat=True).first() if instance.pk else None
+    if old != instance.team_position_id:
+        bump_permissions_version([instance.user_id])
+
+@receiver(post_delete, sender=MemberProfile)
+def profile_deleted(sender, instance, **kwargs):
+    bump_permissions_version([instance.user_id])
+
+@receiver(pre_save, sender=TeamPosition)
+def position_changed(sender, instance, **kwargs):
+    # Holders are linked by id, so only a change of the linked role matters
+    if not instance.pk:
+        return
+    old_role = TeamPosition.objects.filter(pk=instance.pk).values_list('role_link_id', flat=True).first()
+    if old_role != instance.role_link_id:
+        bump_permissions_version(_users_holding_position(instance.pk))
+
+@receiver(pre_delete, sender=TeamPosition)
+def position_deleted(sender, instance, **kwargs):
+    bump_permissions_version(_users_holding_position(instance.pk))
+
+@receiver(pre_save, sender=Role)
+@receiver(pre_delete, sender=Role)
+def role_changed(sender, instance, **kwargs):
+    if not instance.pk:
+        return
+    direct = list(instance.users.values_list('id', flat=True))
+    linked = instance.linked_positions.values_list('id', flat=True)
+    bump_permissions_version(direct + list(_users_holding_position(*linked)))
+
+# --- Cached authenticated-user bundles (users.authentication) ---
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+@receiver(post_save, sender=MemberProfile)
+@receiver(post_delete, sender=MemberProfile)
+def profile_changed(sender, instance, **kwargs):
+    invalidate_cached_user(instance.user_id)
+
+@receiver(m2m_changed, sender=User.user_roles.through)
+@receiver(m2m_changed, sender=MemberProfile.sigs.through)
+def user_relations_changed(sender, instance, action, reverse, pk_set, model, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_cached_user(instance.user_id if isinstance(instance, MemberProfile) else instance.pk)
+    elif model is User:
+        for uid in pk_set or ():
+            invalidate_cached_user(uid)
+    elif model is MemberProfile:
+        for uid in MemberProfile.objects.filter(pk__in=pk_set or ()).values_list('user_id', flat=True):
+            invalidate_cached_user(uid)
+
+# --- Public team snapshot (users.team_snapshot) ---
+def invalidate_team_snapshot(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which the public payload does not include
+    if sender is User and update_fields and set(update_fields) <= {'last_login'}:
+        return
+    team_snapshot.invalidate()
+
+for _model in (User, MemberProfile, Sig, Role, TeamPosition):
+    post_save.connect(invalidate_team_snapshot, sender=_model)
+    post_delete.connect(invalidate_team_snapshot, sender=_model)
+m2m_changed.connect(invalidate_team_snapshot, sender=MemberProfile.sigs.through)
+
+# Variant records are stored with a bulk .update(), which sends no post_save
+@receiver(images.variants_ready, sender=MemberProfile)
+def profile_variants_ready(sender, instance, **kwargs):
+    team_snapshot.invalidate()
+    invalidate_cached_user(instance.user_id)
+
+
+# --- Member directory search index (users.search) ---
+@receiver(post_save, sender=MemberProfile)
+def index_profile(sender, instance, **kwargs):
+    search.reindex([instance.pk])
+
+@receiver(post_delete, sender=MemberProfile)
+def unindex_profile(sender, instance, **kwargs):
+    search.remove([instance.pk])
+
+@receiver(post_save, sender=User)
+def index_user_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login', 'password'}:
+        return
+    search.reindex(MemberProfile.objects.filter(user=instance).values_list('pk', flat=True))
+
+@receiver(m2m_changed, sender=MemberProfile.sigs.through)
+def index_profile_sigs(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        search.reindex([instance.pk])
+    elif pk_set:
+        search.reindex(pk_set)
+
+def _holders(instance):
+    if isinstance(instance, Sig):
+        return set(MemberProfile.objects.filter(Q(primary_sig=instance) | Q(sigs=instance)).values_list('pk', flat=True))
+    return set(MemberProfile.objects.filter(team_position=instance).values_list('pk', flat=True))
+
+@receiver(post_save, sender=Sig)
+@receiver(post_save, sender=TeamPosition)
+def index_renamed_holders(sender, instance, created, **kwargs):
+    if not created:
+        search.reindex(_holders(instance))
+
+@receiver(pre_delete, sender=Sig)
+@receiver(pre_delete, sender=TeamPosition)
+def remember_holders(sender, instance, **kwargs):
+    # The FKs are nulled and links dropped without signals; re-index once they are gone
+    instance._search_holders = _holders(instance)
+
+@receiver(post_delete, sender=Sig)
+@receiver(post_delete, sender=TeamPosition)
+def index_orphaned_holders(sender, instance, **kwargs):
+    search.reindex(getattr(instance, '_search_holders', ()))
+
+
+# --- Cached /api/me/ payloads (users.me_cache) ---
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def me_user_changed(sender, instance, **kwargs):
+    me_cache.invalidate(instance.pk)
+
+@receiver(post_save, sender=MemberProfile)
+@receiver(post_delete, sender=MemberProfile)
+@receiver(images.variants_ready, sender=MemberProfile)
+def me_profile_changed(sender, instance, **kwargs):
+    me_cache.invalidate(instance.user_id)
+
+@receiver(m2m_changed, sender=User.user_roles.through)
+@receiver(m2m_changed, sender=MemberProfile.sigs.through)
+@receiver(m2m_changed, sender=Project.members.through)
+def me_relations_changed(sender, instance, action, reverse, pk_set, model, **kwargs):
+    if not action.startswith('post_') and action != 'pre_clear':
+        return
+    if action == 'pre_clear':
+        # clear() reports no pk_set: capture the affected users before the rows go
+        if isinstance(instance, Project):
+            me_cache.invalidate(*instance.members.values_list('id', flat=True))
+        elif reverse and model is User:
+            me_cache.invalidate(*instance.users.values_list('id', flat=True))
+        elif reverse and model is MemberProfile:
+            me_cache.invalidate(*instance.members.values_list('user_id', flat=True))
+        return
+    if isinstance(instance, User):
+        me_cache.invalidate(instance.pk)
+    elif isinstance(instance, MemberProfile):
+        me_cache.invalidate(instance.user_id)
+    elif model is User:
+        me_cache.invalidate(*(pk_set or ()))
+    elif model is MemberProfile:
+        me_cache.invalidate(*MemberProfile.objects.filter(pk__in=pk_set or ()).values_list('user_id', flat=True))
+
+@receiver(pre_save, sender=Project)
+def me_project_lead_changed(sender, instance, **kwargs):
+    if instance.pk:
+        me_cache.invalidate(Project.objects.filter(pk=instance.pk).values_list('lead_id', flat=True).first())
+
+@receiver(post_save, sender=Project)
+@receiver(pre_delete, sender=Project)
+def me_project_changed(sender, instance, **kwargs):
+    # projects_info lists titles of led and joined projects
+    me_cache.invalidate(instance.lead_id, *instance.members.values_list('id', flat=True))
+
+def invalidate_all_me(sender, **kwargs):
+    me_cache.invalidate_all()
+
+for _model in REFERENCE_MODELS:
+    post_save.connect(invalidate_all_me, sender=_model)
+    post_delete.connect(invalidate_all_me, sender=_model)
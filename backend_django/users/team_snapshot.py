@@ -0,0 +1,45 @@
+"""
+Precomputed /api/team/public/ payloads (current members and alumni).
+
+The rendered JSON and its strong ETag live in the shared cache under a
+version (core.caching); signals bump it whenever a User, MemberProfile, Sig,
+Role or TeamPosition changes and the next request rebuilds the payload.
+Snapshots are kept per host because image URLs are absolute.
+"""
+import hashlib
+
+from django.contrib.auth import get_user_model
+from rest_framework.renderers import JSONRenderer
+
+from core.caching import Namespace
+
+User = get_user_model()
+
+KINDS = ('current', 'alumni')
+SNAPSHOT_TTL = 24 * 3600  # superseded versions just age out
+
+snapshots = Namespace('team:public', ttl=SNAPSHOT_TTL)
+
+
+def build(kind, request):
+    from .serializers import PublicMemberSerializer
+
+    qs = (
+        User.objects.filter(is_active=True, profile__is_public=True, profile__is_alumni=(kind == 'alumni'))
+        .select_related('profile')
+        .prefetch_related('profile__sigs')
+        .order_by('profile__order', 'profile__full_name')
+    )
+    data = PublicMemberSerializer(qs, many=True, context={'request': request}).data
+    body = JSONRenderer().render(data)
+    return {'body': body, 'etag': f'"{hashlib.sha256(body).hexdigest()}"'}
+
+
+def get(kind, request):
+    kind = kind if kind in KINDS else 'current'
+    key = snapshots.key(snapshots.version('all'), kind, request.get_host())
+    return snapshots.get_or_set(key, lambda: build(kind, request))
+
+
+def invalidate():
+    snapshots.bump_on_commit('all')
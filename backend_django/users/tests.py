@@ -1,3 +1,721 @@
-from django.test import TestCase
+import gzip
+import json
+from importlib import import_module
+import queue
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from projects.models import Project
+from .authentication import CachedJWTAuthentication
+from . import audit, imports, refdata, retention, search
+from .backfill import backfill_profile_relations
+from .models import AuditLog, User, Role, Sig, MemberProfile, TeamPosition
+from .permissions import has_flag, resolve_permissions
+
+
+class PermissionResolutionTests(TestCase):
+    """resolve_permissions: one union of every flag source, memoised on the user."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('member', password='x')
+        self.user.user_roles.add(Role.objects.create(name='Content', can_manage_content=True))
+        position = TeamPosition.objects.create(
+            name='Tech Lead', rank=1, role_link=Role.objects.create(name='Leads', can_manage_projects=True)
+        )
+        MemberProfile.objects.create(user=self.user, team_position=position)
+
+    def test_union_of_sources(self):
+        perms = resolve_permissions(User.objects.get(pk=self.user.pk))
+        self.assertIn('can_manage_projects', perms)  # position's linked role
+        self.assertIn('can_manage_gallery', perms)  # implied by can_manage_content
+        self.assertNotIn('can_manage_users', perms)
+        self.assertNotIn('can_manage_everything', perms)
+
+        self.user.user_roles.add(Role.objects.create(name='WEB_LEAD'))
+        self.assertIn('can_manage_everything', resolve_permissions(User.objects.get(pk=self.user.pk)))
+
+    def test_resolved_once_per_user_object(self):
+        user = User.objects.get(pk=self.user.pk)
+        resolve_permissions(user)
+        with self.assertNumQueries(0):
+            self.assertTrue(has_flag(user, 'can_manage_projects'))
+            self.assertFalse(has_flag(user, 'can_manage_users'))
+
+    def test_payload_lists_the_resolved_flags(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = client.get('/api/me/').json()['permissions']
+        self.assertEqual(payload, sorted(resolve_permissions(User.objects.get(pk=self.user.pk))))
+        self.assertIn('can_manage_gallery', payload)
+
+
+class PermissionClaimTests(TestCase):
+    """users.tokens: access tokens carry flags that are trusted only at the user's current permissions_version."""
+
+    def setUp(self):
+        cache.clear()
+        self.security = Role.objects.create(name='Security', can_manage_security=True)
+        self.client = APIClient()
+
+    def _login(self, user):
+        response = self.client.post('/api/login/', {'username': user.username, 'password': 'x'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def _create_role(self, access, name):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        status = self.client.post('/api/roles/', {'name': name}, format='json').status_code
+        self.client.credentials()
+        return status
+
+    def test_claim_is_trusted_at_its_version(self):
+        user = User.objects.create_user('member', password='x')
+        claim = AccessToken(self._login(user)['access'])
+        self.assertEqual((claim['perms'], claim['pv']), ([], 0))
+
+        # The claim wins over the database while the versions match...
+        forged = {'perms': ['can_manage_users'], 'pv': 0}
+        self.assertEqual(resolve_permissions(User.objects.get(pk=user.pk), forged), {'can_manage_users'})
+        # ...and is ignored once they differ
+        self.assertEqual(resolve_permissions(User.objects.get(pk=user.pk), {**forged, 'pv': 1}), frozenset())
+
+    def test_role_and_position_changes_revoke(self):
+        user = User.objects.create_user('member', password='x')
+        user.user_roles.add(self.security)
+        access = self._login(user)['access']
+        self.assertEqual(self._create_role(access, 'A'), 201)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.user_roles.remove(self.security)
+        self.assertEqual(self._create_role(access, 'B'), 403)
+
+        position = TeamPosition.objects.create(name='Web Lead', rank=1, role_link=self.security)
+        profile = MemberProfile.objects.create(user=user, team_position=position)
+        access = self._login(user)['access']
+        self.assertEqual(self._create_role(access, 'C'), 201)
+        profile.team_position = None
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(self._create_role(access, 'D'), 403)
+
+    def test_superuser_demotion_revokes(self):
+        admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+        access = self._login(admin)['access']
+        self.assertEqual(self._create_role(access, 'A'), 201)
+
+        admin.is_superuser = False
+        with self.captureOnCommitCallbacks(execute=True):
+            admin.save()
+        self.assertEqual(User.objects.get(pk=admin.pk).permissions_version, 1)
+        self.assertEqual(self._create_role(access, 'B'), 403)
+
+        # Saving only other fields leaves the claims alone
+        admin.first_name = 'Ex'
+        admin.save(update_fields=['first_name'])
+        self.assertEqual(User.objects.get(pk=admin.pk).permissions_version, 1)
+
+    def test_refresh_rederives_the_claim(self):
+        user = User.objects.create_user('member', password='x')
+        refresh = self._login(user)['refresh']
+        with self.captureOnCommitCallbacks(execute=True):
+            user.user_roles.add(self.security)
+
+        response = self.client.post('/api/login/refresh/', {'refresh': refresh}, format='json')
+        access = AccessToken(response.data['access'])
+        self.assertEqual((access['perms'], access['pv']), (['can_manage_everything', 'can_manage_security'], 1))
+        self.assertEqual(self._create_role(response.data['access'], 'A'), 201)
+
+
+class ReferenceDataTests(TestCase):
+    """users.refdata: served from the snapshot, reloaded when any worker bumps the shared version."""
+
+    def setUp(self):
+        cache.clear()
+        refdata.invalidate()
+        self.sig = Sig.objects.create(name='Automation')
+        self.client = APIClient()
+
+    def test_list_is_query_free_until_changed(self):
+        self.assertEqual([s['name'] for s in self.client.get('/api/sigs/').data], ['Automation'])
+        with self.assertNumQueries(0):
+            self.client.get('/api/sigs/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Sig.objects.create(name='Robotics')
+        self.assertEqual([s['name'] for s in self.client.get('/api/sigs/').data], ['Automation', 'Robotics'])
+
+    def test_another_workers_bump_reloads(self):
+        before = refdata.get_snapshot()
+        Sig.objects.filter(pk=self.sig.pk).update(name='Renamed')  # no signal, as in another process
+        refdata.versions.bump('all')
+        with mock.patch.object(refdata, 'CHECK_INTERVAL', 0):
+            after = refdata.get_snapshot()
+        self.assertIsNot(after, before)
+        self.assertEqual(refdata.sig_by_name('renamed'), after.sigs_by_id[self.sig.pk])
+
+    def test_query_parameters_use_the_queryset(self):
+        response = self.client.get('/api/sigs/', {'fields': 'name'})
+        self.assertEqual(response.data, [{'name': 'Automation'}])
+
+    def test_receivers_are_per_model(self):
+        # A sender-less delete receiver would turn off fast deletes for every model
+        self.assertFalse(post_delete.has_listeners(AuditLog))
+
+
+class AuditWriterTests(TransactionTestCase):
+    """users.audit: the background writer's batching, overflow policies and shutdown flush."""
+
+    def _writer(self, **conf):
+        settings_patch = override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'ASYNC': True, **conf})
+        settings_patch.enable()
+        self.addCleanup(settings_patch.disable)
+        writer = audit.AuditWriter()
+        self.addCleanup(writer.flush)
+        return writer
+
+    def _entries(self, n, kind='TEST'):
+        return [AuditLog(event_type=kind, target=f'entry {i}') for i in range(n)]
+
+    def _wait_for(self, writer, written):
+        deadline = time.monotonic() + 5
+        while writer.counters['written'] < written and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_batches_are_written_by_the_thread(self):
+        writer = self._writer(BATCH_SIZE=3, FLUSH_INTERVAL=0.05)
+        with mock.patch.object(AuditLog.objects, 'bulk_create', wraps=AuditLog.objects.bulk_create) as bulk:
+            for entry in self._entries(5):
+                writer.submit(entry)
+            self._wait_for(writer, 5)
+        self.assertEqual(AuditLog.objects.count(), 5)
+        self.assertEqual(writer.counters, {'queued': 5, 'written': 5, 'dropped': 0, 'failed': 0, 'inline': 0})
+        self.assertLessEqual(bulk.call_count, 2)
+
+    def test_overflow_policies(self):
+        writer = self._writer(MAX_QUEUE=1, FLUSH_INTERVAL=60)
+        first, second = self._entries(2, 'SYNC')
+        # No consumer thread: the queue stays full
+        writer._queue = queue.Queue(maxsize=1)
+        with mock.patch.object(writer, '_ensure_started'), mock.patch.object(audit, 'close_old_connections') as recycle:
+            writer.submit(first)
+            with transaction.atomic():
+                writer.submit(second)  # inline, on this thread
+                AuditLog.objects.create(event_type='SAME_TRANSACTION', target='-')
+        recycle.assert_not_called()
+        self.assertEqual(writer.counters['inline'], 1)
+        self.assertEqual(AuditLog.objects.filter(event_type__in=['SYNC', 'SAME_TRANSACTION']).count(), 2)
+
+        with override_settings(AUDIT_LOG={**settings.AUDIT_LOG, 'OVERFLOW': 'drop'}), \
+                mock.patch.object(writer, '_ensure_started'):
+            writer.submit(self._entries(1, 'DROPPED')[0])
+        self.assertEqual(writer.counters['dropped'], 1)
+        self.assertFalse(AuditLog.objects.filter(event_type='DROPPED').exists())
+
+    def test_flush_writes_what_is_still_queued(self):
+        writer = self._writer(BATCH_SIZE=100, FLUSH_INTERVAL=60)
+        for entry in self._entries(3):
+            writer.submit(entry)
+        self.assertEqual(AuditLog.objects.count(), 0)
+        writer.flush()
+        self.assertFalse(writer._thread.is_alive())
+        self.assertEqual(AuditLog.objects.count(), 3)
+
+    def test_inline_mode_keeps_the_request_connection(self):
+        # Under tests ASYNC is off: writing inline must not close the connection mid-transaction
+        with transaction.atomic(), mock.patch.object(audit, 'close_old_connections') as recycle:
+            audit.record('INLINE', 'target')
+        recycle.assert_not_called()
+        self.assertTrue(AuditLog.objects.filter(event_type='INLINE').exists())
+
+
+class AuditLogApiTests(TestCase):
+    """/api/audit-logs/: keyset pages over (created_at, id) and combinable filters."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+        self.other = User.objects.create_user('other')
+        start = timezone.now() - timedelta(days=10)
+        # Pairs share a timestamp, so paging must break ties on id
+        AuditLog.objects.bulk_create([
+            AuditLog(
+                event_type='USER_LOGIN' if i % 2 else 'ROLE_CREATED',
+                actor=self.admin if i % 3 else self.other,
+                target=f't{i}',
+                ip_address='10.0.0.1' if i < 10 else '10.0.0.2',
+                success=i % 5 != 0,
+                created_at=start + timedelta(days=i // 2),
+            )
+            for i in range(20)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _targets(self, **params):
+        response = self.client.get('/api/audit-logs/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['target'] for row in response.data['results']]
+
+    def test_cursor_pages_cover_every_row_once(self):
+        expected = list(AuditLog.objects.values_list('target', flat=True))
+        seen, url = [], '/api/audit-logs/?limit=6'
+        while url:
+            page = self.client.get(url).data
+            self.assertLessEqual(len(page['results']), 6)
+            seen += [row['target'] for row in page['results']]
+            url = page['next']
+        self.assertEqual(seen, expected)
+
+        previous = self.client.get(self.client.get('/api/audit-logs/?limit=6').data['next']).data['previous']
+        self.assertEqual([row['target'] for row in self.client.get(previous).data['results']], expected[:6])
+
+    def test_filters_combine(self):
+        since = (timezone.now() - timedelta(days=6)).isoformat()
+        matches = AuditLog.objects.filter(
+            event_type='USER_LOGIN', actor=self.admin, ip_address='10.0.0.2', success=True,
+            created_at__gte=since,
+        ).values_list('target', flat=True)
+        self.assertEqual(
+            self._targets(event_type='USER_LOGIN', actor='admin', ip='10.0.0.2', success='true', since=since),
+            list(matches),
+        )
+        self.assertEqual(self._targets(actor=self.other.id, success='0'), ['t15', 't0'])
+        self.assertEqual(self._targets(until=(timezone.now() - timedelta(days=9, hours=12)).isoformat()), ['t1', 't0'])
+        self.assertEqual(self._targets(actor='nobody'), [])
+
+    def test_bad_filter_values(self):
+        for params in ({'since': 'yesterday'}, {'until': '2024-13-01'}, {'success': 'maybe'}):
+            response = self.client.get('/api/audit-logs/', params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.data)
+        self.assertEqual(self.client.get('/api/audit-logs/', {'cursor': 'garbage'}).status_code, 404)
+
+
+class AuditRetentionTests(TestCase):
+    """users.retention and `manage.py purge_audit_logs`: bounded batches behind a date cutoff."""
+
+    def setUp(self):
+        now = timezone.now()
+        # 25 expired rows, one just inside the 30-day window and four recent ones
+        ages = [timedelta(days=40, minutes=i) for i in range(25)]
+        ages += [timedelta(days=30) - timedelta(hours=1)] + [timedelta(days=i) for i in range(4)]
+        AuditLog.objects.bulk_create([
+            AuditLog(event_type='OLD' if age > timedelta(days=30) else 'KEPT', target=f't{i}', created_at=now - age)
+            for i, age in enumerate(ages)
+        ])
+
+    def test_chunked_purge_stops_at_the_cutoff(self):
+        batches = []
+        stats = retention.purge_audit_logs(30, batch_size=10, pause=0, progress=lambda *args: batches.append(args[:2]))
+        self.assertEqual((stats['deleted'], stats['batches'], stats['archive']), (25, 3, None))
+        self.assertEqual(batches, [(10, 1), (20, 2), (25, 3)])
+        self.assertEqual(set(AuditLog.objects.values_list('event_type', flat=True)), {'KEPT'})
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+    def test_archive_holds_the_deleted_rows(self):
+        expected = set(AuditLog.objects.filter(event_type='OLD').values_list('id', flat=True))
+        with tempfile.TemporaryDirectory() as directory:
+            stats = retention.purge_audit_logs(30, batch_size=7, pause=0, archive_dir=directory)
+            with gzip.open(stats['archive'], 'rt', encoding='utf-8') as archive:
+                rows = [json.loads(line) for line in archive]
+        self.assertEqual({row['id'] for row in rows}, expected)
+        self.assertEqual(set(rows[0]), set(retention.ARCHIVE_FIELDS))
+
+    def test_command_and_dry_run(self):
+        out = StringIO()
+        call_command('purge_audit_logs', days=30, dry_run=True, stdout=out)
+        self.assertIn('Would delete 25 audit logs', out.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 30)
+
+        call_command('purge_audit_logs', days=30, batch_size=20, pause=0, archive_dir=None, stdout=out)
+        self.assertIn('Deleted 25 audit logs in 2 batches', out.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+
+class PublicTeamSnapshotTests(TestCase):
+    """/api/team/public/: a precomputed payload per kind and host, revalidated with its ETag."""
+
+    def setUp(self):
+        cache.clear()
+        self.member = MemberProfile.objects.create(user=User.objects.create_user('member'), full_name='Member One')
+        MemberProfile.objects.create(user=User.objects.create_user('alum'), full_name='Alum', is_alumni=True)
+        self.client = APIClient()
+
+    def _get(self, **headers):
+        return self.client.get('/api/team/public/', **headers)
+
+    def test_etag_and_not_modified(self):
+        first = self._get()
+        self.assertEqual([m['username'] for m in first.json()], ['member'])
+        etag = first['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get()['ETag'], etag)
+            for header in (etag, f'"stale", {etag}', '*'):
+                response = self._get(HTTP_IF_NONE_MATCH=header)
+                self.assertEqual((response.status_code, response.content), (304, b''))
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH='"stale"').status_code, 200)
+
+    def test_changes_rebuild_the_snapshot(self):
+        etag = self._get()['ETag']
+        # A login alone does not touch the public payload
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.user.save(update_fields=['last_login'])
+        self.assertEqual(self._get()['ETag'], etag)
+
+        self.member.full_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.member.save()
+        response = self._get()
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['profile']['full_name'], 'Renamed')
+
+    def test_kinds_and_hosts_are_separate(self):
+        self.assertEqual([m['username'] for m in self.client.get('/api/team/public/', {'type': 'alumni'}).json()], ['alum'])
+        self.assertEqual([m['username'] for m in self.client.get('/api/team/public/', {'type': 'bogus'}).json()], ['member'])
+
+        self._get()
+        with CaptureQueriesContext(connection) as other_host:
+            self._get(HTTP_HOST='robotech.nitk.ac.in')
+        self.assertGreater(len(other_host), 0)  # absolute URLs differ per host
+        with self.assertNumQueries(0):
+            self._get()
+            self._get(HTTP_HOST='robotech.nitk.ac.in')
+
+
+class AuthQueryBenchmarkTests(TestCase):
+    """Queries per request with the default SimpleJWT auth vs. the cached user loader."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('bench', password='x')
+        self.user.user_roles.add(Role.objects.create(name='Projects', can_manage_projects=True))
+        profile = MemberProfile.objects.create(user=self.user, full_name='Bench User')
+        profile.sigs.add(Sig.objects.create(name='Automation'))
+        for i in range(3):
+            Project.objects.create(title=f'P{i}', description='-', lead=self.user, is_public=True)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def _count(self, auth_class, url):
+        with mock.patch.object(APIView, 'authentication_classes', [auth_class]):
+            self.client.get(url)  # warm-up (fills the cache for the cached loader)
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx)
+
+    def test_cached_loader_saves_queries(self):
+        # The cached loader drops the per-request user SELECT
+        for url in ('/api/me/', '/api/projects/'):
+            before = self._count(JWTAuthentication, url)
+            self.assertEqual(self._count(CachedJWTAuthentication, url), before - 1)
+
+    def test_profile_change_invalidates_bundle(self):
+        self.client.get('/api/me/')
+        profile = self.user.profile
+        profile.full_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            profile.save()
+        self.assertEqual(self.client.get('/api/me/').json()['profile']['full_name'], 'Renamed')
+
+
+class MePayloadCacheTests(TestCase):
+    """/api/me/: cached per user, revalidated with ETags, rebuilt when anything it shows changes."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('me', password='x')
+        MemberProfile.objects.create(user=self.user, full_name='Me')
+        self.project = Project.objects.create(title='P', description='-', lead=User.objects.create_user('lead'))
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def _etag(self):
+        response = self.client.get('/api/me/')
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_revalidation_is_query_free(self):
+        with mock.patch.object(APIView, 'authentication_classes', [CachedJWTAuthentication]):
+            etag = self._etag()
+            with self.assertNumQueries(0):
+                response = self.client.get('/api/me/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_changes_produce_a_new_etag(self):
+        etag = self._etag()
+        self.assertEqual(self._etag(), etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MemberProfile.objects.filter(user=self.user).get().save()
+        self.assertEqual(self._etag(), etag)  # same content, same ETag
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.members.add(self.user)
+        joined = self._etag()
+        self.assertNotEqual(joined, etag)
+        self.assertEqual(self.client.get('/api/me/').json()['projects_info']['member'][0]['title'], 'P')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_roles.add(Role.objects.create(name='Projects', can_manage_projects=True))
+        self.assertNotEqual(self._etag(), joined)
+
+
+class UserManagementListTests(TestCase):
+    """/api/management/ must cost the same number of queries however many users it lists."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.role = Role.objects.create(name='Projects', can_manage_projects=True)
+        self.sig = Sig.objects.create(name='Automation')
+        self.seq = 0
+
+    def _add_users(self, n):
+        for _ in range(n):
+            self.seq += 1
+            user = User.objects.create_user(f'u{self.seq}', email=f'u{self.seq}@x.com', password='x')
+            user.user_roles.add(self.role)
+            profile = MemberProfile.objects.create(user=user, full_name=f'Member {self.seq}', position='Member')
+            profile.sigs.add(self.sig)
+            project = Project.objects.create(title=f'P{self.seq}', description='-', lead=user)
+            project.members.add(user)
+
+    def _count(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.data
+
+    def test_query_count_is_constant(self):
+        self._add_users(3)
+        self.client.get('/api/management/')  # warm-up (loads the reference-data snapshot)
+        small, _ = self._count('/api/management/')
+        self._add_users(12)
+        large, data = self._count('/api/management/')
+        self.assertEqual(small, large)
+        self.assertEqual(large, 5)
+        self.assertEqual(data[1]['projects_info']['led'][0]['title'], 'P1')
+
+    def test_paginated_filters(self):
+        self._add_users(5)
+        MemberProfile.objects.filter(user__username='u2').update(is_alumni=True)
+
+        _, page = self._count('/api/management/?page=1&page_size=2&ordering=-name&sig=Automation')
+        self.assertEqual(page['count'], 5)
+        self.assertEqual([u['username'] for u in page['results']], ['u5', 'u4'])
+
+        _, page = self._count('/api/management/?page=1&alumni=true')
+        self.assertEqual([u['username'] for u in page['results']], ['u2'])
+
+        _, page = self._count(f'/api/management/?page=1&search=member 3&role={self.role.id}')
+        self.assertEqual([u['username'] for u in page['results']], ['u3'])
+
+
+class BulkImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('admin', 'admin@x.com', 'x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        Sig.objects.create(name='Automation')
+        Role.objects.create(name='Projects', can_manage_projects=True)
+
+    def test_import_with_error_report(self):
+        rows = [
+            {'username': f'new{i}', 'password': 'pw-12345', 'full_name': f'New {i}', 'sigs': 'Automation', 'roles': 'Projects'}
+            for i in range(40)
+        ]
+        rows += [{'username': 'admin'}, {'username': 'bad', 'sigs': 'Nope'}, {'full_name': 'No Username'}]
+
+        # Hashed in a pool whose workers are not forks of the (threaded) web worker
+        with mock.patch.object(imports, 'ProcessPoolExecutor', wraps=imports.ProcessPoolExecutor) as pool, \
+                mock.patch('os.cpu_count', return_value=2):
+            response = self.client.post('/api/management/bulk_import/', {'rows': rows}, format='json')
+        pool.assert_called_once()
+        self.assertNotEqual(pool.call_args.kwargs['mp_context'].get_start_method(), 'fork')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 40)
+        self.assertEqual([e['row'] for e in response.data['errors']], [41, 42, 43])
+
+        user = User.objects.get(username='new7')
+        self.assertTrue(user.check_password('pw-12345'))
+        self.assertEqual(user.profile.full_name, 'New 7')
+        self.assertEqual([s.name for s in user.profile.sigs.all()], ['Automation'])
+        self.assertEqual([r.name for r in user.user_roles.all()], ['Projects'])
+
+    def test_csv_dry_run(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        csv_file = SimpleUploadedFile('members.csv', b'username,full_name,year_of_joining\ncsv1,CSV One,2024\ncsv2,CSV Two,soon\n')
+        response = self.client.post('/api/management/bulk_import/?dry_run=true', {'file': csv_file})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['valid'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        self.assertFalse(User.objects.filter(username='csv1').exists())
+
+    def test_command_hashes_in_a_pool(self):
+        rows = [{'username': f'cmd{i}', 'password': 'pw-12345'} for i in range(imports.POOL_THRESHOLD)]
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fh:
+            json.dump(rows, fh)
+            fh.flush()
+            call_command('import_members', fh.name, '--workers', '2', stdout=StringIO())
+        self.assertTrue(User.objects.get(username='cmd3').check_password('pw-12345'))
+
+
+class ProfileRelationsTests(TestCase):
+    """Legacy sig/position strings -> primary_sig / team_position FKs."""
+
+    def setUp(self):
+        cache.clear()
+        self.sig = Sig.objects.create(name='Automation')
+        self.lead = TeamPosition.objects.create(
+            name='Tech Lead', rank=1, role_link=Role.objects.create(name='Leads', can_manage_projects=True)
+        )
+
+    def test_backfill_links_and_is_idempotent(self):
+        for i, (sig, pos) in enumerate([('automation', 'TECH LEAD'), ('Robotics', 'Member'), ('', '')]):
+            u = User.objects.create_user(f'legacy{i}', password='x')
+            MemberProfile.objects.create(user=u, legacy_sig=sig, legacy_position=pos)
+
+        report = backfill_profile_relations(MemberProfile, Sig, TeamPosition)
+        self.assertEqual((report['positions'], report['sigs']), (1, 1))
+        self.assertEqual((report['unmatched_positions'], report['unmatched_sigs']), (['Member'], ['Robotics']))
+
+        profile = MemberProfile.objects.get(user__username='legacy0')
+        self.assertEqual((profile.team_position, profile.primary_sig), (self.lead, self.sig))
+        self.assertEqual((profile.position, profile.sig), ('Tech Lead', 'Automation'))
+        self.assertEqual(list(profile.sigs.all()), [self.sig])
+
+        again = backfill_profile_relations(MemberProfile, Sig, TeamPosition, create_missing=True)
+        self.assertEqual((again['positions'], again['sigs'], again['unmatched_positions']), (1, 1, []))
+        refdata.invalidate()  # as the management command does after creating rows
+        self.assertEqual(MemberProfile.objects.get(user__username='legacy1').position, 'Member')
+
+    def test_compat_fields_and_permissions_follow_the_fk(self):
+        user = User.objects.create_user('member', password='x')
+        profile = MemberProfile.objects.create(user=user, position='tech lead', sig='AUTOMATION')
+        self.assertEqual((profile.team_position_id, profile.primary_sig_id), (self.lead.id, self.sig.id))
+        self.assertIn('can_manage_projects', resolve_permissions(User.objects.get(pk=user.pk)))
+
+        admin = User.objects.create_superuser('admin', password='x')
+        client = APIClient()
+        client.force_authenticate(admin)
+        client.patch(f'/api/sigs/{self.sig.id}/', {'name': 'Automation & AI'}, format='json')
+        profile = client.get(f'/api/management/{user.id}/').data['profile']
+        self.assertEqual((profile['sig'], profile['position']), ('Automation & AI', 'Tech Lead'))
+        self.assertNotIn('legacy_sig', profile)
+
+    def test_migration_keeps_unmatched_legacy_names(self):
+        migration = import_module('users.migrations.0017_memberprofile_relations')
+        for i, (sig, pos) in enumerate([('automation', 'Tech Lead'), ('Robotics', 'Member'), ('robotics ', 'member')]):
+            MemberProfile.objects.create(user=User.objects.create_user(f'legacy{i}'), legacy_sig=sig, legacy_position=pos)
+
+        migration.backfill(django_apps, None)
+        self.assertEqual(sorted(Sig.objects.values_list('name', flat=True)), ['Automation', 'Robotics'])
+        links = MemberProfile.objects.order_by('pk').values_list('primary_sig__name', 'team_position__name')
+        self.assertEqual(list(links), [('Automation', 'Tech Lead'), ('Robotics', 'Member'), ('Robotics', 'Member')])
+        self.assertEqual(MemberProfile.sigs.through.objects.count(), 3)
+
+    def test_unknown_names_are_rejected(self):
+        user = User.objects.create_user('member', password='x')
+        MemberProfile.objects.create(user=user, sig='Automation')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.patch('/api/me/', {'sig': 'Mechanical'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sig', response.data)
+        self.assertEqual(MemberProfile.objects.get(user=user).sig, 'Automation')
+        self.assertEqual(client.patch('/api/me/', {'sig': ''}, format='json').status_code, 200)
+        self.assertIsNone(MemberProfile.objects.get(user=user).primary_sig_id)
+
+        client.force_authenticate(User.objects.create_superuser('admin', password='x'))
+        response = client.put(f'/api/management/{user.id}/', {'position': 'Captain'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('position', response.data)
+        response = client.put(f'/api/management/{user.id}/', {'position': 'tech lead'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(MemberProfile.objects.get(user=user).team_position, self.lead)
+
+
+class MemberSearchTests(TestCase):
+    """users.search: ranked prefix matching, maintained by signals."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@x.com', 'x'))
+        self.sig = Sig.objects.create(name='Automation')
+        lead = TeamPosition.objects.create(name='Web Lead', rank=1)
+
+        def member(username, full_name, **fields):
+            user = User.objects.create_user(username, email=f'{username}@x.com', password='x')
+            return MemberProfile.objects.create(user=user, full_name=full_name, **fields)
+
+        self.aditya = member('aditya', 'Aditya Rao', team_position=lead, department='Electronics')
+        self.aditya.sigs.add(self.sig)
+        member('meera', 'Meera Nair', description='Worked with Aditya on the web portal', roll_number='211EC142')
+        member('kiran', 'Kiran', custom_fields={'tshirt': 'XL', 'hometown': 'Mangaluru'})
+
+    def _search(self, q, **params):
+        response = self.client.get('/api/management/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [u['username'] for u in response.data['results']]
+
+    def test_ranked_prefix_matches(self):
+        # A name hit outranks a mention in the description
+        self.assertEqual(self._search('adi'), ['aditya', 'meera'])
+        self.assertEqual(self._search('adi web'), ['aditya', 'meera'])
+        self.assertEqual(self._search('211ec'), ['meera'])
+        self.assertEqual(self._search('mangal'), ['kiran'])
+        self.assertEqual(self._search('autom'), ['aditya'])
+        self.assertEqual(self._search('adi', page_size=1), ['aditya'])
+        self.assertEqual(self.client.get('/api/management/search/', {'q': '  '}).status_code, 400)
+
+    def test_index_follows_changes(self):
+        self.sig.name = 'Robotics'
+        self.sig.save()
+        self.assertEqual(self._search('robot'), ['aditya'])
+        self.assertEqual(self._search('autom'), [])
+
+        self.aditya.sigs.clear()
+        self.assertEqual(self._search('robot'), [])
+
+        self.aditya.delete()
+        self.assertEqual(self._search('adi'), ['meera'])
+
+    def test_rank_inside_a_subquery(self):
+        # Django relabels the tables of a subquery; the rank must follow the join's alias
+        best = search.search_users(User.objects.all(), 'adi').order_by('-search_rank').values('pk')[:1]
+        self.assertEqual(list(User.objects.filter(pk__in=best).values_list('username', flat=True)), ['aditya'])
+
+    def test_migration_builds_the_index(self):
+        migration = import_module('users.migrations.0019_member_search')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE users_membersearch')
+        editor = mock.Mock(connection=connection)
+        editor.execute.side_effect = lambda sql: connection.cursor().execute(sql)
+        migration.create_index(django_apps, editor)
+        self.assertEqual(self._search('adi'), ['aditya', 'meera'])
+        self.assertEqual(self._search('autom'), ['aditya'])
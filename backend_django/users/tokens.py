@@ -0,0 +1,53 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from .permissions import resolve_permissions, PERMISSIONS_CLAIM, PERMISSIONS_VERSION_CLAIM
+from .authentication import invalidate_cached_user
+
+User = get_user_model()
+
+
+def add_permission_claims(token, user):
+    """Stamp the user's resolved flags and the version they were computed at."""
+    token[PERMISSIONS_CLAIM] = sorted(resolve_permissions(user))
+    token[PERMISSIONS_VERSION_CLAIM] = user.permissions_version
+    return token
+
+
+def bump_permissions_version(user_ids):
+    """Invalidate permission claims already minted for these users (applied on commit)."""
+    user_ids = {uid for uid in user_ids if uid}
+    if not user_ids:
+        return
+
+    def _bump():
+        User.objects.filter(pk__in=user_ids).update(permissions_version=F('permissions_version') + 1)
+        # .update() skips post_save, so drop the cached auth bundles explicitly
+        for uid in user_ids:
+            invalidate_cached_user(uid)
+
+    transaction.on_commit(_bump)
+
+
+class PermissionTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """/api/login/ - access tokens carry the caller's permission flags."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_permission_claims(super().get_token(user), user)
+
+
+class PermissionTokenRefreshSerializer(TokenRefreshSerializer):
+    """/api/login/refresh/ - re-derive the claim so refreshed tokens pick up changes."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: access[api_settings.USER_ID_CLAIM]}).first()
+        if user:
+            add_permission_claims(access, user)
+            data['access'] = str(access)
+        return data
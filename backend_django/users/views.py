@@ -1,61 +1,117 @@
-from rest_framework import generics, permissions, status, viewsets
+from rest_framework import permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.views import APIView
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import transaction
+from django.db.models import Q
 from .models import Role, MemberProfile, Sig, ProfileFieldDefinition, TeamPosition, AuditLog
 from .serializers import (
     UserSerializer, RoleSerializer, MemberProfileSerializer, 
     SigSerializer, ProfileFieldDefinitionSerializer, TeamPositionSerializer, AuditLogSerializer
 )
-from .permissions import GlobalPermission
+from .permissions import GlobalPermission, has_flag
+from .pagination import AuditLogCursorPagination, MemberSearchPagination, UserPagination
+from .exports import AuditLogExport, UserExport
+from . import refdata, audit, retention, team_snapshot, imports, search, me_cache
+from core.conditional import conditional_response
+from core.fieldsets import SparseQuerysetMixin
+from core.reorder import ReorderMixin, parse_positions, apply_positions
+from .authentication import invalidate_cached_user
 import json
-import csv
-from django.http import HttpResponse
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
 
 User = get_user_model()
 
 # --- HELPER: AUDIT LOGGER ---
 def log_audit(request, event, target, details=""):
-    try:
-        ip = request.META.get('REMOTE_ADDR')
-        AuditLog.objects.create(
-            event_type=event,
-            actor=request.user if request.user.is_authenticated else None,
-            target=target,
-            ip_address=ip,
-            details=str(details)
-        )
-    except: pass
+    # Buffered: written in batches off the request path (see users.audit)
+    audit.record(
+        event_type=event,
+        actor=request.user if request.user.is_authenticated else None,
+        target=target,
+        ip_address=request.META.get('REMOTE_ADDR'),
+        details=details
+    )
+
+# --- HELPER: PROFILE NAMES ---
+def validate_profile_names(data, fields=('sig', 'position')):
+    """400 for a sig / position name with no Sig / TeamPosition row, checked before anything is saved."""
+    names = {field: data[field] for field in fields if field in data}
+    if names:
+        MemberProfileSerializer(data=names, partial=True).is_valid(raise_exception=True)
+
+# --- HELPER: REFERENCE DATA ---
+class ReferenceDataMixin:
+    """
+    Serve the plain list response from the process-wide reference-data
+    snapshot (zero queries). A list with query parameters, filter backends or
+    pagination goes through get_queryset()/filter_queryset() as usual.
+    """
+    refdata_attr = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params or self.filter_backends or self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+        items = getattr(refdata.get_snapshot(), self.refdata_attr)
+        return Response(self.get_serializer(items, many=True).data)
 
 # --- VIEWSETS ---
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = AuditLog.objects.all()
+class AuditLogViewSet(SparseQuerysetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = AuditLog.objects.select_related('actor')
     serializer_class = AuditLogSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = AuditLogCursorPagination
+
+    def get_queryset(self):
+        """
+        Filters: ?event_type= ?actor=<id|username> ?ip= ?success=true|false
+        ?since= / ?until= (ISO datetimes, created_at range)
+        """
+        qs = super().get_queryset()
+        params = self.request.query_params
+
+        event_type = params.get('event_type') or params.get('eventType')
+        if event_type:
+            qs = qs.filter(event_type=event_type)
+
+        actor = params.get('actor')
+        if actor:
+            qs = qs.filter(actor_id=actor) if actor.isdigit() else qs.filter(actor__username=actor)
+
+        ip = params.get('ip')
+        if ip:
+            qs = qs.filter(ip_address=ip)
+
+        success = params.get('success')
+        if success:
+            if success.lower() not in ('true', '1', 'false', '0'):
+                raise ValidationError({'success': "Expected true or false."})
+            qs = qs.filter(success=success.lower() in ('true', '1'))
+
+        for param, lookup in (('since', 'created_at__gte'), ('until', 'created_at__lt')):
+            value = params.get(param)
+            if value:
+                parsed = parse_datetime(value)
+                if parsed is None:
+                    raise ValidationError({param: "Invalid datetime, expected ISO 8601."})
+                if timezone.is_naive(parsed):
+                    parsed = timezone.make_aware(parsed)
+                qs = qs.filter(**{lookup: parsed})
+        return qs
 
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="audit_logs.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Event Type', 'Actor', 'Target', 'IP Address', 'Details', 'Created At'])
-
-        for log in self.queryset.all():
-            writer.writerow([
-                log.event_type,
-                log.actor.username if log.actor else 'System/Proton',
-                log.target,
-                log.ip_address,
-                log.details,
-                log.created_at.strftime("%Y-%m-%d %H:%M:%S")
-            ])
-        return response
+        """Streams the (filtered) log as CSV, or NDJSON with ?fmt=ndjson."""
+        return AuditLogExport(self.get_queryset()).response(request)
+
+    @action(detail=False, methods=['get'])
+    def pipeline_stats(self, request):
+        """Counters of the buffered audit writer in this worker (queued/written/dropped/failed)."""
+        return Response(audit.writer.counters)
 
     @action(detail=False, methods=['post'])
     def delete_old_logs(self, request):
@@ -65,20 +121,91 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
         
         try:
             days = int(days)
-            cutoff_date = timezone.now() - timedelta(days=days)
-            deleted_count, _ = AuditLog.objects.filter(created_at__lt=cutoff_date).delete()
-            log_audit(request, "LOGS_CLEANED", f"Deleted {deleted_count} logs older than {days} days")
-            return Response({"status": "success", "deleted_count": deleted_count})
         except ValueError:
              return Response({"error": "Invalid days parameter"}, status=status.HTTP_400_BAD_REQUEST)
 
-class UserViewSet(viewsets.ModelViewSet):
+        # Chunked purge runs in the background (users.retention); poll purge_status for progress
+        job_id = retention.enqueue_purge(
+            days,
+            actor=request.user,
+            ip_address=request.META.get('REMOTE_ADDR'),
+            archive_dir=settings.AUDIT_LOG.get('ARCHIVE_DIR'),
+        )
+        return Response({"status": "queued", "job": job_id}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=['get'])
+    def purge_status(self, request):
+        job = retention.get_job(request.query_params.get('job', ''))
+        if job is None:
+            return Response({"error": "Unknown job"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job)
+
+class UserViewSet(SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [GlobalPermission]
+    pagination_class = UserPagination
+
+    ORDERING = {
+        'name': ('profile__full_name', 'username'),
+        'username': ('username',),
+        'position': ('profile__order', 'profile__team_position__name'),
+        'joined': ('date_joined',),
+        'last_login': ('last_login',),
+    }
+
+    def get_queryset(self):
+        """
+        Filters: ?search= (full-text prefix match, users.search; best match first unless ?ordering=)
+        ?role=<id|name> ?sig=<id|name> ?alumni=true|false ?active=true|false
+        Ordering: ?ordering=name|username|position|joined|last_login (prefix '-' to reverse)
+        """
+        qs = super().get_queryset()
+        params = self.request.query_params
+
+        term = params.get('q' if self.action == 'search' else 'search', '').strip()
+        if term:
+            qs = search.search_users(qs, term)
+
+        role = params.get('role')
+        if role:
+            qs = qs.filter(user_roles__id=role) if role.isdigit() else qs.filter(Q(user_roles__name=role) | Q(role=role))
+
+        sig = params.get('sig')
+        if sig:
+            qs = qs.filter(profile__sigs__id=sig) if sig.isdigit() else qs.filter(profile__sigs__name__iexact=sig)
+
+        for param, lookup in (('alumni', 'profile__is_alumni'), ('active', 'is_active')):
+            value = params.get(param)
+            if value is not None and value != '':
+                qs = qs.filter(**{lookup: value.lower() in ('true', '1')})
+
+        if role or sig:
+            qs = qs.distinct()
+
+        ordering = params.get('ordering', '')
+        fields = self.ORDERING.get(ordering.lstrip('-'), ())
+        if ordering.startswith('-'):
+            fields = tuple('-' + f for f in fields)
+        elif not fields and term:
+            fields = ('-search_rank',)
+        return qs.order_by(*fields, 'id')
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        GET /api/management/search/?q=adi web -> ranked, paged member matches.
+        Every term is a prefix; the list filters (?role=, ?sig=, ...) still apply.
+        """
+        if not search.terms(request.query_params.get('q')):
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+        paginator = MemberSearchPagination()
+        page = paginator.paginate_queryset(self.filter_queryset(self.get_queryset()), request, view=self)
+        return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
 
     def create(self, request, *args, **kwargs):
         data = request.data
+        validate_profile_names(data)
         username = data.get('username')
         password = data.get('password')
         if not username or not password:
@@ -97,6 +224,7 @@ class UserViewSet(viewsets.ModelViewSet):
     def update(self, request, *args, **kwargs):
         user = self.get_object()
         data = request.data
+        validate_profile_names(data)
         changes = []
         
         if 'username' in data and data['username'] != user.username:
@@ -135,24 +263,34 @@ class UserViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="users.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Username', 'Email', 'Full Name', 'Role', 'Team Position', 'SIG', 'Status'])
-
-        for user in self.queryset.all():
-            profile = getattr(user, 'profile', None)
-            writer.writerow([
-                user.username,
-                user.email,
-                profile.full_name if profile else '',
-                user.role,
-                profile.position if profile else '',
-                profile.sig if profile else '',
-                'Active' if user.is_active else 'Inactive'
-            ])
-        return response
+        """Streams all users as CSV, or NDJSON with ?fmt=ndjson."""
+        return UserExport().response(request)
+
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        """
+        Create many members at once (see users.imports). Send a CSV/JSON file as
+        'file', or JSON {"rows": [...]}. ?dry_run=true only validates.
+        Returns the per-row error report; valid rows are imported.
+        """
+        upload = request.FILES.get('file')
+        try:
+            if upload:
+                rows = imports.read_rows(upload.read(), request.data.get('format'), upload.name)
+            else:
+                rows = imports.read_rows(request.data.get('rows', []))
+        except (imports.ImportFormatError, UnicodeDecodeError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = imports.import_members(
+            rows,
+            allow_sensitive=request.user.is_superuser or has_flag(request.user, 'can_manage_security'),
+            dry_run=request.query_params.get('dry_run', '').lower() in ('true', '1'),
+        )
+        if report['created']:
+            log_audit(request, "USERS_IMPORTED", f"Imported {report['created']} users",
+                      f"{len(report['errors'])} rows rejected")
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
         user = self.get_object()
@@ -175,7 +313,7 @@ class UserViewSet(viewsets.ModelViewSet):
         # Security permission check helper
         has_security_perm = (
             request_user.is_superuser or 
-            request_user.user_roles.filter(can_manage_security=True).exists()
+            has_flag(request_user, 'can_manage_security')
         )
 
         def set_if(field):
@@ -236,31 +374,32 @@ class UserViewSet(viewsets.ModelViewSet):
 
         if image_file: profile.image = image_file
         
-        if profile.position:
-             try:
-                 tp = TeamPosition.objects.filter(name__iexact=profile.position).first()
-                 if tp: profile.order = tp.rank
-                 else: profile.order = 100 
-             except: pass
+        if profile.team_position_id:
+             tp = refdata.get_snapshot().positions_by_id.get(profile.team_position_id)
+             profile.order = tp.rank if tp else 100
         
         profile.save()
         
     @action(detail=False, methods=['post'], url_path='reorder-team')
     def reorder_team(self, request):
-        items = request.data.get('items', [])
-        with transaction.atomic():
-            for item in items:
-                 uid = item.get('id')
-                 order = item.get('order')
-                 if uid and order is not None:
-                     MemberProfile.objects.filter(user_id=uid).update(order=order)
+        """Body: { "items": [ {"id": <user id>, "order": 0}, ... ] } -- one UPDATE for the whole list."""
+        positions = parse_positions(request.data.get('items', []))
+        # Users without a profile have no place on the team page; skip them as before
+        known = list(MemberProfile.objects.filter(user_id__in=positions).values_list('user_id', flat=True))
+        apply_positions(MemberProfile.objects.all(), {uid: positions[uid] for uid in known}, key='user_id')
+        # bulk .update() bypasses the save signals
+        team_snapshot.invalidate()
+        me_cache.invalidate(*known)
+        for uid in known:
+            invalidate_cached_user(uid)
         return Response({"status": "updated"})
 
 
-class RoleViewSet(viewsets.ModelViewSet):
+class RoleViewSet(ReferenceDataMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
     permission_classes = [GlobalPermission]
+    refdata_attr = 'roles'
 
     def perform_create(self, serializer):
         r = serializer.save()
@@ -276,66 +415,76 @@ class RoleViewSet(viewsets.ModelViewSet):
 
 # CMS & Taxonomy
 
-class SigViewSet(viewsets.ModelViewSet):
+class SigViewSet(ReferenceDataMixin, ReorderMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = Sig.objects.all()
     serializer_class = SigSerializer
     permission_classes = [GlobalPermission]
+    refdata_attr = 'sigs'
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         old = instance.name
         res = super().update(request, *args, **kwargs)
         if old != res.data['name']:
-             MemberProfile.objects.filter(sig=old).update(sig=res.data['name'])
+             # Profiles link to the Sig row, so the new name shows up without touching them
              log_audit(request, "SIG_RENAMED", f"Renamed SIG {old} to {res.data['name']}")
         return res
 
+    def reordered(self, positions):
+        refdata.invalidate() # bulk .update() bypasses the save signals
+
     @action(detail=False, methods=['post'], url_path='reorder-sigs')
     def reorder_sigs(self, request):
-        items = request.data.get('items', [])
-        with transaction.atomic():
-            for item in items:
-                 uid = item.get('id')
-                 order = item.get('order')
-                 if uid and order is not None:
-                     Sig.objects.filter(id=uid).update(order=order)
-        return Response({"status": "updated"})
+        return self.reorder(request)  # legacy path
 
-class TeamPositionViewSet(viewsets.ModelViewSet):
+class TeamPositionViewSet(ReferenceDataMixin, ReorderMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = TeamPosition.objects.all()
     serializer_class = TeamPositionSerializer
     permission_classes = [GlobalPermission]
-
-class ProfileFieldViewSet(viewsets.ModelViewSet):
+    refdata_attr = 'positions'
+    reorder_field = 'rank'
+
+    def reordered(self, positions):
+        refdata.invalidate() # bulk .update() bypasses the save signals
+        # A member's order follows their position's rank (as _update_profile sets it on save)
+        members = list(MemberProfile.objects.filter(team_position_id__in=positions).values_list('user_id', flat=True))
+        apply_positions(MemberProfile.objects.all(), positions, key='team_position_id')
+        team_snapshot.invalidate()
+        me_cache.invalidate(*members)
+        for uid in members:
+            invalidate_cached_user(uid)
+
+class ProfileFieldViewSet(ReferenceDataMixin, ReorderMixin, SparseQuerysetMixin, viewsets.ModelViewSet):
     queryset = ProfileFieldDefinition.objects.all()
     serializer_class = ProfileFieldDefinitionSerializer
     permission_classes = [GlobalPermission]
+    refdata_attr = 'profile_fields'
     
     def perform_create(self, serializer):
         f = serializer.save()
         log_audit(self.request, "FIELD_CREATED", f"Def field {f.label}")
 
+    def reordered(self, positions):
+        refdata.invalidate() # bulk .update() bypasses the save signals
+
     @action(detail=False, methods=['post'], url_path='reorder-fields')
     def reorder_fields(self, request):
-        items = request.data.get('items', [])
-        with transaction.atomic():
-            for item in items:
-                 uid = item.get('id')
-                 order = item.get('order')
-                 if uid and order is not None:
-                     ProfileFieldDefinition.objects.filter(id=uid).update(order=order)
-        return Response({"status": "updated"})
+        return self.reorder(request)  # legacy path
 
 class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated] # Bypass GlobalPermission, handled by method logic
 
     def get(self, request):
-        return Response(UserSerializer(request.user).data)
+        """Served from users.me_cache with a strong ETag; a matching If-None-Match gets a bodyless 304."""
+        payload = me_cache.get(request.user)
+        return conditional_response(request, payload['etag'], payload['body'], 'private, no-cache')
     
     def patch(self, request):
         user = request.user
         data = request.data
+        validate_profile_names(data, fields=('sig',))
         profile, _ = MemberProfile.objects.get_or_create(user=user)
+        user.profile = profile # replace the preloaded (cached) profile on request.user
         
         # User core fields
         if 'email' in data:
@@ -403,13 +552,14 @@ class UserProfileView(APIView):
         log_audit(request, "PROFILE_SELF_UPDATE", f"User {user.username} updated own profile")
         return Response(UserSerializer(user).data)
 
-class PublicTeamView(generics.ListAPIView):
+class PublicTeamView(APIView):
+    """
+    Public team page. Served from a precomputed snapshot (users.team_snapshot)
+    with a strong ETag; a matching If-None-Match gets a bodyless 304.
+    """
     permission_classes = [permissions.AllowAny]
-    serializer_class = UserSerializer
+    authentication_classes = []
 
-    def get_queryset(self):
-        qs = User.objects.filter(is_active=True, profile__is_public=True).select_related('profile').prefetch_related('user_roles')
-        m_type = self.request.query_params.get('type')
-        if m_type == 'alumni': qs = qs.filter(profile__is_alumni=True)
-        else: qs = qs.filter(profile__is_alumni=False)
-        return qs.order_by('profile__order', 'profile__full_name')
+    def get(self, request):
+        snapshot = team_snapshot.get(request.query_params.get('type', 'current'), request)
+        return conditional_response(request, snapshot['etag'], snapshot['body'], 'public, no-cache')
@@ -0,0 +1,109 @@
+import { useCallback, useEffect, useState } from "react";
+import api from "./axios";
+
+/**
+ * Paginated, members-only sub-resources of a project:
+ *   tasks | threads | join_requests  -> { count, next, previous, results }
+ */
+export const fetchProjectResource = (projectId, resource, params = {}) =>
+  api.get(`/projects/${projectId}/${resource}/`, { params });
+
+/**
+ * A thread's messages, newest first. Pass the previous page's `next` URL as
+ * `cursorUrl` to walk back through older messages.
+ */
+export const fetchThreadMessages = (projectId, threadId, cursorUrl = null) =>
+  cursorUrl ? api.get(cursorUrl) : api.get(`/projects/${projectId}/threads/${threadId}/messages/`);
+
+/**
+ * Who is in the workspace: { members: { userId: { state: "online" | "idle", thread } },
+ * threads: { threadId: { viewing: [userIds], typing: [{ id, username }] } } }.
+ * Members not listed are offline. sendPresence is the caller's heartbeat
+ * ({ thread, typing, idle_for }) and answers the same.
+ */
+export const fetchPresence = (projectId) => api.get(`/projects/${projectId}/presence/`);
+
+export const sendPresence = (projectId, beat) => api.post(`/projects/${projectId}/presence/`, beat);
+
+/**
+ * Loads a sub-resource only while `enabled` (e.g. when its tab is open).
+ * `reload()` refetches from the first page, `loadMore()` appends the next one.
+ */
+export function useProjectResource(projectId, resource, { enabled = true, params } = {}) {
+  const [items, setItems] = useState([]);
+  const [next, setNext] = useState(null);
+  const [count, setCount] = useState(0);
+  const [loading, setLoading] = useState(false);
+  const paramsKey = JSON.stringify(params || {});
+
+  const reload = useCallback(async () => {
+    if (!projectId) return;
+    setLoading(true);
+    try {
+      const res = await fetchProjectResource(projectId, resource, JSON.parse(paramsKey));
+      setItems(res.data.results);
+      setNext(res.data.next);
+      setCount(res.data.count);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setLoading(false);
+    }
+  }, [projectId, resource, paramsKey]);
+
+  const loadMore = useCallback(async () => {
+    if (!next) return;
+    try {
+      const res = await api.get(next);
+      setItems(prev => [...prev, ...res.data.results]);
+      setNext(res.data.next);
+    } catch (err) {
+      console.error(err);
+    }
+  }, [next]);
+
+  useEffect(() => {
+    if (enabled) reload();
+  }, [enabled, reload]);
+
+  return { items, setItems, count, loading, hasMore: !!next, loadMore, reload };
+}
+
+/**
+ * Reads the project's live events (/projects/<id>/stream/, Server-Sent Events),
+ * calling onEvent(type, data) for each, until the server ends the stream.
+ * fetch() rather than EventSource, which cannot send the Authorization header.
+ * Rejects with err.status set when the server refuses the stream
+ * (501: no ASGI server, 503: too many streams, 401/403).
+ */
+export async function readProjectStream(projectId, onEvent, signal) {
+  const token = localStorage.getItem("accessToken");
+  const res = await fetch(`${api.defaults.baseURL}/projects/${projectId}/stream/`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+    signal,
+  });
+  if (!res.ok || !res.body) {
+    throw Object.assign(new Error(`Stream refused (${res.status})`), { status: res.status });
+  }
+
+  const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    buffer += value;
+    let end;
+    while ((end = buffer.indexOf("\n\n")) !== -1) {
+      const frame = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      let type = null;
+      let data = "";
+      for (const line of frame.split("\n")) {
+        if (line.startsWith("event: ")) type = line.slice(7);
+        else if (line.startsWith("data: ")) data += line.slice(6);
+      }
+      // Comments (": ping") and "retry:" lines carry no event
+      if (type && data) onEvent(type, JSON.parse(data));
+    }
+  }
+}
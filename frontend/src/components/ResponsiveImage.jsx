@@ -0,0 +1,28 @@
+// Renders an API image with its generated variants (`*_srcset` from the backend).
+// Until the variants exist `srcset` is null and the original upload is used.
+const MIME = { avif: "image/avif", webp: "image/webp", jpeg: "image/jpeg" };
+
+export default function ResponsiveImage({ src, srcset, sizes = "100vw", alt = "", ...props }) {
+  if (!srcset) {
+    return <img src={src} alt={alt} {...props} />;
+  }
+
+  const formats = Object.keys(srcset.srcset).filter((f) => f !== "jpeg");
+  return (
+    // display: contents keeps the <img> sized by its own classes
+    <picture className="contents">
+      {formats.map((f) => (
+        <source key={f} type={MIME[f]} srcSet={srcset.srcset[f]} sizes={sizes} />
+      ))}
+      <img
+        src={srcset.src}
+        srcSet={srcset.srcset.jpeg}
+        sizes={sizes}
+        width={srcset.width}
+        height={srcset.height}
+        alt={alt}
+        {...props}
+      />
+    </picture>
+  );
+}
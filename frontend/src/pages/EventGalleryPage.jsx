@@ -3,6 +3,7 @@ import { useParams, Link } from "react-router-dom";
 import api from "../api/axios";
 import Navbar from "../components/Navbar";
 import Footer from "../components/Footer";
+import ResponsiveImage from "../components/ResponsiveImage";
 
 export default function EventGalleryPage() {
     const { id } = useParams();
@@ -50,8 +51,10 @@ export default function EventGalleryPage() {
                                 className="break-inside-avoid relative group cursor-pointer overflow-hidden rounded-xl border border-white/10"
                                 onClick={() => setSelectedImage(img.image)}
                             >
-                                <img
+                                <ResponsiveImage
                                     src={img.image}
+                                    srcset={img.image_srcset}
+                                    sizes="(min-width: 768px) 33vw, 100vw"
                                     alt={img.title || "Event Highlight"}
                                     className="w-full h-auto transform group-hover:scale-110 transition duration-700"
                                     loading="lazy"
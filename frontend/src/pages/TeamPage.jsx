@@ -2,6 +2,7 @@ import { useEffect, useState, useMemo } from "react";
 import api from "../api/axios";
 import Navigation from "../components/Navbar";
 import Footer from "../components/Footer";
+import ResponsiveImage from "../components/ResponsiveImage";
 
 export default function TeamPage() {
   const [data, setData] = useState({}); // { "Coding": [members], "Systems": [members] }
@@ -188,8 +189,10 @@ function MemberCard({ user }) {
       {/* Image Area */}
       <div className="relative h-72 w-full bg-gray-900 overflow-hidden">
         {imgSrc ? (
-          <img
+          <ResponsiveImage
             src={imgSrc}
+            srcset={profile.image_srcset}
+            sizes="(min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw"
             alt={profile.full_name}
             className="w-full h-full object-cover transition-transform duration-700 group-hover:scale-105"
           />
@@ -8,6 +8,8 @@ export default function AdminAuditLogs() {
   const [logs, setLogs] = useState([]);
   const [page, setPage] = useState(1);
   const [total, setTotal] = useState(0);
+  const [cursors, setCursors] = useState([null]); // cursors[i] fetches page i + 1
+  const [hasNext, setHasNext] = useState(false);
   const [eventType, setEventType] = useState("");
   const [deleteDays, setDeleteDays] = useState(""); // For delete input
   const [showDeleteConfirm, setShowDeleteConfirm] = useState(false);
@@ -36,7 +38,7 @@ export default function AdminAuditLogs() {
     if (!deleteDays) return;
     try {
       const res = await api.post("/audit-logs/delete_old_logs/", { days: deleteDays });
-      alert(`Deleted ${res.data.deleted_count} logs.`);
+      alert(`Purge of logs older than ${deleteDays} days queued (job ${res.data.job}).`);
       setShowDeleteConfirm(false);
       setDeleteDays("");
       fetchLogs();
@@ -53,7 +55,7 @@ export default function AdminAuditLogs() {
   const fetchLogs = async () => {
     try {
       const res = await api.get("/audit-logs/", {
-        params: { page, limit, eventType },
+        params: { limit, event_type: eventType || undefined, cursor: cursors[page - 1] || undefined },
       });
 
       // Handle different response structures
@@ -67,14 +69,22 @@ export default function AdminAuditLogs() {
         setTotal(filtered.length);
         const start = (page - 1) * limit;
         setLogs(filtered.slice(start, start + limit));
+        setHasNext(start + limit < filtered.length);
       } else if (res.data.results) {
-        // Standard DRF Pagination
+        // Cursor pagination (keyset over created_at, id)
         setLogs(res.data.results);
-        setTotal(res.data.count);
+        const next = res.data.next ? new URL(res.data.next).searchParams.get("cursor") : null;
+        setCursors((prev) => {
+          const copy = prev.slice(0, page);
+          copy[page] = next;
+          return copy;
+        });
+        setHasNext(Boolean(next));
       } else if (res.data.data) {
         // Custom envelope (as implied by previous code)
         setLogs(res.data.data);
         setTotal(res.data.total);
+        setHasNext(page * limit < res.data.total);
       } else {
         setLogs([]);
         setTotal(0);
@@ -84,8 +94,6 @@ export default function AdminAuditLogs() {
     }
   };
 
-  const totalPages = Math.ceil(total / limit);
-
   const badgeStyle = (success) =>
     success
       ? "bg-green-500/10 text-green-400 border-green-500/30"
@@ -155,6 +163,7 @@ export default function AdminAuditLogs() {
           value={eventType}
           onChange={(e) => {
             setEventType(e.target.value);
+            setCursors([null]);
             setPage(1);
           }}
           className="
@@ -301,12 +310,11 @@ export default function AdminAuditLogs() {
         </button>
 
         <span className="text-gray-400 text-sm">
-          Page <span className="text-gray-200">{page}</span> of{" "}
-          <span className="text-gray-200">{totalPages || 1}</span>
+          Page <span className="text-gray-200">{page}</span>
         </span>
 
         <button
-          disabled={page === totalPages || totalPages === 0}
+          disabled={!hasNext}
           onClick={() => setPage(page + 1)}
           className="px-4 py-2 rounded-lg bg-gray-800 text-gray-300 disabled:opacity-40 hover:bg-gray-700 transition"
         >
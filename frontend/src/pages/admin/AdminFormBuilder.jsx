@@ -162,23 +162,15 @@ export default function AdminFormBuilder() {
 
         if (targetIdx < 0 || targetIdx >= currentFields.length) return;
 
-        const targetField = currentFields[targetIdx];
+        // Swap the two fields and renumber the whole section in one request
+        const reordered = [...currentFields];
+        [reordered[idx], reordered[targetIdx]] = [reordered[targetIdx], reordered[idx]];
 
         try {
-            // Swap orders
-            // If orders are identical (legacy data), enforce index-based reordering
-            let newOrderCurrent = targetField.order;
-            let newOrderTarget = field.order;
-
-            if (newOrderCurrent === newOrderTarget) {
-                newOrderCurrent = targetIdx;
-                newOrderTarget = idx;
-            }
-
-            await Promise.all([
-                api.patch(`/form-fields/${field.id}/`, { order: newOrderCurrent }),
-                api.patch(`/form-fields/${targetField.id}/`, { order: newOrderTarget })
-            ]);
+            await api.post("/form-fields/reorder/", {
+                form: id,
+                items: reordered.map((f, i) => ({ id: f.id, order: i }))
+            });
 
             fetchForm();
         } catch (err) { alert("Reorder failed"); }
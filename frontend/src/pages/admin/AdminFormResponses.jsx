@@ -52,8 +52,8 @@ export default function AdminFormResponses() {
             let valA, valB;
 
             if (sortField === 'responder') {
-                valA = (a.user_details?.profile?.full_name || a.user_details?.username || "").toLowerCase();
-                valB = (b.user_details?.profile?.full_name || b.user_details?.username || "").toLowerCase();
+                valA = (a.user_details?.full_name || a.user_details?.username || "").toLowerCase();
+                valB = (b.user_details?.full_name || b.user_details?.username || "").toLowerCase();
             } else if (sortField === 'submitted_at') {
                 valA = new Date(a.submitted_at).getTime();
                 valB = new Date(b.submitted_at).getTime();
@@ -174,8 +174,8 @@ export default function AdminFormResponses() {
                                                 {res.user_details?.username?.[0] || '?'}
                                             </div>
                                             <div>
-                                                <p className="font-bold text-sm text-gray-200">{res.user_details?.profile?.full_name || res.user_details?.username || "Anonymous"}</p>
-                                                <p className="text-[10px] text-gray-500 font-bold uppercase tracking-tighter">{res.user_details?.profile?.position || "External Entity"}</p>
+                                                <p className="font-bold text-sm text-gray-200">{res.user_details?.full_name || res.user_details?.username || "Anonymous"}</p>
+                                                <p className="text-[10px] text-gray-500 font-bold uppercase tracking-tighter">{res.user_details?.position || "External Entity"}</p>
                                             </div>
                                         </div>
                                     </td>
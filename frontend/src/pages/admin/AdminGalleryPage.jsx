@@ -75,8 +75,9 @@ export default function AdminGalleryPage() {
     }
 
     for (const file of selectedFiles) {
-      if (file.size > 2 * 1024 * 1024) { // Increased to 2MB as mostly standard
-        showToast(`"${file.name}" is too large (max 2MB).`, "error");
+      // Originals are kept, pages are served resized variants
+      if (file.size > 15 * 1024 * 1024) {
+        showToast(`"${file.name}" is too large (max 15MB).`, "error");
         return;
       }
     }
@@ -92,7 +93,12 @@ export default function AdminGalleryPage() {
 
     try {
       setUploading(true);
-      await api.post("/gallery/upload/", fd);
+      // Batch upload answers once the files are stored; poll until they are checked and inserted
+      let { data: batch } = await api.post("/gallery/batches/", fd);
+      while (batch.status === "queued" || batch.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        ({ data: batch } = await api.get(`/gallery/batches/${batch.batch}/`));
+      }
       await loadImages();
 
       // Reset form
@@ -102,7 +108,14 @@ export default function AdminGalleryPage() {
       // Reset file input manually if needed, but since we use label trick, just clearing state is enough logic-wise. 
       // User will see "Choose Images" again.
 
-      showToast("Images uploaded successfully.", "success");
+      const counts = batch.counts || {};
+      if (batch.status === "failed") {
+        showToast("Upload failed while processing images.", "error");
+      } else if (counts.duplicate || counts.invalid) {
+        showToast(`${counts.created || 0} uploaded, ${counts.duplicate || 0} duplicates skipped, ${counts.invalid || 0} not images.`, "info");
+      } else {
+        showToast("Images uploaded successfully.", "success");
+      }
     } catch (err) {
       console.error("Upload failed", err);
       showToast("Failed to upload images.", "error");
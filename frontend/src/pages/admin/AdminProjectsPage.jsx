@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate, useOutletContext } from "react-router-dom";
 import api from "../../api/axios";
+import { useProjectResource } from "../../api/projects";
 
 // SVG ICONS
 const TaskIcon = () => <svg className="w-4 h-4" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M9 5H7a2 2 0 00-2 2v12a2 2 0 002 2h10a2 2 0 002-2V7a2 2 0 00-2-2h-2M9 5a2 2 0 002 2h2a2 2 0 002-2M9 5a2 2 0 012-2h2a2 2 0 012 2m-3 7h3m-3 4h3m-6-4h.01M9 16h.01" /></svg>;
@@ -95,16 +96,16 @@ export default function AdminProjectsPage() {
         <div className="grid grid-cols-1 md:grid-cols-2 xl:grid-cols-3 gap-6">
           {projects
             .sort((a, b) => {
-              const aIsMember = a.members?.includes(user.id) || a.lead === user.id;
-              const bIsMember = b.members?.includes(user.id) || b.lead === user.id;
+              const aIsMember = a.is_member || a.lead === user.id;
+              const bIsMember = b.is_member || b.lead === user.id;
               // Sort by membership (true first), then by ID (newest first)
               if (aIsMember && !bIsMember) return -1;
               if (!aIsMember && bIsMember) return 1;
               return b.id - a.id;
             })
             .map(p => {
-              const isMember = p.members?.includes(user.id) || p.lead === user.id;
-              const hasRequested = p.join_requests?.some(r => r.user === user.id);
+              const isMember = p.is_member || p.lead === user.id;
+              const hasRequested = !!p.my_request_status;
 
               return (
                 <ProjectCard
@@ -237,7 +238,7 @@ function ProjectCard({ project, onClick, isMember, hasRequested, onJoin, onDelet
           </div>
           <div className="flex flex-col items-end">
             <span className="text-[9px] text-gray-600 font-bold uppercase tracking-widest mb-1">Objectives</span>
-            <span className="text-xs text-gray-300 font-bold">{project.tasks?.length || 0} ACTIVE</span>
+            <span className="text-xs text-gray-300 font-bold">{project.task_count || 0} ACTIVE</span>
           </div>
         </div>
       </div>
@@ -264,10 +265,12 @@ function ProjectCard({ project, onClick, isMember, hasRequested, onJoin, onDelet
   );
 }
 
-function ProjectManager({ project, users, onClose, onUpdate }) {
-  const isNew = project.new;
+function ProjectManager({ project: summary, users, onClose, onUpdate }) {
+  const isNew = summary.new;
+  // The list only carries summary cards; members and status details come from the detail endpoint
+  const [project, setProject] = useState(summary);
   const [activeTab, setActiveTab] = useState("overview");
-  const [formData, setFormData] = useState({ ...project });
+  const [formData, setFormData] = useState({ ...summary });
   const [saving, setSaving] = useState(false);
   const [newTaskTitle, setNewTaskTitle] = useState("");
 
@@ -276,13 +279,28 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
   const [newTaskReq, setNewTaskReq] = useState("");
   const [expandedTask, setExpandedTask] = useState(null); // ID of expanded task for comments/details
 
+  // Tasks are fetched (page by page) only once their tab is opened
+  const tasks = useProjectResource(summary.id, "tasks", { enabled: !isNew && activeTab === "tasks" });
+
+  const loadDetail = async () => {
+    if (isNew) return;
+    try {
+      const res = await api.get(`/projects/${summary.id}/`);
+      setProject(res.data);
+    } catch (err) { console.error(err); }
+  };
+
+  useEffect(() => { loadDetail(); }, [summary.id]);
+
+  const refresh = () => { loadDetail(); onUpdate(); };
+
   const handleSaveInfo = async (e) => {
     e.preventDefault();
     setSaving(true);
     try {
       const payload = { title: formData.title, description: formData.description, status: formData.status, lead: formData.lead, is_public: formData.is_public };
       isNew ? await api.post("/projects/", payload) : await api.patch(`/projects/${project.id}/`, payload);
-      onUpdate();
+      isNew ? onUpdate() : refresh();
       if (isNew) onClose();
     } catch (err) { alert("Failed"); } finally { setSaving(false); }
   };
@@ -295,7 +313,8 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
         due_date: newTaskDeadline || null, requirements: newTaskReq
       });
       setNewTaskTitle(""); setNewTaskDeadline(""); setNewTaskReq("");
-      onUpdate();
+      tasks.reload();
+      refresh();
     } catch (err) { alert("Failed to add task"); }
   };
 
@@ -303,18 +322,18 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
     if (!content.trim()) return;
     try {
       await api.post(`/tasks/${taskId}/comment/`, { content });
-      onUpdate();
+      tasks.reload();
     } catch (err) { console.error(err); }
   };
 
   const handleUpdateTaskStatus = async (taskId, newStatus) => {
-    try { await api.patch(`/tasks/${taskId}/`, { status: newStatus }); onUpdate(); } catch (err) { console.error(err); }
+    try { await api.patch(`/tasks/${taskId}/`, { status: newStatus }); tasks.reload(); refresh(); } catch (err) { console.error(err); }
   };
 
   const handleRequestStatus = async () => {
     try {
       await api.post(`/projects/${project.id}/request_status/`);
-      onUpdate();
+      refresh();
     } catch (err) {
       console.error(err);
       alert("Failed to request status.");
@@ -324,7 +343,7 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
   const handleSubmitStatus = async (updateText) => {
     try {
       await api.post(`/projects/${project.id}/submit_status/`, { update_text: updateText });
-      onUpdate();
+      refresh();
     } catch (err) {
       console.error(err);
       alert("Failed to submit status update.");
@@ -389,8 +408,9 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
                 <button onClick={handleAddTask} className="self-end bg-cyan-600 px-4 py-1.5 rounded text-white text-sm font-bold">Add Task</button>
               </div>
               <div className="space-y-2">
-                {project.tasks?.length === 0 && <p className="text-gray-500 italic">No tasks assigned.</p>}
-                {project.tasks?.map(task => (
+                {tasks.loading && !tasks.items.length && <p className="text-gray-500 italic">Loading tasks...</p>}
+                {!tasks.loading && tasks.items.length === 0 && <p className="text-gray-500 italic">No tasks assigned.</p>}
+                {tasks.items.map(task => (
                   <div key={task.id} className="bg-white/5 rounded border border-white/5 overflow-hidden">
                     <div className="p-3 flex items-center justify-between hover:bg-white/5 cursor-pointer" onClick={() => setExpandedTask(expandedTask === task.id ? null : task.id)}>
                       <div className="flex items-center gap-3">
@@ -400,7 +420,7 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
                       <div className="flex items-center gap-4 text-xs text-gray-400">
                         {task.due_date && <span className="text-red-400">Due: {task.due_date}</span>}
                         <div className="flex items-center gap-1"><ChatIcon /> {task.comments?.length || 0}</div>
-                        <select onClick={e => e.stopPropagation()} className="bg-black/30 border border-white/10 rounded px-2 py-1 text-gray-300 max-w-[150px]" value={task.assigned_to || ""} onChange={async (e) => { await api.patch(`/tasks/${task.id}/`, { assigned_to: e.target.value || null }); onUpdate(); }}><option value="">Unassigned</option>{assignableUsers.map(u => <option key={u.id} value={u.id}>{u.username}</option>)}</select>
+                        <select onClick={e => e.stopPropagation()} className="bg-black/30 border border-white/10 rounded px-2 py-1 text-gray-300 max-w-[150px]" value={task.assigned_to || ""} onChange={async (e) => { await api.patch(`/tasks/${task.id}/`, { assigned_to: e.target.value || null }); tasks.reload(); }}><option value="">Unassigned</option>{assignableUsers.map(u => <option key={u.id} value={u.id}>{u.username}</option>)}</select>
                         <span className={`px-2 py-0.5 rounded ${task.status === 'DONE' ? 'bg-green-500/20 text-green-400' : task.status === 'IN_PROGRESS' ? 'bg-blue-500/20 text-blue-400' : 'bg-gray-700 text-gray-400'}`}>{task.status.replace("_", " ")}</span>
                       </div>
                     </div>
@@ -430,6 +450,7 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
                     )}
                   </div>
                 ))}
+                {tasks.hasMore && <button onClick={tasks.loadMore} className="w-full text-xs text-cyan-400 hover:underline py-2">Load more tasks ({tasks.items.length} of {tasks.count})</button>}
               </div>
             </div>
           )}
@@ -441,12 +462,12 @@ function ProjectManager({ project, users, onClose, onUpdate }) {
                 {project.members_details?.map(m => (
                   <div key={m.id} className="bg-white/5 p-3 rounded flex items-center gap-3">
                     <div className="w-8 h-8 rounded-full bg-cyan-900 flex items-center justify-center text-xs">{m.username[0]}</div>
-                    <div><div className="text-sm font-bold text-white">{m.profile?.full_name || m.username}</div><div className="text-xs text-gray-500">{m.profile?.position || "Member"}</div></div>
-                    <button onClick={async () => { const newMembers = project.members.filter(id => id !== m.id); await api.patch(`/projects/${project.id}/`, { members: newMembers }); onUpdate(); }} className="ml-auto text-red-500 hover:text-red-300">&times;</button>
+                    <div><div className="text-sm font-bold text-white">{m.full_name || m.username}</div><div className="text-xs text-gray-500">{m.position || "Member"}</div></div>
+                    <button onClick={async () => { const newMembers = (project.members || []).filter(id => id !== m.id); await api.patch(`/projects/${project.id}/`, { members: newMembers }); refresh(); }} className="ml-auto text-red-500 hover:text-red-300">&times;</button>
                   </div>
                 ))}
                 <div className="bg-white/5 p-3 rounded flex items-center justify-center border border-dashed border-white/20 hover:border-cyan-500 cursor-pointer group">
-                  <select className="bg-transparent text-gray-400 text-sm outline-none w-full h-full cursor-pointer" onChange={async (e) => { if (!e.target.value) return; const newId = parseInt(e.target.value); if (project.members.includes(newId)) return; const newMembers = [...project.members, newId]; await api.patch(`/projects/${project.id}/`, { members: newMembers }); onUpdate(); e.target.value = ""; }} value="">
+                  <select className="bg-transparent text-gray-400 text-sm outline-none w-full h-full cursor-pointer" onChange={async (e) => { if (!e.target.value) return; const newId = parseInt(e.target.value); const members = project.members || []; if (members.includes(newId)) return; await api.patch(`/projects/${project.id}/`, { members: [...members, newId] }); refresh(); e.target.value = ""; }} value="">
                     <option value="">+ Add Member</option>
                     {users.filter(u => !project.members?.includes(u.id)).map(u => <option key={u.id} value={u.id}>{u.username}</option>)}
                   </select>
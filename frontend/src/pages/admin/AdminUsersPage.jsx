@@ -5,7 +5,8 @@ import api from "../../api/axios";
 export default function AdminUsersPage() {
     const navigate = useNavigate();
 
-    const [users, setUsers] = useState([]);
+    const [users, setUsers] = useState([]); // current page only
+    const [totalUsers, setTotalUsers] = useState(0);
     const [roles, setRoles] = useState([]);
     const [sigs, setSigs] = useState([]);
     const [fields, setFields] = useState([]);
@@ -35,20 +36,47 @@ export default function AdminUsersPage() {
     const [filterSig, setFilterSig] = useState("");
     const [sortBy, setSortBy] = useState("name"); // name, joined, role
 
+    const [currentPage, setCurrentPage] = useState(1);
+    const itemsPerPage = 20;
+
     /* ================= LOAD DATA ================= */
     useEffect(() => { loadData(); }, []);
 
+    // Search, filters, ordering and paging all happen server-side
+    const userFilters = () => ({
+        search: search || undefined,
+        role: filterRole || undefined,
+        sig: filterSig || undefined,
+        ordering: sortBy === 'role' ? 'position' : 'name'
+    });
+
+    const loadUsers = async () => {
+        try {
+            const res = await api.get("/management/", { params: { ...userFilters(), page: currentPage, page_size: itemsPerPage } });
+            setUsers(res.data.results);
+            setTotalUsers(res.data.count);
+        } catch (err) {
+            console.error("Failed to load users", err);
+        }
+    };
+
+    // Reset page on filter change
+    useEffect(() => { setCurrentPage(1); }, [search, filterRole, filterSig, sortBy]);
+
+    useEffect(() => {
+        const timer = setTimeout(loadUsers, search ? 300 : 0); // debounce typing
+        return () => clearTimeout(timer);
+    }, [currentPage, search, filterRole, filterSig, sortBy]);
+
     const loadData = async () => {
         try {
             setLoading(true);
-            const [usersRes, rolesRes, sigsRes, fieldsRes, posRes] = await Promise.all([
-                api.get("/management/"),
+            const [rolesRes, sigsRes, fieldsRes, posRes] = await Promise.all([
                 api.get("/roles/"),
                 api.get("/sigs/"),
                 api.get("/profile-fields/"),
                 api.get("/positions/")
             ]);
-            setUsers(usersRes.data);
             setRoles(rolesRes.data);
             setSigs(sigsRes.data);
             setFields(fieldsRes.data);
@@ -105,7 +133,7 @@ export default function AdminUsersPage() {
 
             isEditing ? await api.put(`/management/${editUserId}/`, fd) : await api.post("/management/", fd);
             setFormOpen(false);
-            loadData();
+            loadUsers();
         } catch (err) {
             setError(err.response?.data?.error || "Operation failed.");
         } finally {
@@ -121,38 +149,13 @@ export default function AdminUsersPage() {
         return form.sigs && form.sigs.includes(f.limit_to_sig);
     });
 
-    const [currentPage, setCurrentPage] = useState(1);
-    const itemsPerPage = 20;
-
-    // Derived Users
-    const filteredUsers = users.filter(u => {
-        const lowerSearch = search.toLowerCase();
-        const matchesSearch = u.username.toLowerCase().includes(lowerSearch) ||
-            (u.profile?.full_name || "").toLowerCase().includes(lowerSearch) ||
-            u.email.toLowerCase().includes(lowerSearch);
-
-        const matchesRole = filterRole ? (u.user_roles?.some(r => r.name === filterRole) || u.role === filterRole) : true;
-
-        // Filter by SIG (ID check)
-        const matchesSig = filterSig ? u.profile?.sigs?.some(s => s.id === parseInt(filterSig)) : true;
-
-        return matchesSearch && matchesRole && matchesSig;
-    }).sort((a, b) => {
-        if (sortBy === 'name') return (a.profile?.full_name || a.username).localeCompare(b.profile?.full_name || b.username);
-        if (sortBy === 'role') return (a.profile?.position || "").localeCompare(b.profile?.position || "");
-        return 0;
-    });
-
     // Pagination Logic
-    const indexOfLastItem = currentPage * itemsPerPage;
-    const indexOfFirstItem = indexOfLastItem - itemsPerPage;
-    const currentUsers = filteredUsers.slice(indexOfFirstItem, indexOfLastItem);
-    const totalPages = Math.ceil(filteredUsers.length / itemsPerPage);
-
-    // Reset page on filter change
-    useEffect(() => { setCurrentPage(1); }, [search, filterRole, filterSig, sortBy]);
+    const indexOfFirstItem = (currentPage - 1) * itemsPerPage;
+    const totalPages = Math.ceil(totalUsers / itemsPerPage);
 
-    const downloadCSV = () => {
+    const downloadCSV = async () => {
+        // Every user matching the current filters, not just this page
+        const filteredUsers = (await api.get("/management/", { params: userFilters() })).data;
         if (filteredUsers.length === 0) return alert("No users to export");
 
         const headers = ["Username", "Full Name", "Email", "Role", "Position", "SIGs", "Projects Led", "Projects Member", "Join Year", "Status"];
@@ -219,7 +222,7 @@ export default function AdminUsersPage() {
                         <tr><th className="p-4">User</th><th className="p-4">Role/Position</th><th className="p-4">Last Access</th><th className="p-4 text-right">Action</th></tr>
                     </thead>
                     <tbody className="divide-y divide-white/10">
-                        {currentUsers.map(u => (
+                        {users.map(u => (
                             <tr key={u.id} className="hover:bg-white/5">
                                 <td className="p-4 flex items-center gap-3">
                                     <div className="w-8 h-8 rounded-full bg-cyan-900 flex items-center justify-center text-xs">{u.username[0]}</div>
@@ -262,7 +265,7 @@ export default function AdminUsersPage() {
 
             {/* PAGINATION */}
             <div className="flex justify-between items-center mt-4 text-sm text-gray-400">
-                <div>Showing {indexOfFirstItem + 1} - {Math.min(indexOfLastItem, filteredUsers.length)} of {filteredUsers.length}</div>
+                <div>Showing {totalUsers ? indexOfFirstItem + 1 : 0} - {indexOfFirstItem + users.length} of {totalUsers}</div>
                 <div className="flex gap-2">
                     <button disabled={currentPage === 1} onClick={() => setCurrentPage(p => p - 1)} className="px-3 py-1 bg-white/5 rounded hover:bg-white/10 disabled:opacity-30">Prev</button>
                     <span className="px-2 py-1">Page {currentPage} of {totalPages || 1}</span>
@@ -424,7 +427,7 @@ export default function AdminUsersPage() {
                         <h3 className="text-red-500 font-bold text-xl mb-4">Confirm Delete?</h3>
                         <div className="flex gap-4">
                             <button onClick={() => setDeleteId(null)} className="py-2 px-4 bg-gray-700 rounded">Cancel</button>
-                            <button onClick={async () => { await api.delete(`/management/${deleteId}/`); setDeleteId(null); loadData(); }} className="py-2 px-4 bg-red-600 rounded">Delete</button>
+                            <button onClick={async () => { await api.delete(`/management/${deleteId}/`); setDeleteId(null); loadUsers(); }} className="py-2 px-4 bg-red-600 rounded">Delete</button>
                         </div>
                     </div>
                 </div>
@@ -1,6 +1,7 @@
 import { useEffect, useState, useRef } from "react";
 import { useParams, useNavigate, useOutletContext, useSearchParams } from "react-router-dom";
 import api from "../../api/axios";
+import { fetchPresence, fetchThreadMessages, readProjectStream, sendPresence, useProjectResource } from "../../api/projects";
 import { buildMediaUrl } from "../../utils/mediaUrl";
 
 // Icons
@@ -9,10 +10,21 @@ const UserIcon = () => <svg className="w-5 h-5" fill="none" stroke="currentColor
 const DiscussionIcon = () => <svg className="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M17 8h2a2 2 0 012 2v6a2 2 0 01-2 2h-2v4l-4-4H9a1.994 1.994 0 01-1.414-.586m0 0L11 14h4a2 2 0 002-2V6a2 2 0 00-2-2H5a2 2 0 00-2 2v6a2 2 0 002 2h2v4l.586-.586z" /></svg>;
 const DeadlineIcon = () => <svg className="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24"><path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z" /></svg>;
 
-const isUserOnline = (lastLogin) => {
-    if (!lastLogin) return false;
-    const diff = (new Date() - new Date(lastLogin)) / 1000 / 60; // minutes
-    return diff < 60;
+// Presence heartbeat (projects.presence): the server forgets a member after two missed beats
+const PRESENCE_BEAT_MS = 20000;
+const NO_PRESENCE = { members: {}, threads: {} };
+
+// "online" | "idle" | "offline"
+const presenceState = (presence, userId) => presence.members[userId]?.state || "offline";
+
+// Drop typing indicators whose time ran out: { threadId: { userId: { username, until } } }
+const pruneTyping = (typing, now = Date.now()) => {
+    const next = {};
+    for (const [tid, typers] of Object.entries(typing)) {
+        const alive = Object.fromEntries(Object.entries(typers).filter(([, t]) => t.until > now));
+        if (Object.keys(alive).length) next[tid] = alive;
+    }
+    return next;
 };
 
 export default function ProjectDashboard() {
@@ -22,9 +34,20 @@ export default function ProjectDashboard() {
     const { user } = useOutletContext();
     const [project, setProject] = useState(null);
     const [loading, setLoading] = useState(true);
-    const [seenMessageIds, setSeenMessageIds] = useState(new Set());
     const [allUsers, setAllUsers] = useState([]);
-    const [unreadMsgIds, setUnreadMsgIds] = useState(new Set());
+    // { threadId: id of its newest message } from sync_state; threads hold no messages
+    const [threadHeads, setThreadHeads] = useState({});
+    // { threadId: newest message id the user has seen }
+    const [seenHeads, setSeenHeads] = useState(null);
+    // Live events (/projects/<id>/stream/). While the stream is up, sync_state is only a slow safety net.
+    const [live, setLive] = useState(false);
+    const liveRef = useRef(false);
+    const [presence, setPresence] = useState(NO_PRESENCE);
+    const [typing, setTyping] = useState({});
+    const [pushedMessage, setPushedMessage] = useState(null);
+    const [taskStamp, setTaskStamp] = useState(0);
+    // Polls sync_state now unless `version` is the one already held
+    const syncNowRef = useRef(() => { });
 
     useEffect(() => {
         if (user) {
@@ -41,55 +64,13 @@ export default function ProjectDashboard() {
         loadProject();
     }, [id]);
 
+    // Tasks, threads, messages and join requests are separate paginated
+    // endpoints; each tab fetches its own when it opens.
     const loadProject = async (isSilent = false) => {
         try {
             if (!isSilent) setLoading(true);
             const res = await api.get(`/projects/${id}/`);
-            const data = res.data;
-
-            // Notification Logic
-            // Notification Logic
-            if (isSilent && data.threads) {
-                const newSeen = new Set(seenMessageIds);
-                const newUnread = new Set(unreadMsgIds);
-                let updateUnread = false;
-
-                const currentThreadId = parseInt(searchParams.get("thread"));
-
-                data.threads.forEach(thread => {
-                    thread.messages?.forEach(m => {
-                        if (!newSeen.has(m.id)) {
-                            // It's a new message!
-                            if (m.author !== user.id) {
-                                if (Notification.permission === "granted") {
-                                    new Notification(`New Signal: #${thread.title}`, {
-                                        body: `${m.author_details?.username}: ${m.content.substring(0, 50)}${m.content.length > 50 ? '...' : ''}`,
-                                        icon: '/favicon.ico'
-                                    });
-                                }
-
-                                // Clean logic: If not currently looking at this thread, mark likely unread
-                                if (activeTab !== 'discussions' || currentThreadId !== thread.id) {
-                                    newUnread.add(m.id);
-                                    updateUnread = true;
-                                }
-                            }
-                            newSeen.add(m.id);
-                        }
-                    });
-                });
-
-                setSeenMessageIds(newSeen);
-                if (updateUnread) setUnreadMsgIds(newUnread);
-
-            } else if (!isSilent && data.threads) {
-                // Initialize seen IDs on first load
-                const initialIds = new Set();
-                data.threads.forEach(t => t.messages?.forEach(m => initialIds.add(m.id)));
-                setSeenMessageIds(initialIds);
-            }
-
-            setProject(data);
+            setProject(res.data);
         } catch (err) {
             console.error(err);
             if (!isSilent) navigate("/portal/projects");
@@ -98,62 +79,57 @@ export default function ProjectDashboard() {
         }
     };
 
+    const isMember = !!project && (project.is_member || project.lead === user.id || user.is_superuser);
+    const currentThreadId = parseInt(searchParams.get("thread"));
+
     // Adaptive Polling Logic (Traffic Control)
     useEffect(() => {
         // Spin Down: If no user session, do not start engine
-        if (!user) return;
+        if (!user || !isMember) return;
 
         let timeoutId;
-        let isMount = true;
+        // Last version seen; the server answers "unchanged" from its cache while it still matches
+        let version = null;
+        // Normal pace 5 seconds; with the live stream up only a safety net
+        const pace = () => liveRef.current ? 30000 : 5000;
 
         const poll = async () => {
             // Stop polling if not active or tab hidden (Browser API)
-            if (document.hidden || !project) {
+            if (document.hidden) {
                 timeoutId = setTimeout(poll, 10000); // Slow down significantly when hidden
                 return;
             }
 
             try {
                 // Lightweight Sync Call
-                const res = await api.get(`/projects/${id}/sync_state/`);
+                const res = await api.get(`/projects/${id}/sync_state/`, { params: version ? { since: version } : {} });
+                if (res.data?.unchanged) {
+                    timeoutId = setTimeout(poll, pace());
+                    return;
+                }
+                version = res.data?.version ?? null;
                 const { members_status = {}, threads_state = {} } = res.data || {};
 
-                // State Update Logic
-                // 3. Diffing & Side-Effects (Moved OUT of setProject)
-                let needsThreadReload = false;
-                if (activeTab === 'discussions' && project.threads) {
-                    for (const t of project.threads) {
-                        const serverLastMsgId = threads_state[t.id] || 0;
-                        const localLastMsgId = t.messages?.length > 0 ? t.messages[t.messages.length - 1].id : 0;
-                        if (serverLastMsgId !== localLastMsgId) {
-                            needsThreadReload = true;
-                            break;
-                        }
+                setThreadHeads(threads_state);
+                // First poll: everything already posted counts as seen
+                setSeenHeads(prev => prev || threads_state);
+
+                setProject(prev => {
+                    if (!prev) return null;
+                    const membersChanged = prev.members_details?.some(m => members_status[m.id] && members_status[m.id] !== m.last_login);
+                    const leadChanged = prev.lead_details && members_status[prev.lead_details.id] !== prev.lead_details.last_login;
+
+                    if (membersChanged || leadChanged) {
+                        return {
+                            ...prev,
+                            members_details: prev.members_details?.map(m => ({ ...m, last_login: members_status[m.id] || m.last_login })),
+                            lead_details: prev.lead_details ? { ...prev.lead_details, last_login: members_status[prev.lead_details.id] || prev.lead_details.last_login } : prev.lead_details
+                        };
                     }
-                }
-
-                if (needsThreadReload) {
-                    await loadProject(true);
-                } else {
-                    // Only update members if no thread reload happened
-                    setProject(prev => {
-                        if (!prev) return null;
-                        const membersChanged = prev.members_details?.some(m => members_status[m.id] && members_status[m.id] !== m.last_login);
-                        const leadChanged = prev.lead_details && members_status[prev.lead_details.id] !== prev.lead_details.last_login;
-
-                        if (membersChanged || leadChanged) {
-                            return {
-                                ...prev,
-                                members_details: prev.members_details?.map(m => ({ ...m, last_login: members_status[m.id] || m.last_login })),
-                                lead_details: prev.lead_details ? { ...prev.lead_details, last_login: members_status[prev.lead_details.id] || prev.lead_details.last_login } : prev.lead_details
-                            };
-                        }
-                        return prev;
-                    });
-                }
+                    return prev;
+                });
 
-                // Normal Pace: 5 seconds
-                timeoutId = setTimeout(poll, 5000);
+                timeoutId = setTimeout(poll, pace());
 
             } catch (err) {
                 // Kill Switch: If Auth fails (401/403), stop polling completely
@@ -168,33 +144,150 @@ export default function ProjectDashboard() {
             }
         };
 
+        syncNowRef.current = (latest) => {
+            if (latest != null && latest === version) return;
+            clearTimeout(timeoutId);
+            poll();
+        };
+
         // Start the loop
-        timeoutId = setTimeout(poll, 5000);
+        poll();
 
         return () => {
-            isMount = false;
             clearTimeout(timeoutId);
+            syncNowRef.current = () => { };
         };
-    }, [id, activeTab, project, user]);
+    }, [id, user, isMember]);
 
-    // Clear unread when viewing thread
+    // Live stream: pushes messages, typing, task changes and presence. Without an
+    // ASGI server it answers 501 and the dashboard stays on polling.
     useEffect(() => {
-        const currentThreadId = parseInt(searchParams.get("thread"));
-        if (activeTab === 'discussions' && currentThreadId && project?.threads && unreadMsgIds.size > 0) {
-            const thread = project.threads.find(t => t.id === currentThreadId);
-            if (thread && thread.messages) {
-                const newUnread = new Set(unreadMsgIds);
-                let changed = false;
-                thread.messages.forEach(m => {
-                    if (newUnread.has(m.id)) {
-                        newUnread.delete(m.id);
-                        changed = true;
-                    }
-                });
-                if (changed) setUnreadMsgIds(newUnread);
+        if (!user || !isMember) return;
+
+        const controller = new AbortController();
+        let retryId;
+        const setStreaming = (on) => {
+            liveRef.current = on;
+            setLive(on);
+        };
+
+        const onEvent = (type, data) => {
+            switch (type) {
+                case "hello":
+                    setStreaming(true);
+                    setPresence(data.presence);
+                    syncNowRef.current(data.version);
+                    break;
+                case "message":
+                    setPushedMessage(data);
+                    setThreadHeads(prev => ({ ...prev, [data.thread]: Math.max(prev[data.thread] || 0, data.id) }));
+                    break;
+                case "typing":
+                    if (data.user === user.id) break;
+                    setTyping(prev => ({
+                        ...prev,
+                        [data.thread]: { ...(prev[data.thread] || {}), [data.user]: { username: data.username, until: Date.now() + 4000 } }
+                    }));
+                    break;
+                case "task":
+                    setTaskStamp(n => n + 1);
+                    break;
+                case "presence":
+                    setPresence(prev => {
+                        const members = { ...prev.members };
+                        if (data.state === "offline") delete members[data.user];
+                        else members[data.user] = { state: data.state, thread: data.thread };
+                        return { ...prev, members };
+                    });
+                    break;
+                case "sync":
+                case "resync":
+                    syncNowRef.current(data.version);
+                    break;
+                default:
+            }
+        };
+
+        const connect = async () => {
+            let delay = 3000; // The server ends streams every few minutes; reconnect promptly
+            try {
+                await readProjectStream(id, onEvent, controller.signal);
+            } catch (err) {
+                if (controller.signal.aborted) return;
+                setStreaming(false);
+                // No ASGI server, or not allowed: polling it is
+                if ([401, 403, 404, 501].includes(err.status)) return;
+                delay = 30000; // Worker full (503) or network trouble
             }
+            setStreaming(false);
+            if (!controller.signal.aborted) retryId = setTimeout(connect, delay);
+        };
+        connect();
+
+        return () => {
+            controller.abort();
+            clearTimeout(retryId);
+            setStreaming(false);
+        };
+    }, [id, user, isMember]);
+
+    // Presence heartbeat: which thread is open and how long since the last input
+    const lastInputRef = useRef(Date.now());
+    const viewingThreadId = activeTab === 'discussions' && currentThreadId ? currentThreadId : null;
+    useEffect(() => {
+        if (!user || !isMember) return;
+
+        const touch = () => { lastInputRef.current = Date.now(); };
+        const inputs = ["keydown", "pointerdown", "scroll"];
+        inputs.forEach(type => window.addEventListener(type, touch, { passive: true }));
+
+        const beat = () => {
+            const idle_for = Math.round((Date.now() - lastInputRef.current) / 1000);
+            sendPresence(id, { thread: viewingThreadId, idle_for })
+                .then(res => setPresence(res.data))
+                .catch(() => { });
+        };
+        beat();
+        const intervalId = setInterval(beat, PRESENCE_BEAT_MS);
+
+        return () => {
+            clearInterval(intervalId);
+            inputs.forEach(type => window.removeEventListener(type, touch));
+        };
+    }, [id, user, isMember, viewingThreadId]);
+
+    // Typing indicators expire on their own
+    useEffect(() => {
+        if (!Object.keys(typing).length) return;
+        const timeoutId = setTimeout(() => setTyping(prev => pruneTyping(prev)), 1000);
+        return () => clearTimeout(timeoutId);
+    }, [typing]);
+
+    // Threads with messages newer than the user has seen (the one being read excepted)
+    const unreadThreadIds = seenHeads
+        ? Object.keys(threadHeads).map(Number).filter(tid =>
+            (threadHeads[tid] || 0) > (seenHeads[tid] || 0) && !(activeTab === 'discussions' && tid === currentThreadId))
+        : [];
+
+    // Notify about threads that just received messages
+    const notifiedRef = useRef({});
+    useEffect(() => {
+        if (!("Notification" in window) || Notification.permission !== "granted") return;
+        unreadThreadIds.forEach(tid => {
+            if (notifiedRef.current[tid] === threadHeads[tid]) return;
+            notifiedRef.current[tid] = threadHeads[tid];
+            new Notification("New Signal", { body: "New messages in a project thread", icon: '/favicon.ico' });
+        });
+    }, [threadHeads]);
+
+    // Reading a thread marks it seen
+    useEffect(() => {
+        if (activeTab === 'discussions' && currentThreadId && threadHeads[currentThreadId]) {
+            setSeenHeads(prev => prev && prev[currentThreadId] === threadHeads[currentThreadId]
+                ? prev
+                : { ...(prev || {}), [currentThreadId]: threadHeads[currentThreadId] });
         }
-    }, [activeTab, searchParams, project]);
+    }, [activeTab, currentThreadId, threadHeads]);
 
     // Request Notification Permission on mount
     useEffect(() => {
@@ -206,8 +299,6 @@ export default function ProjectDashboard() {
     if (loading) return <div className="p-10 text-center text-cyan-500 animate-pulse">Initializing Workspace...</div>;
     if (!project) return null;
 
-    const isMember = project.members.includes(user.id) || project.lead === user.id || user.is_superuser;
-
     if (!isMember) {
         return (
             <div className="min-h-[60vh] flex items-center justify-center p-6">
@@ -253,7 +344,7 @@ export default function ProjectDashboard() {
                             <p className="text-[10px] text-gray-500 uppercase font-bold mb-1">Project Lead</p>
                             <div className="flex items-center gap-2">
                                 <div className="w-6 h-6 rounded-full bg-cyan-900 flex items-center justify-center text-[10px] font-bold">{project.lead_details?.username?.[0]}</div>
-                                <span className="text-sm font-medium text-gray-200">{project.lead_details?.profile?.full_name || project.lead_details?.username || "Unassigned"}</span>
+                                <span className="text-sm font-medium text-gray-200">{project.lead_details?.full_name || project.lead_details?.username || "Unassigned"}</span>
                             </div>
                         </div>
                     </div>
@@ -270,7 +361,7 @@ export default function ProjectDashboard() {
                     icon="💬"
                     active={activeTab}
                     set={setActiveTab}
-                    badge={unreadMsgIds.size > 0 ? unreadMsgIds.size : null}
+                    badge={unreadThreadIds.length > 0 ? unreadThreadIds.length : null}
                 />
                 <TabButton id="team" label="Team" icon="👥" active={activeTab} set={setActiveTab} />
                 {(user.is_superuser || project.lead === user.id) && (
@@ -280,10 +371,22 @@ export default function ProjectDashboard() {
 
             {/* Content */}
             <div className="min-h-[500px]">
-                {activeTab === 'overview' && <OverviewTab project={project} />}
-                {activeTab === 'tasks' && <TasksTab project={project} user={user} allUsers={allUsers} onUpdate={loadProject} />}
-                {activeTab === 'discussions' && <DiscussionsTab project={project} setProject={setProject} user={user} onUpdate={loadProject} unreadMsgIds={unreadMsgIds} setUnreadMsgIds={setUnreadMsgIds} />}
-                {activeTab === 'team' && <TeamTab project={project} user={user} allUsers={allUsers} onUpdate={loadProject} />}
+                {activeTab === 'overview' && <OverviewTab project={project} taskStamp={taskStamp} />}
+                {activeTab === 'tasks' && <TasksTab project={project} user={user} allUsers={allUsers} onUpdate={loadProject} taskStamp={taskStamp} />}
+                {activeTab === 'discussions' && (
+                    <DiscussionsTab
+                        project={project}
+                        user={user}
+                        threadHeads={threadHeads}
+                        unreadThreadIds={unreadThreadIds}
+                        live={live}
+                        liveTypers={Object.entries(pruneTyping(typing)[currentThreadId] || {}).map(([uid, t]) => ({ id: Number(uid), username: t.username }))}
+                        pushedMessage={pushedMessage}
+                        presence={presence}
+                        onPresence={setPresence}
+                    />
+                )}
+                {activeTab === 'team' && <TeamTab project={project} user={user} allUsers={allUsers} onUpdate={loadProject} presence={presence} />}
                 {activeTab === 'manage' && <ManagementTab project={project} allUsers={allUsers} onUpdate={loadProject} />}
             </div>
         </div>
@@ -312,9 +415,12 @@ function TabButton({ id, label, icon, active, set, badge }) {
 
 // --- SUB-COMPONENTS ---
 
-function OverviewTab({ project }) {
-    const completedTasks = project.tasks?.filter(t => t.status === 'DONE').length || 0;
-    const totalTasks = project.tasks?.length || 0;
+function OverviewTab({ project, taskStamp }) {
+    const completedTasks = project.done_task_count || 0;
+    const totalTasks = project.task_count || 0;
+    const milestones = useProjectResource(project.id, "tasks", { params: { page_size: 5 } });
+    // A task changed (live stream)
+    useEffect(() => { if (taskStamp) milestones.reload(); }, [taskStamp]);
     const progress = totalTasks > 0 ? Math.round((completedTasks / totalTasks) * 100) : 0;
 
     return (
@@ -341,7 +447,7 @@ function OverviewTab({ project }) {
                 <div className="bg-white/5 border border-white/10 rounded-xl p-6">
                     <h3 className="text-sm font-bold text-gray-500 uppercase mb-4">Milestones</h3>
                     <div className="space-y-4">
-                        {project.tasks?.slice(0, 5).map(t => (
+                        {milestones.items.map(t => (
                             <div key={t.id} className="flex items-center gap-3">
                                 <div className={`w-2 h-2 rounded-full ${t.status === 'DONE' ? 'bg-green-500 shadow-[0_0_5px_rgba(34,197,94,0.5)]' : 'bg-gray-600'}`} />
                                 <span className={`text-sm ${t.status === 'DONE' ? 'text-gray-400 line-through' : 'text-gray-200'}`}>{t.title}</span>
@@ -355,9 +461,14 @@ function OverviewTab({ project }) {
     );
 }
 
-function TasksTab({ project, user, allUsers, onUpdate }) {
+function TasksTab({ project, user, allUsers, onUpdate, taskStamp }) {
     const [newTask, setNewTask] = useState({ title: "", due_date: "", requirements: "", assigned_to: "" });
     const [showAdd, setShowAdd] = useState(false);
+    const tasks = useProjectResource(project.id, "tasks");
+    // A task changed (live stream)
+    useEffect(() => { if (taskStamp) tasks.reload(); }, [taskStamp]);
+    // Task changes move the project's counts too
+    const refresh = () => { tasks.reload(); onUpdate(true); };
 
     // Filter potential assignees to only project members and lead
     const assignableUsers = [project.lead_details, ...(project.members_details || [])].filter(Boolean);
@@ -370,7 +481,7 @@ function TasksTab({ project, user, allUsers, onUpdate }) {
             await api.post("/tasks/", { ...newTask, project: project.id });
             setNewTask({ title: "", due_date: "", requirements: "", assigned_to: "" });
             setShowAdd(false);
-            onUpdate();
+            refresh();
         } catch (err) { alert("Failed"); }
     }
 
@@ -404,14 +515,14 @@ function TasksTab({ project, user, allUsers, onUpdate }) {
             )}
 
             <div className="space-y-3">
-                {project.tasks?.map(t => (
+                {tasks.items.map(t => (
                     <div key={t.id} className="bg-white/5 border border-white/5 rounded-lg p-4 flex items-center justify-between group hover:border-white/20 transition-all">
                         <div className="flex items-center gap-4">
                             <div
                                 onClick={async () => {
                                     if (!isLead && t.assigned_to !== user.id) return;
                                     await api.patch(`/tasks/${t.id}/`, { status: t.status === 'DONE' ? 'TODO' : 'DONE' });
-                                    onUpdate();
+                                    refresh();
                                 }}
                                 className={`w-6 h-6 rounded border flex items-center justify-center cursor-pointer transition-all ${t.status === 'DONE' ? 'bg-green-500 border-green-500' : 'border-white/20 bg-black/20 hover:border-cyan-500'
                                     }`}
@@ -429,39 +540,92 @@ function TasksTab({ project, user, allUsers, onUpdate }) {
                         {t.due_date && <span className="text-xs text-red-500 font-mono">DEADLINE: {t.due_date}</span>}
                     </div>
                 ))}
+                {!tasks.loading && !tasks.items.length && <p className="text-gray-600 text-xs italic uppercase">No tasks deployed.</p>}
+                {tasks.hasMore && (
+                    <button onClick={tasks.loadMore} className="w-full text-xs text-cyan-400 hover:underline py-2">
+                        Load more ({tasks.items.length} of {tasks.count})
+                    </button>
+                )}
             </div>
         </div>
     );
 }
 
-function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, setUnreadMsgIds }) {
+function DiscussionsTab({ project, user, threadHeads, unreadThreadIds, live, liveTypers, pushedMessage, presence, onPresence }) {
     const [msg, setMsg] = useState("");
     const [searchParams, setSearchParams] = useSearchParams();
     const activeThreadId = parseInt(searchParams.get("thread"));
     const chatContainerRef = useRef(null);
+    const threads = useProjectResource(project.id, "threads");
+    // The open thread's messages, oldest first; olderUrl pages further back
+    const [messages, setMessages] = useState([]);
+    const [olderUrl, setOlderUrl] = useState(null);
 
     const setActiveThreadId = (tid) => {
-        // Clear unread for this thread
-        if (tid && unreadMsgIds.size > 0) {
-            const threadMessages = project.threads?.find(t => t.id === tid)?.messages || [];
-            const newUnread = new Set(unreadMsgIds);
-            threadMessages.forEach(m => newUnread.delete(m.id));
-            setUnreadMsgIds(newUnread);
-        }
-
         const params = new URLSearchParams(searchParams);
         if (tid) params.set("thread", tid);
         else params.delete("thread");
         setSearchParams(params);
     };
 
+    // Fetch the newest page; with `reset` drop whatever was loaded before
+    const loadLatest = async (reset = false) => {
+        if (!activeThreadId) return;
+        try {
+            const res = await fetchThreadMessages(project.id, activeThreadId);
+            const latest = [...res.data.results].reverse();
+            const oldest = latest.length ? latest[0].id : Infinity;
+            // Older pages already loaded stay; the newest page replaces the rest, optimistic entries included
+            setMessages(prev => reset ? latest : [...prev.filter(m => !m.pending && m.id < oldest), ...latest]);
+            if (reset) setOlderUrl(res.data.next);
+        } catch (err) { console.error(err); }
+    };
+
+    const loadOlder = async () => {
+        if (!olderUrl) return;
+        try {
+            const res = await fetchThreadMessages(project.id, activeThreadId, olderUrl);
+            setMessages(prev => [...[...res.data.results].reverse(), ...prev]);
+            setOlderUrl(res.data.next);
+        } catch (err) { console.error(err); }
+    };
+
+    useEffect(() => {
+        setMessages([]);
+        setOlderUrl(null);
+        loadLatest(true);
+    }, [activeThreadId]);
+
+    // sync_state reports each thread's newest message id: refetch when the open one moved,
+    // and the thread list when threads were added or removed
+    useEffect(() => {
+        const head = threadHeads[activeThreadId];
+        const lastLoaded = [...messages].reverse().find(m => !m.pending)?.id || 0;
+        const pushed = pushedMessage?.thread === activeThreadId && pushedMessage.id === head;
+        if (activeThreadId && head !== undefined && head !== lastLoaded && !pushed) loadLatest();
+
+        const known = threads.items.map(t => t.id);
+        const maxKnown = Math.max(0, ...known);
+        if (Object.keys(threadHeads).some(tid => Number(tid) > maxKnown) || known.some(tid => !(tid in threadHeads))) {
+            threads.reload();
+        }
+    }, [threadHeads]);
+
+    // Messages pushed by the live stream join the open thread without a refetch
+    useEffect(() => {
+        if (!pushedMessage || pushedMessage.thread !== activeThreadId) return;
+        setMessages(prev => prev.some(m => m.id === pushedMessage.id)
+            ? prev
+            : [...prev.filter(m => !(m.pending && m.author === pushedMessage.author && m.content === pushedMessage.content)), pushedMessage]);
+    }, [pushedMessage]);
+
     const handleCreateThread = async () => {
         const title = prompt("Thread Subject:");
         if (!title) return;
         try {
             const res = await api.post("/threads/", { title, project: project.id });
+            await threads.reload();
             setActiveThreadId(res.data.id);
-            onUpdate(true);
         } catch (err) { alert("Failed to deploy channel."); }
     }
 
@@ -472,43 +636,34 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
         // 1. Capture message for optimistic update
         const optimisticMsg = {
             id: Date.now(), // Temporary ID
+            pending: true,
             content: msg,
             author: user.id,
-            author_details: { username: user.username, profile: user.profile },
+            author_details: { id: user.id, username: user.username, full_name: user.profile?.full_name || user.username },
             created_at: new Date().toISOString()
         };
 
         try {
             // Append locally immediately for no-lag experience
-            setProject(prev => {
-                if (!prev) return prev;
-                return {
-                    ...prev,
-                    threads: prev.threads.map(t =>
-                        t.id === activeThreadId
-                            ? { ...t, messages: [...(t.messages || []), optimisticMsg] }
-                            : t
-                    )
-                };
-            });
+            setMessages(prev => [...prev, optimisticMsg]);
             setMsg("");
 
             // 2. Transmit to server
             await api.post("/messages/", { content: optimisticMsg.content, thread: activeThreadId });
 
-            // 3. Silent sync to get real IDs/timestamps from server
-            onUpdate(true);
+            // 3. Silent sync to get real IDs/timestamps from server (the live stream pushes them)
+            if (!live) loadLatest();
         } catch (err) {
             console.error(err);
             alert("Transmission failed. Re-syncing...");
-            onUpdate(true); // Re-sync to remove optimistic message if it failed
+            loadLatest(); // Re-sync to remove optimistic message if it failed
         }
     }
 
     const handleToggleEphemeral = async (id) => {
         try {
             await api.post(`/threads/${id}/toggle_ephemeral/`);
-            onUpdate();
+            threads.reload();
         } catch (err) { alert("Logic failure."); }
     }
 
@@ -516,7 +671,7 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
         if (!window.confirm("Purge History: Permanently delete ALL messages in this node?")) return;
         try {
             await api.post(`/threads/${id}/purge_messages/`);
-            onUpdate();
+            loadLatest(true);
         } catch (err) { alert("Wipe failed."); }
     }
 
@@ -525,15 +680,15 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
         try {
             await api.delete(`/threads/${id}/`);
             if (activeThreadId === id) setActiveThreadId(null);
-            onUpdate();
+            threads.reload();
         } catch (err) { alert("Failed."); }
     }
 
-    const currentThread = project.threads?.find(t => t.id === activeThreadId);
+    const currentThread = threads.items.find(t => t.id === activeThreadId);
 
     // Handle Selective Scrolling
     useEffect(() => {
-        if (!chatContainerRef.current || !currentThread?.messages) return;
+        if (!chatContainerRef.current || !messages.length) return;
         const container = chatContainerRef.current;
 
         // Threshold of 150px to consider user "at bottom"
@@ -545,7 +700,7 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
                 container.scrollTo({ top: container.scrollHeight, behavior: 'smooth' });
             }, 50);
         }
-    }, [currentThread?.messages]);
+    }, [messages]);
 
     // Force scroll to bottom when switching threads
     useEffect(() => {
@@ -576,19 +731,23 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
         const now = Date.now();
         if (now - lastSentRef.current > 2000) {
             lastSentRef.current = now;
-            // Fire and forget - low priority
-            api.post(`/threads/${activeThreadId}/signal_typing/`).catch(() => { });
+            // A typing heartbeat; low priority
+            sendPresence(project.id, { thread: activeThreadId, typing: true })
+                .then(res => onPresence(res.data))
+                .catch(() => { });
         }
     };
 
-    // Typing Status Poller (Lightweight)
+    // Typing Status Poller (one cache read server-side); the live stream pushes typing instead
     useEffect(() => {
-        if (!activeThreadId || document.hidden) return;
+        if (!activeThreadId || document.hidden || live) return;
 
         const pollTypers = async () => {
             try {
-                const res = await api.get(`/threads/${activeThreadId}/get_typing_status/`);
-                setTypers(res.data.typers || []);
+                const res = await fetchPresence(project.id);
+                onPresence(res.data);
+                const typing = res.data.threads[activeThreadId]?.typing || [];
+                setTypers(typing.filter(t => t.id !== user.id));
             } catch (err) { }
         };
 
@@ -596,7 +755,8 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
         pollTypers(); // Initial
 
         return () => clearInterval(interval);
-    }, [activeThreadId]);
+    }, [activeThreadId, live]);
+    const shownTypers = live ? liveTypers : typers;
 
     return (
         <div className="grid grid-cols-1 md:grid-cols-4 gap-6 h-[600px]">
@@ -607,21 +767,18 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
                     <button onClick={handleCreateThread} className="w-8 h-8 rounded-full bg-cyan-600/20 text-cyan-400 flex items-center justify-center font-bold text-xl hover:bg-cyan-600 hover:text-white transition-all">+</button>
                 </div>
                 <div className="flex-1 overflow-y-auto no-scrollbar p-2 space-y-1">
-                    {project.threads?.map(t => (
+                    {threads.items.map(t => (
                         <div key={t.id} className="group relative">
                             <button
                                 onClick={() => setActiveThreadId(t.id)}
                                 className={`w-full text-left p-3 rounded-lg text-xs transition-all flex flex-col gap-1 ${activeThreadId === t.id ? 'bg-cyan-600 text-white shadow-lg' : 'text-gray-400 hover:bg-white/5'}`}
                             >
                                 <span className={`${activeThreadId === t.id ? 'font-bold' : ''}`}># {t.title}</span>
-                                {(() => {
-                                    const unreadCount = t.messages?.filter(m => unreadMsgIds.has(m.id)).length || 0;
-                                    return unreadCount > 0 && (
-                                        <span className="bg-red-500 text-white text-[9px] font-black px-1.5 rounded-full ml-auto">
-                                            {unreadCount}
-                                        </span>
-                                    );
-                                })()}
+                                {unreadThreadIds.includes(t.id) && (
+                                    <span className="bg-red-500 text-white text-[9px] font-black px-1.5 rounded-full ml-auto">
+                                        NEW
+                                    </span>
+                                )}
                                 {t.is_ephemeral && <span className={`text-[8px] font-black uppercase tracking-widest ${activeThreadId === t.id ? 'text-cyan-200' : 'text-orange-500'}`}>⚡ Ephemeral</span>}
                             </button>
                             <button
@@ -630,7 +787,8 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
                             >✕</button>
                         </div>
                     ))}
-                    {!project.threads?.length && <p className="text-gray-700 text-center text-[10px] mt-10 p-4 italic uppercase tracking-widest">No signals detected.</p>}
+                    {threads.hasMore && <button onClick={threads.loadMore} className="w-full text-[10px] text-cyan-400 hover:underline py-2">More threads</button>}
+                    {!threads.loading && !threads.items.length && <p className="text-gray-700 text-center text-[10px] mt-10 p-4 italic uppercase tracking-widest">No signals detected.</p>}
                 </div>
             </div>
 
@@ -660,15 +818,18 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
                         </div>
 
                         <div className="flex-1 overflow-y-auto p-6 space-y-6 no-scrollbar bg-black/20" ref={chatContainerRef}>
-                            {currentThread.messages?.map(m => (
+                            {olderUrl && (
+                                <button onClick={loadOlder} className="w-full text-[10px] text-cyan-400 hover:underline uppercase tracking-widest">Load earlier messages</button>
+                            )}
+                            {messages.map(m => (
                                 <div key={m.id} className={`flex flex-col ${m.author === user.id ? 'items-end' : 'items-start'} animate-slide-in`}>
                                     <div className="flex items-center gap-2 mb-2">
                                         <span className={`text-[10px] font-bold flex items-center gap-1.5 ${m.author === user.id ? 'text-cyan-400' : 'text-gray-500'}`}>
                                             {m.author_details?.username}
                                             {m.author !== user.id && (
                                                 <span
-                                                    className={`w-1.5 h-1.5 rounded-full ${isUserOnline(m.author_details?.last_login) ? 'bg-green-500 shadow-[0_0_5px_rgba(34,197,94,0.8)]' : 'bg-gray-600'}`}
-                                                    title={isUserOnline(m.author_details?.last_login) ? 'Online' : 'Offline'}
+                                                    className={`w-1.5 h-1.5 rounded-full ${{ online: 'bg-green-500 shadow-[0_0_5px_rgba(34,197,94,0.8)]', idle: 'bg-amber-500' }[presenceState(presence, m.author)] || 'bg-gray-600'}`}
+                                                    title={{ online: 'Online', idle: 'Idle' }[presenceState(presence, m.author)] || 'Offline'}
                                                 />
                                             )}
                                         </span>
@@ -683,17 +844,17 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
                             ))}
 
                             {/* Typing Indicator Bubble */}
-                            {typers.length > 0 && (
+                            {shownTypers.length > 0 && (
                                 <div className="flex flex-col items-start animate-fade-in">
                                     <div className="flex items-center gap-1 mb-1 ml-1">
                                         <span className="text-[10px] text-cyan-400 font-bold tracking-wider animate-pulse">
-                                            {typers.map(u => u.username).join(', ')} is typing...
+                                            {shownTypers.map(u => u.username).join(', ')} is typing...
                                         </span>
                                     </div>
                                 </div>
                             )}
 
-                            {!currentThread.messages?.length && (
+                            {!messages.length && (
                                 <div className="h-full flex flex-col items-center justify-center opacity-20 scale-150">
                                     <span className="text-4xl mb-4">🛡️</span>
                                     <p className="text-[8px] font-black uppercase tracking-[0.4em]">Channel Dark</p>
@@ -724,8 +885,22 @@ function DiscussionsTab({ project, setProject, user, onUpdate, unreadMsgIds, set
     );
 }
 
-function TeamTab({ project, user, allUsers, onUpdate }) {
+// Dot colour and label of a member's presence
+const PRESENCE_BADGES = {
+    online: { dot: 'bg-green-500', text: 'text-green-400', label: 'Available' },
+    idle: { dot: 'bg-amber-500', text: 'text-amber-400', label: 'Idle' },
+    offline: { dot: 'bg-gray-500', text: 'text-gray-500', label: 'Away' },
+};
+
+function TeamTab({ project, user, allUsers, onUpdate, presence }) {
     const isLead = project.lead === user.id || user.is_superuser;
+    const badge = (u) => PRESENCE_BADGES[u ? presenceState(presence, u.id) : 'offline'];
+    const requests = useProjectResource(project.id, "join_requests", { enabled: isLead, params: { status: "PENDING" } });
+    const decide = async (req, verdict) => {
+        await api.post(`/join-requests/${req.id}/${verdict}/`);
+        requests.reload();
+        onUpdate();
+    };
 
     const handleAddMember = async (targetUserId) => {
         if (!targetUserId) return;
@@ -783,14 +958,14 @@ function TeamTab({ project, user, allUsers, onUpdate }) {
                         <div className="absolute -right-4 -top-4 text-cyan-500/10 scale-150 rotate-12 transition-transform group-hover:rotate-0"><UserIcon /></div>
                         <div className="w-12 h-12 rounded-full bg-cyan-600 flex items-center justify-center font-bold text-xl relative">
                             {project.lead_details?.username?.[0]}
-                            <div className={`absolute bottom-0 right-0 w-3 h-3 rounded-full border-2 border-[#111] ${isUserOnline(project.lead_details?.last_login) ? 'bg-green-500' : 'bg-gray-500'}`} />
+                            <div className={`absolute bottom-0 right-0 w-3 h-3 rounded-full border-2 border-[#111] ${badge(project.lead_details).dot}`} />
                         </div>
                         <div>
-                            <h4 className="font-bold text-cyan-400">LEAD: {project.lead_details?.profile?.full_name || project.lead_details?.username}</h4>
+                            <h4 className="font-bold text-cyan-400">LEAD: {project.lead_details?.full_name || project.lead_details?.username}</h4>
                             <p className="text-[10px] text-gray-400 font-bold uppercase flex items-center gap-1">
-                                {project.lead_details?.profile?.position || "Officer"} •
-                                <span className={isUserOnline(project.lead_details?.last_login) ? 'text-green-400' : 'text-gray-500'}>
-                                    {isUserOnline(project.lead_details?.last_login) ? 'Available' : 'Away'}
+                                {project.lead_details?.position || "Officer"} •
+                                <span className={badge(project.lead_details).text}>
+                                    {badge(project.lead_details).label}
                                 </span>
                             </p>
                         </div>
@@ -799,14 +974,14 @@ function TeamTab({ project, user, allUsers, onUpdate }) {
                         <div key={m.id} className="bg-white/5 border border-white/10 p-4 rounded-xl flex items-center gap-4 hover:border-white/30 transition-all group overflow-hidden relative">
                             <div className="w-10 h-10 rounded-full bg-gray-700 flex items-center justify-center font-bold relative">
                                 {m.username[0]}
-                                <div className={`absolute bottom-0 right-0 w-2.5 h-2.5 rounded-full border-2 border-[#111] ${isUserOnline(m.last_login) ? 'bg-green-500' : 'bg-gray-500'}`} />
+                                <div className={`absolute bottom-0 right-0 w-2.5 h-2.5 rounded-full border-2 border-[#111] ${badge(m).dot}`} />
                             </div>
                             <div>
-                                <h4 className="font-bold text-gray-200">{m.profile?.full_name || m.username}</h4>
+                                <h4 className="font-bold text-gray-200">{m.full_name || m.username}</h4>
                                 <p className="text-[10px] text-gray-500 font-bold uppercase flex items-center gap-1">
-                                    {m.profile?.position || "Field Agent"} •
-                                    <span className={isUserOnline(m.last_login) ? 'text-green-400' : 'text-gray-500'}>
-                                        {isUserOnline(m.last_login) ? 'Available' : 'Away'}
+                                    {m.position || "Field Agent"} •
+                                    <span className={badge(m).text}>
+                                        {badge(m).label}
                                     </span>
                                 </p>
                             </div>
@@ -825,32 +1000,35 @@ function TeamTab({ project, user, allUsers, onUpdate }) {
                 <div className="pt-8 border-t border-white/5">
                     <h3 className="text-sm font-bold text-gray-500 uppercase mb-6 flex justify-between items-center">
                         Processing Join Requests
-                        <span className="bg-cyan-500 text-black px-2 py-0.5 rounded text-[10px]">{project.join_requests?.filter(r => r.status === 'PENDING').length || 0}</span>
+                        <span className="bg-cyan-500 text-black px-2 py-0.5 rounded text-[10px]">{requests.count}</span>
                     </h3>
                     <div className="space-y-4">
-                        {project.join_requests?.filter(r => r.status === 'PENDING').map(req => (
+                        {requests.items.map(req => (
                             <div key={req.id} className="bg-white/5 border border-white/10 p-5 rounded-xl flex flex-col md:flex-row md:items-center justify-between gap-4">
                                 <div className="flex items-center gap-4">
                                     <div className="w-10 h-10 rounded-full bg-white/10 flex items-center justify-center">{req.user_details?.username?.[0]}</div>
                                     <div>
-                                        <h4 className="font-bold text-gray-100">{req.user_details?.profile?.full_name || req.user_details?.username}</h4>
+                                        <h4 className="font-bold text-gray-100">{req.user_details?.full_name || req.user_details?.username}</h4>
                                         <p className="text-[10px] text-cyan-400 font-bold uppercase tracking-wider">{req.user_position || "Member"}</p>
                                         {req.message && <p className="text-xs text-gray-500 mt-1 italic">"{req.message}"</p>}
                                     </div>
                                 </div>
                                 <div className="flex gap-2">
                                     <button
-                                        onClick={async () => { await api.post(`/join-requests/${req.id}/approve/`); onUpdate(); }}
+                                        onClick={() => decide(req, "approve")}
                                         className="bg-green-600 hover:bg-green-500 text-white px-4 py-2 rounded-lg text-[10px] font-bold uppercase"
                                     >Authorize Access</button>
                                     <button
-                                        onClick={async () => { await api.post(`/join-requests/${req.id}/reject/`); onUpdate(); }}
+                                        onClick={() => decide(req, "reject")}
                                         className="bg-red-600/20 hover:bg-red-600 text-red-500 hover:text-white px-4 py-2 rounded-lg text-[10px] font-bold uppercase transition-all"
                                     >Deny Request</button>
                                 </div>
                             </div>
                         ))}
-                        {!project.join_requests?.filter(r => r.status === 'PENDING').length && (
+                        {requests.hasMore && (
+                            <button onClick={requests.loadMore} className="w-full text-xs text-cyan-400 hover:underline py-2">Load more requests</button>
+                        )}
+                        {!requests.loading && !requests.items.length && (
                             <p className="text-gray-600 text-xs italic uppercase">No pending recruitment authorization.</p>
                         )}
                     </div>
@@ -860,6 +1038,12 @@ function TeamTab({ project, user, allUsers, onUpdate }) {
     );
 }
 
+// Serializer output that is not sent back on update
+const READ_ONLY_FIELDS = [
+    'lead_details', 'members_details', 'cover_image_srcset', 'member_count', 'task_count', 'done_task_count',
+    'thread_count', 'pending_request_count', 'is_member', 'my_request_status'
+];
+
 function ManagementTab({ project, allUsers, onUpdate }) {
     const [data, setData] = useState({ ...project });
     const [saving, setSaving] = useState(false);
@@ -881,7 +1065,7 @@ function ManagementTab({ project, allUsers, onUpdate }) {
         Object.keys(data).forEach(key => {
             if (key === 'cover_image' && data[key] instanceof File) {
                 fd.append('cover_image', data[key]);
-            } else if (key !== 'cover_image' && key !== 'lead_details' && key !== 'members_details' && key !== 'tasks' && key !== 'threads' && key !== 'join_requests') {
+            } else if (key !== 'cover_image' && !READ_ONLY_FIELDS.includes(key)) {
                 // Exclude nested objects read_only
                 fd.append(key, data[key]);
             }
@@ -952,8 +1136,7 @@ function ManagementTab({ project, allUsers, onUpdate }) {
     )
 }
 function RequestAccessButton({ project, user }) {
-    const existing = project.join_requests?.find(r => r.user === user.id);
-    const [status, setStatus] = useState(existing ? existing.status : null);
+    const [status, setStatus] = useState(project.my_request_status || null);
     const [msg, setMsg] = useState("");
     const [sending, setSending] = useState(false);
 